@@ -69,6 +69,18 @@ def load_config(config_file, return_dict=False):
                 'batch_size': app_config.tuning.batch_size,
                 'delay': app_config.tuning.delay,
                 'max_workers': app_config.tuning.max_workers,
+                'spreadsheet_diff_update': app_config.tuning.spreadsheet_diff_update,
+                'spreadsheet_max_payload_bytes': app_config.tuning.spreadsheet_max_payload_bytes,
+                'spreadsheet_max_cells': app_config.tuning.spreadsheet_max_cells,
+                'spreadsheet_append_mode': app_config.tuning.spreadsheet_append_mode,
+                'fetch_backend': app_config.tuning.fetch_backend,
+                'ngram_index_columns': app_config.tuning.ngram_index_columns,
+                'consistent_snapshot': app_config.batch_session.consistent_snapshot,
+                'snapshot_global_lock': app_config.batch_session.snapshot_global_lock,
+                'net_read_timeout': app_config.batch_session.net_read_timeout,
+                'net_write_timeout': app_config.batch_session.net_write_timeout,
+                'max_execution_time': app_config.batch_session.max_execution_time,
+                'entry_timeout': app_config.batch_session.entry_timeout,
                 'config_file': config_file,
                 'batch_exe': {
                     'create_datasets': app_config.batch.create_datasets,
@@ -127,6 +139,22 @@ def load_config(config_file, return_dict=False):
         'batch_size': int(config['Tuning']['batch_size']),
         'delay': float(config['Tuning']['delay']),
         'max_workers': int(config['Tuning']['max_workers']),
+        'spreadsheet_diff_update': config.getboolean('Tuning', 'spreadsheet_diff_update', fallback=True),
+        'spreadsheet_max_payload_bytes': config.getint('Tuning', 'spreadsheet_max_payload_bytes', fallback=2000000),
+        'spreadsheet_max_cells': config.getint('Tuning', 'spreadsheet_max_cells', fallback=200000),
+        'spreadsheet_append_mode': config.getboolean('Tuning', 'spreadsheet_append_mode', fallback=True),
+        'fetch_backend': config.get('Tuning', 'fetch_backend', fallback='pandas'),
+        'ngram_index_columns': [
+            column.strip()
+            for column in config.get('Tuning', 'ngram_index_columns', fallback='').split(',')
+            if column.strip()
+        ],
+        'consistent_snapshot': config.getboolean('BatchSession', 'consistent_snapshot', fallback=False),
+        'snapshot_global_lock': config.getboolean('BatchSession', 'snapshot_global_lock', fallback=False),
+        'net_read_timeout': config.getint('BatchSession', 'net_read_timeout', fallback=0),
+        'net_write_timeout': config.getint('BatchSession', 'net_write_timeout', fallback=0),
+        'max_execution_time': config.getint('BatchSession', 'max_execution_time', fallback=0),
+        'entry_timeout': config.getint('BatchSession', 'entry_timeout', fallback=0),
         'config_file': config_file, 
     }
 
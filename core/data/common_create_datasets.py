@@ -24,6 +24,11 @@ from .subcode_loader import (
     setup_test_environment
 )
 from ..utils.db_utils import get_connection
+from src.core.google_api.rate_limiter import get_rate_limiter
+from src.core.database.fetch_backend import read_sql_frame
+from src.core.database.snapshot_session import SnapshotSession
+from src.core.database.query_timeout import QueryBudget, QueryTimeoutError, query_guard
+from src.utils.parquet_filters import PARQUET_ROW_GROUP_SIZE
 try:
     # 新構造のデータ処理を優先使用
     from src.utils.data_processing import format_dates
@@ -92,7 +97,7 @@ def main(sheet_name, execution_column, config_file, selected_table=None):
             # 'original_index'列を削除
             df_sorted = df_sorted.drop('original_index', axis=1)
             
-            df_sorted.to_parquet(output_path, engine='pyarrow', index=False)
+            df_sorted.to_parquet(output_path, engine='pyarrow', index=False, row_group_size=PARQUET_ROW_GROUP_SIZE)
             LOGGER.info(f"データをParquet形式で降順で保存しました: {output_path}")
         except Exception as e:
             LOGGER.error(f"Parquet保存中にエラーが発生しました: {e}")
@@ -101,6 +106,8 @@ def main(sheet_name, execution_column, config_file, selected_table=None):
     if conn:
         processed_count = 0
         total_count = len([e for e in sql_files_list if not selected_table or e[10] == selected_table])
+        snapshot = SnapshotSession.from_config([conn], additional_config).start()
+        query_budget = QueryBudget.from_config(additional_config, db_config, getattr(conn, 'server_port', local_port))
         
         for entry in sql_files_list:
             sql_file_name, csv_file_name, period_condition, period_criteria, save_path_id, output_to_spreadsheet, deletion_exclusion, paste_format, test_execution, category, main_table_name, csv_file_name_column, sheet_name_record = entry
@@ -112,6 +119,7 @@ def main(sheet_name, execution_column, config_file, selected_table=None):
                 
             processed_count += 1
             LOGGER.info(f"📊 処理中 ({processed_count}/{total_count}): {main_table_name} を開始します")
+            snapshot.ensure(conn)
 
             # テスト環境のセットアップ
             try:
@@ -179,9 +187,13 @@ def main(sheet_name, execution_column, config_file, selected_table=None):
                                 csv_file_name_column,
                                 sheet_name_record,
                                 additional_config.get('chunk_size'),
-                                additional_config.get('delay')
+                                additional_config.get('delay'),
+                                fetch_backend=additional_config.get('fetch_backend'),
+                                query_budget=query_budget
                             )
                             LOGGER.info(f"✅ 完了 ({processed_count}/{total_count}): {main_table_name} -> {csv_file_path}")
+                        except QueryTimeoutError as e:
+                            LOGGER.error(f"⏱ タイムアウト ({processed_count}/{total_count}): {main_table_name} - {e}")
                         except Exception as e:
                             LOGGER.error(f"❌ エラー ({processed_count}/{total_count}): {main_table_name} - {e}")
                             
@@ -202,9 +214,16 @@ def main(sheet_name, execution_column, config_file, selected_table=None):
                                 main_table_name,
                                 category,
                                 additional_config.get('chunk_size'),
-                                additional_config.get('delay')
+                                additional_config.get('delay'),
+                                diff_update=additional_config.get('spreadsheet_diff_update', True),
+                                max_payload_bytes=additional_config.get('spreadsheet_max_payload_bytes', 2000000),
+                                max_cells=additional_config.get('spreadsheet_max_cells', 200000),
+                                append_mode=additional_config.get('spreadsheet_append_mode', True),
+                                query_budget=query_budget
                             )
                             LOGGER.info(f"✅ 完了 ({processed_count}/{total_count}): {main_table_name} -> スプレッドシート: {csv_file_name}")
+                        except QueryTimeoutError as e:
+                            LOGGER.error(f"⏱ タイムアウト ({processed_count}/{total_count}): {main_table_name} - {e}")
                         except Exception as e:
                             LOGGER.error(f"❌ エラー ({processed_count}/{total_count}): {main_table_name} - {e}")
                             
@@ -232,10 +251,15 @@ def main(sheet_name, execution_column, config_file, selected_table=None):
                                 csv_file_name_column,
                                 sheet_name_record,
                                 additional_config.get('chunk_size'),
-                                additional_config.get('delay')
+                                additional_config.get('delay'),
+                                fetch_backend=additional_config.get('fetch_backend'),
+                                query_budget=query_budget,
+                                ngram_columns=additional_config.get('ngram_index_columns')
                             )
                             LOGGER.info(f"✅ 完了 ({processed_count}/{total_count}): {main_table_name} -> {parquet_file_path}")
                             LOGGER.info(f"🎉 データ処理完了: {main_table_name} - 正常に保存されました")
+                        except QueryTimeoutError as e:
+                            LOGGER.error(f"⏱ タイムアウト ({processed_count}/{total_count}): {main_table_name} - {e}")
                         except Exception as e:
                             LOGGER.error(f"❌ エラー ({processed_count}/{total_count}): {main_table_name} - {e}")
                     else:
@@ -249,9 +273,14 @@ def main(sheet_name, execution_column, config_file, selected_table=None):
                             try:
                                 # 接続状態をチェック
                                 conn.ping(reconnect=True)
-                                df = pd.read_sql_query(sql_query, conn)
+                                with query_guard(conn, sql_query, query_budget) as guarded_query:
+                                    df = read_sql_frame(conn, guarded_query, additional_config.get('fetch_backend'))
                                 LOGGER.info(f"SQLクエリ実行成功: {sql_file_name}")
                                 break
+                            except QueryTimeoutError as sql_err:
+                                # 上限で打ち切ったクエリは再試行しない
+                                LOGGER.error(f"⏱ タイムアウト ({processed_count}/{total_count}): {main_table_name} - {sql_err}")
+                                break
                             except mysql.connector.Error as sql_err:
                                 sql_retry_count += 1
                                 LOGGER.warning(f"SQL実行エラー (試行 {sql_retry_count}/{max_sql_retries}): {sql_err}")
@@ -314,7 +343,9 @@ def main(sheet_name, execution_column, config_file, selected_table=None):
             except Exception as e:
                 LOGGER.error(f"SQLクエリの実行中にエラーが発生しました: {e}")
                 continue
+        snapshot.end()
         conn.close()
+        get_rate_limiter().log_metrics()
         LOGGER.info("=" * 50)
         LOGGER.info("🎉 全ての処理が正常に完了しました - SUCCESS")
         LOGGER.info("=" * 50)
@@ -19,6 +19,9 @@ from .subcode_loader import (
 )
 from core.config.my_logging import setup_department_logger
 from src.utils import slack_notify
+from src.core.google_api.rate_limiter import get_rate_limiter
+from src.core.database.snapshot_session import SnapshotSession
+from src.core.database.query_timeout import QueryBudget, QueryTimeoutError
 import os
 from datetime import datetime, timedelta, date
 import time
@@ -28,9 +31,11 @@ import pyarrow.parquet as pq
 LOGGER = setup_department_logger('main', app_type='main')
 
 
-def process_sql_and_csv_files(sql_and_csv_files, conn, config):
+def process_sql_and_csv_files(sql_and_csv_files, conn, config, snapshot=None, query_budget=None):
     results = []
     for file_info in sql_and_csv_files:
+        if snapshot:
+            snapshot.ensure(conn)
         try:
             (
                 sql_file_name,
@@ -124,8 +129,13 @@ def process_sql_and_csv_files(sql_and_csv_files, conn, config):
                         csv_file_name_column,
                         sheet_name,
                         config.get('chunk_size'),
-                        config.get('delay')
+                        config.get('delay'),
+                        fetch_backend=config.get('fetch_backend'),
+                        query_budget=query_budget
                     )
+                except QueryTimeoutError as e:
+                    LOGGER.error(f"CSVファイルのエクスポートを打ち切りました: {e}")
+                    result = f"★タイムアウト★　{sql_file_name}: 実行時間の上限（{query_budget.timeout}秒）を超過"
                 except Exception as e:
                     LOGGER.error(f"CSVファイルのエクスポート中にエラーが発生しました: {e}")
                     result = f"★失敗★　{sql_file_name}: CSVファイルのエクスポート中にエラー"
@@ -147,8 +157,16 @@ def process_sql_and_csv_files(sql_and_csv_files, conn, config):
                         main_table_name,
                         category,
                         config.get('chunk_size'),
-                        config.get('delay')
+                        config.get('delay'),
+                        diff_update=config.get('spreadsheet_diff_update', True),
+                        max_payload_bytes=config.get('spreadsheet_max_payload_bytes', 2000000),
+                        max_cells=config.get('spreadsheet_max_cells', 200000),
+                        append_mode=config.get('spreadsheet_append_mode', True),
+                        query_budget=query_budget
                     )
+                except QueryTimeoutError as e:
+                    LOGGER.error(f"スプレッドシートへのエクスポートを打ち切りました: {e}")
+                    result = f"★タイムアウト★　{sql_file_name}: 実行時間の上限（{query_budget.timeout}秒）を超過"
                 except Exception as e:
                     LOGGER.error(f"スプレッドシートへのエクスポート中にエラーが発生しました: {e}")
                     result = f"★失敗★　{sql_file_name}: スプレッドシートへのエクスポート中にエラー"
@@ -172,8 +190,14 @@ def process_sql_and_csv_files(sql_and_csv_files, conn, config):
                         csv_file_name_column,
                         sheet_name,
                         config.get('chunk_size'),
-                        config.get('delay')
+                        config.get('delay'),
+                        fetch_backend=config.get('fetch_backend'),
+                        query_budget=query_budget,
+                        ngram_columns=config.get('ngram_index_columns')
                     )
+                except QueryTimeoutError as e:
+                    LOGGER.error(f"Parquetファイルのエクスポートを打ち切りました: {e}")
+                    result = f"★タイムアウト★　{sql_file_name}: 実行時間の上限（{query_budget.timeout}秒）を超過"
                 except Exception as e:
                     LOGGER.error(f"Parquetファイルのエクスポート中にエラーが発生しました: {e}")
                     result = f"★失敗★　{sql_file_name}: Parquetファイルのエクスポート中にエラー"
@@ -240,8 +264,10 @@ def main(sheet_name, execution_column, config_file):
             conn = create_database_connection(db_config, tunnel.local_bind_port)
             if conn:
                 LOGGER.info("データベースに接続しました。")
+                query_budget = QueryBudget.from_config(config, db_config, tunnel.local_bind_port)
                 try:
-                    results = process_sql_and_csv_files(sql_and_csv_files, conn, config)
+                    with SnapshotSession.from_config([conn], config) as snapshot:
+                        results = process_sql_and_csv_files(sql_and_csv_files, conn, config, snapshot, query_budget)
                 except Exception as e:
                     LOGGER.error(f"SQLおよびCSVファイルの処理中にエラーが発生しました: {e}")
                     slack_notify.send_slack_error_message(e, config=config)
@@ -261,6 +287,7 @@ def main(sheet_name, execution_column, config_file):
             LOGGER.info("\n処理結果一覧:")
             for result in results:
                 LOGGER.info(result)
+            get_rate_limiter().log_metrics()
 
 
 if __name__ == "__main__":
@@ -3,7 +3,6 @@ import gspread
 from googleapiclient.discovery import build
 import pandas as pd
 from datetime import datetime, timedelta, date
-from openpyxl.utils import get_column_letter
 import os
 import re
 import io
@@ -17,7 +16,19 @@ except ImportError:
     # フォールバック：旧構造
     from core.config.my_logging import setup_department_logger
     LOGGER = setup_department_logger('datasets', app_type='datasets')
-from tenacity import retry, stop_after_attempt, wait_exponential, before_sleep_log
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential, before_sleep_log
+from src.core.google_api.rate_limiter import (
+    RATE_LIMIT_STATUS_CODES, RETRYABLE_STATUS_CODES, drive_call, get_rate_limiter, get_status_code, sheets_read, sheets_write
+)
+from src.core.google_api.batch_writer import AdaptiveBatchWriter, a1_range, column_letter, iter_payload_chunks
+from src.core.google_api.append_ledger import AppendLedger, chunk_hash, new_run_id
+from src.core.google_api.sheet_snapshot import get_snapshot_store
+from src.core.google_api.sheet_values import prefetch_converted_batches
+from src.core.database.fetch_backend import read_sql_frame
+from src.core.database.query_timeout import QueryTimeoutError, query_guard
+from src.utils.parquet_filters import PARQUET_ROW_GROUP_SIZE, display_ordered_table
+from src.utils.parquet_index import write_parquet_index
+from src.utils.dataset_metadata import write_dataset_metadata
 import shutil
 import traceback
 import pyarrow as pa
@@ -27,6 +38,9 @@ import pyarrow.parquet as pq
 
 # ログシステム初期化完了
 
+# スプシ書き込み時に列データから一度に行リストへ展開する行数
+WRITE_BATCH_ROWS = 5000
+
 # Googleの認証処理
 def authenticate_google_api(json_keyfile_path, scopes):
     credentials = ServiceAccountCredentials.from_json_keyfile_name(json_keyfile_path, scopes)
@@ -37,6 +51,8 @@ def retry_on_exception(func):
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=60, min=60, max=300),
+        # 実行時間の上限で打ち切ったクエリは再実行しても同じ結果になるためリトライしない
+        retry=retry_if_not_exception_type(QueryTimeoutError),
         before_sleep=before_sleep_log
     )
     def wrapper(*args, **kwargs):
@@ -60,7 +76,6 @@ def load_sql_file_list_from_spreadsheet(spreadsheet_id, sheet_name, json_keyfile
     Returns:
         実行対象とマークされたSQLファイル名のリスト。
     """
-    SCOPES = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
     SQL_FILE_COLUMN = 'sqlファイル名'
     CSV_FILE_COLUMN = 'CSVファイル名/SSシート名'
     FILENAME_FORMAT_COLUMN = '保存ファイル名形式'
@@ -77,12 +92,9 @@ def load_sql_file_list_from_spreadsheet(spreadsheet_id, sheet_name, json_keyfile
     SHEET_NAME_COLUMN = 'シート名'
     EXECUTION_FREQUENCY_COLUMN = '実行頻度'
 
-    credentials = authenticate_google_api(json_keyfile_path, SCOPES)
-    gc = gspread.authorize(credentials)
-
     try:
-        worksheet = gc.open_by_key(spreadsheet_id).worksheet(sheet_name)
-        records = worksheet.get_all_records()
+        # ローカルスナップショット経由で取得（シートが更新されている場合のみ再取得）
+        records = get_snapshot_store(json_keyfile_path).get_records(spreadsheet_id, sheet_name)
         LOGGER.info(f"Loaded sheet: {sheet_name} with {len(records)} records.")
     except Exception as e:
         LOGGER.error(f"Failed to load worksheet '{sheet_name}' from spreadsheet '{spreadsheet_id}': {e}")
@@ -158,9 +170,9 @@ def load_sql_from_file(file_path, google_folder_id, json_keyfile_path):
         LOGGER.info(f"SQLファイル名: {file_path}")
 
         query = f"'{google_folder_id}' in parents and name = '{file_path}'"
-        file_list_results = service.files().list(
+        file_list_results = drive_call(service.files().list(
             q=query, fields="files(id)", supportsAllDrives=True, includeItemsFromAllDrives=True
-        ).execute()
+        ).execute)
         files = file_list_results.get('files', [])
 
         LOGGER.info(f"ファイルリスト結果: {files}")
@@ -168,7 +180,7 @@ def load_sql_from_file(file_path, google_folder_id, json_keyfile_path):
         if files:
             file_id = files[0]['id']
             LOGGER.info(f"ファイルID取得成功: {file_id}")
-            file_content = service.files().get_media(fileId=file_id, supportsAllDrives=True).execute().decode('utf-8')
+            file_content = drive_call(service.files().get_media(fileId=file_id, supportsAllDrives=True).execute).decode('utf-8')
             LOGGER.info(f"SQLファイル読み込み成功 - 文字数: {len(file_content)}")
             LOGGER.info(f"SQL内容（最初の200文字）: {file_content[:200]}...")
             sql_query = file_content.strip()
@@ -244,23 +256,29 @@ def combine_chunk_files(chunk_file_paths, output_file_path):
         LOGGER.error(f"チャンクファイルの結合時にエラーが発生しました: {e}")
         raise
 
+def _log_result(error):
+    """ログシートに記録する結果（実行時間の上限による打ち切りはタイムアウトとして区別する）"""
+    return "タイムアウト" if isinstance(error, QueryTimeoutError) else "失敗"
+
 # CSVファイル処理
 @retry_on_exception
-def csvfile_export(conn, sql_query, csv_file_path, main_table_name, category, json_keyfile_path, spreadsheet_id, csv_file_name, csv_file_name_column, sheet_name, chunk_size=None, delay=None):
+def csvfile_export(conn, sql_query, csv_file_path, main_table_name, category, json_keyfile_path, spreadsheet_id, csv_file_name, csv_file_name_column, sheet_name, chunk_size=None, delay=None, fetch_backend=None, query_budget=None):
     try:
         if sheet_name:
             try:
                 scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
                 credentials = ServiceAccountCredentials.from_json_keyfile_name(json_keyfile_path, scope)
                 gc = gspread.authorize(credentials)
-                worksheet = gc.open_by_key(spreadsheet_id).worksheet(sheet_name)
+                spreadsheet = sheets_read(gc.open_by_key, spreadsheet_id)
+                worksheet = sheets_read(spreadsheet.worksheet, sheet_name)
             except gspread.exceptions.WorksheetNotFound as e:
                 LOGGER.error(f"ワークシート '{sheet_name}' が見つかりませんでした: {e}")
                 write_to_log_sheet(csv_file_name_column, sheet_name, main_table_name, category, 0, json_keyfile_path, "失敗", str(e), csv_file_path)
                 raise
 
         data_types = get_data_types(worksheet) if sheet_name else {}
-        df = pd.read_sql(sql_query, conn)
+        with query_guard(conn, sql_query, query_budget) as guarded_query:
+            df = read_sql_frame(conn, guarded_query, fetch_backend)
 
         # NaN、None、'nan'、'None'を空文字列に置換
         df = df.fillna('').replace({'None': '', 'nan': ''})
@@ -306,18 +324,19 @@ def csvfile_export(conn, sql_query, csv_file_path, main_table_name, category, js
 
     except Exception as e:
         LOGGER.error(f"クエリ実行またはCSVファイル書き込み時にエラーが発生しました: {e}")
-        write_to_log_sheet(csv_file_name_column, sheet_name, main_table_name, category, 0, json_keyfile_path, "失敗", str(e), csv_file_path)
+        write_to_log_sheet(csv_file_name_column, sheet_name, main_table_name, category, 0, json_keyfile_path, _log_result(e), str(e), csv_file_path)
         raise
 
 @retry_on_exception
-def parquetfile_export(conn, sql_query, parquet_file_path, main_table_name, category, json_keyfile_path, spreadsheet_id, parquet_file_name, csv_file_name_column, sheet_name, chunk_size=None, delay=None):
+def parquetfile_export(conn, sql_query, parquet_file_path, main_table_name, category, json_keyfile_path, spreadsheet_id, parquet_file_name, csv_file_name_column, sheet_name, chunk_size=None, delay=None, fetch_backend=None, query_budget=None, ngram_columns=None):
     try:
         if sheet_name:
             try:
                 scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
                 credentials = ServiceAccountCredentials.from_json_keyfile_name(json_keyfile_path, scope)
                 gc = gspread.authorize(credentials)
-                worksheet = gc.open_by_key(spreadsheet_id).worksheet(sheet_name)
+                spreadsheet = sheets_read(gc.open_by_key, spreadsheet_id)
+                worksheet = sheets_read(spreadsheet.worksheet, sheet_name)
             except gspread.exceptions.WorksheetNotFound as e:
                 LOGGER.error(f"ワークシート '{sheet_name}' が見つかりませんでした: {e}")
                 write_to_log_sheet(csv_file_name_column, sheet_name, main_table_name, category, 0, json_keyfile_path, "失敗", str(e), parquet_file_path)
@@ -326,7 +345,8 @@ def parquetfile_export(conn, sql_query, parquet_file_path, main_table_name, cate
         data_types = get_data_types(worksheet) if sheet_name else {}
         LOGGER.info(f"Detected data types: {data_types}")
         
-        df = pd.read_sql(sql_query, conn)
+        with query_guard(conn, sql_query, query_budget) as guarded_query:
+            df = read_sql_frame(conn, guarded_query, fetch_backend)
 
         LOGGER.info(f"Original DataFrame loaded with {len(df)} records.")
 
@@ -345,15 +365,38 @@ def parquetfile_export(conn, sql_query, parquet_file_path, main_table_name, cate
         temp_file_path = os.path.join(os.path.dirname(parquet_file_path), os.path.basename(parquet_file_path) + '.temp')
 
         try:
-            # DataFrameをParquetファイルとして保存
-            table = pa.Table.from_pandas(df)
-            pq.write_table(table, temp_file_path)
+            # DataFrameをビューアの表示順（インデックスの降順）でParquetファイルとして保存
+            # （文字列にした日付・日時の列は、ISO形式であれば読み込み時に日付範囲で絞り込めるよう記録する）
+            string_date_columns = [column for column, data_type in data_types.items() if data_type in ('date', 'datetime')]
+            table = display_ordered_table(df, date_columns=string_date_columns)
+            pq.write_table(table, temp_file_path, row_group_size=PARQUET_ROW_GROUP_SIZE)
             
             # 処理が成功したら、一時ファイルを正式なファイルに置き換え
             if os.path.exists(parquet_file_path):
                 os.remove(parquet_file_path)
             os.rename(temp_file_path, parquet_file_path)
 
+            filter_fields = {}
+            # ビューアの絞込項目の検索用インデックスを作成（失敗してもParquetファイルはそのまま使える）
+            try:
+                filter_fields = get_filter_fields(worksheet) if sheet_name else {}
+                write_parquet_index(
+                    parquet_file_path,
+                    table,
+                    filter_fields,
+                    ngram_columns=ngram_columns or ()
+                )
+            except Exception as e:
+                LOGGER.warning(f"検索用インデックスの作成に失敗しました: {parquet_file_path}, {e}")
+
+            # ビューアの絞込フォーム用の集計情報を作成（失敗しても絞込フォームは従来どおり表示できる）
+            try:
+                # 日付・日時は文字列で保存しているため、絞込の入力方式が日付・日時の列は変換して範囲を求める
+                date_columns = [field for field, input_type in filter_fields.items() if input_type in ('Date', 'Datetime')]
+                write_dataset_metadata(parquet_file_path, table, date_columns=date_columns)
+            except Exception as e:
+                LOGGER.warning(f"集計情報の作成に失敗しました: {parquet_file_path}, {e}")
+
             record_count = len(df)
             write_to_log_sheet(csv_file_name_column, sheet_name, main_table_name, category, record_count, json_keyfile_path, "成功", None, parquet_file_path)
             LOGGER.info(f"Parquetファイルが正常に保存されました: {parquet_file_path} ({record_count} レコード)")
@@ -371,7 +414,7 @@ def parquetfile_export(conn, sql_query, parquet_file_path, main_table_name, cate
     except Exception as e:
         LOGGER.error(f"クエリ実行またはParquetファイル書き込み時にエラーが発生しました: {e}")
         LOGGER.error(f"エラーの詳細:\n{traceback.format_exc()}")
-        write_to_log_sheet(csv_file_name_column, sheet_name, main_table_name, category, 0, json_keyfile_path, "失敗", str(e), parquet_file_path)
+        write_to_log_sheet(csv_file_name_column, sheet_name, main_table_name, category, 0, json_keyfile_path, _log_result(e), str(e), parquet_file_path)
         raise
 
 # 複数のパターンにマッチする正規表現を定義
@@ -930,67 +973,261 @@ def generate_period_condition(period_condition, column_name, table_alias):
         LOGGER.error(f"period_condition: '{period_condition}'")
         return ""
 
-def get_column_letter(column_index):
-    # 1から始まるインデックスに対応するため、1を引く
-    column_index -= 1
-    letter = ''
-    while column_index >= 0:
-        letter = chr(column_index % 26 + 65) + letter
-        column_index = column_index // 26 - 1
-    return letter
+def _normalize_cell_for_diff(cell):
+    """差分比較用にセル値を文字列へ正規化（シートから読み戻した値と同じ表現に揃える）"""
+    if cell is None:
+        return ''
+    if isinstance(cell, bool):
+        return 'TRUE' if cell else 'FALSE'
+    if isinstance(cell, float) and cell.is_integer():
+        return str(int(cell))
+    return str(cell)
+
+def _normalize_row_for_diff(row, column_count):
+    """差分比較用に行を正規化（末尾の空セルが省略された行も列数を揃える）"""
+    normalized = [_normalize_cell_for_diff(cell) for cell in row[:column_count]]
+    normalized.extend([''] * (column_count - len(normalized)))
+    return normalized
+
+def _ensure_row_capacity(worksheet, required_rows):
+    """シートの行数が required_rows に満たない場合は1万行ずつ追加"""
+    rows_to_add = required_rows - worksheet.row_count
+    while rows_to_add > 0:
+        rows_to_add_now = min(10000, rows_to_add)
+        sheets_write(worksheet.add_rows, rows_to_add_now)
+        rows_to_add -= rows_to_add_now
+        LOGGER.info(f"{rows_to_add_now} 行をシートに追加しました。")
+
+def _write_batch(writer, worksheet, batch, start_row, column_count):
+    """変換済みバッチを WRITE_BATCH_ROWS 行ずつ展開して書き込みキューに追加"""
+    for offset, rows in batch.iter_batches(WRITE_BATCH_ROWS):
+        writer.add_rows(worksheet.title, start_row + offset, rows, column_count)
+
+def _log_fetched_batches(batches):
+    """取得済みバッチを順に返しつつ、先頭バッチの型チェックと進捗をログ出力"""
+    fetched = 0
+    for batch in batches:
+        if fetched == 0:
+            LOGGER.info("データ変換完了。型チェックを実行します。")
+            for row_idx, row in enumerate(batch.rows(0, 3)):  # 最初の3行をサンプルチェック
+                for col_idx, cell in enumerate(row):
+                    cell_type = type(cell).__name__
+                    if cell_type not in ['str', 'int', 'float', 'bool', 'NoneType']:
+                        LOGGER.warning(f"想定外の型が検出されました - 行{row_idx+1}, 列{col_idx+1}: {cell_type} = {cell}")
+                    else:
+                        LOGGER.debug(f"行{row_idx+1}, 列{col_idx+1}: {cell_type} = {str(cell)[:50]}")  # 50文字まで表示
+        fetched += len(batch)
+        LOGGER.info(f"取得済み: {fetched} 件")
+        yield batch
+
+def diff_update_worksheet(worksheet, batches, column_count, writer):
+    """
+    全張替えを差分更新で行う
+
+    既存のデータ範囲を1回の読み取りで取得し、取得済みのバッチから順に行単位で比較して
+    変更・追加のあった行範囲のみを一括書き込みクラスに渡して書き込む。
+    新しいデータより後ろに残った既存行はクリアする。
+
+    Args:
+        worksheet: 書き込み先のWorksheetオブジェクト
+        batches: 書き込むデータ（ヘッダ行を除くColumnarRowsのイテラブル）
+        column_count: 列数
+        writer: AdaptiveBatchWriter
+
+    Returns:
+        dict: 総行数・変更行数・クリア行数
+    """
+    last_column_letter = column_letter(column_count)
+
+    existing_values = []
+    if worksheet.row_count >= 2:
+        read_range = f'A2:{last_column_letter}{worksheet.row_count}'
+        existing_values = sheets_read(worksheet.get, read_range, value_render_option='FORMULA')
+    existing_rows = [_normalize_row_for_diff(row, column_count) for row in existing_values]
+    LOGGER.info(f"差分更新: 既存データ {len(existing_rows)} 行")
+
+    total_rows = 0
+    changed_row_count = 0
+    changed_range_count = 0
+    for batch in batches:
+        _ensure_row_capacity(worksheet, total_rows + len(batch) + 1)
+
+        # バッチ内の変更行の連続区間を抽出（0始まり、終端は含まない）
+        changed_ranges = []
+        range_start = None
+        for offset, rows in batch.iter_batches(WRITE_BATCH_ROWS):
+            for i, row in enumerate(rows):
+                idx = total_rows + offset + i
+                changed = idx >= len(existing_rows) or _normalize_row_for_diff(row, column_count) != existing_rows[idx]
+                if changed and range_start is None:
+                    range_start = offset + i
+                elif not changed and range_start is not None:
+                    changed_ranges.append((range_start, offset + i))
+                    range_start = None
+        if range_start is not None:
+            changed_ranges.append((range_start, len(batch)))
+
+        for start, end in changed_ranges:
+            for piece_start in range(start, end, WRITE_BATCH_ROWS):
+                piece_end = min(piece_start + WRITE_BATCH_ROWS, end)
+                writer.add_rows(worksheet.title, total_rows + piece_start + 2, batch.rows(piece_start, piece_end), column_count)
+            changed_row_count += end - start
+        changed_range_count += len(changed_ranges)
+        total_rows += len(batch)
+    writer.flush()
+
+    # 新データより後ろに残っている既存行をクリア
+    cleared_row_count = max(0, len(existing_rows) - total_rows)
+    if cleared_row_count:
+        clear_range = f'A{total_rows + 2}:{last_column_letter}{len(existing_rows) + 1}'
+        LOGGER.info(f"Clearing range: {clear_range}")
+        sheets_write(worksheet.batch_clear, [clear_range])
+
+    LOGGER.info(
+        f"差分更新完了: 変更 {changed_row_count} 行 ({changed_range_count} 範囲), "
+        f"クリア {cleared_row_count} 行, 未変更 {total_rows - changed_row_count} 行"
+    )
+    return {'rows': total_rows, 'changed_rows': changed_row_count, 'cleared_rows': cleared_row_count}
+
+def _chunk_at_tail(worksheet, chunk, column_count):
+    """シート末尾の行がチャンクと一致するか（追記の応答がエラーだった場合に、追記済みかを確認する）"""
+    last_row = len(sheets_read(worksheet.col_values, 1))
+    first_row = last_row - len(chunk) + 1
+    if first_row < 2:
+        return False
+    tail_range = f'A{first_row}:{column_letter(column_count)}{last_row}'
+    tail = sheets_read(worksheet.get, tail_range, value_render_option='FORMULA')
+    return (
+        [_normalize_row_for_diff(row, column_count) for row in tail]
+        == [_normalize_row_for_diff(row, column_count) for row in chunk]
+    )
+
+def _append_chunk(spreadsheet, worksheet, append_range, params, chunk, column_count):
+    """
+    チャンクを values.append で追記する
+
+    values.append は冪等ではなく、5xxエラーの応答でもサーバー側では追記済みの場合がある。
+    レートリミッターでの再試行は429に限り、5xxの場合はシート末尾を読み取って追記されていなければ再送する。
+    """
+    limiter = get_rate_limiter()
+    attempt = 0
+    while True:
+        try:
+            sheets_write(spreadsheet.values_append, append_range, params, {'values': chunk},
+                         retry_statuses=RATE_LIMIT_STATUS_CODES)
+            return
+        except Exception as e:
+            status = get_status_code(e)
+            if status not in RETRYABLE_STATUS_CODES:
+                raise
+            if _chunk_at_tail(worksheet, chunk, column_count):
+                LOGGER.warning(f"追記の応答はエラー (HTTP {status}) でしたが、シート末尾に追記済みのため再送しません")
+                return
+            if attempt >= limiter.max_retries:
+                raise
+            sleep_seconds = limiter.backoff_seconds(attempt)
+            attempt += 1
+            LOGGER.warning(
+                f"追記エラー (HTTP {status})。シート末尾に追記されていないため "
+                f"{sleep_seconds:.1f}秒後に再送します ({attempt}/{limiter.max_retries})"
+            )
+            time.sleep(sleep_seconds)
+
+def append_with_ledger(spreadsheet, worksheet, batches, column_count, run_id, max_payload_bytes, max_cells, max_rows=None, delay=0, ledger=None):
+    """
+    最終行積立てを values.append で行う
+
+    追記位置はサーバー側で決定するため、シートの既存データを読み取らない。
+    書き込んだチャンクは追記台帳に実行ID・ハッシュで記録し、
+    同じ実行IDでのリトライ時には書き込み済みのチャンクを読み飛ばす。
+    応答がエラーでも追記済みのチャンクは、シート末尾を確認して二重に追記しない。
+
+    Args:
+        spreadsheet: gspreadのSpreadsheetオブジェクト
+        worksheet: 書き込み先のWorksheetオブジェクト
+        batches: 書き込むデータ（ColumnarRowsのイテラブル）
+        column_count: 列数
+        run_id: 実行ID（リトライ間で共通）
+        max_payload_bytes: 1リクエストあたりの最大バイト数
+        max_cells: 1リクエストあたりの最大セル数
+        max_rows: 1リクエストあたりの最大行数
+        delay: リクエスト間の待機秒数
+        ledger: AppendLedger（省略時は既定のパス）
+
+    Returns:
+        dict: 総行数・追記行数・読み飛ばし行数
+    """
+    ledger = ledger or AppendLedger()
+    ledger_key = AppendLedger.sheet_key(spreadsheet.id, worksheet.title)
+    written = ledger.written_chunks(ledger_key, run_id)
+    if written:
+        LOGGER.info(f"追記台帳: 前回の試行で書き込み済みのチャンク {len(written)} 件を読み飛ばします")
+
+    append_range = a1_range(worksheet.title, 1, 1, column_count)
+    params = {'valueInputOption': 'RAW', 'insertDataOption': 'INSERT_ROWS'}
+    chunk_index = 0
+    total_rows = appended_rows = skipped_rows = requests = 0
+
+    for batch in batches:
+        for chunk in iter_payload_chunks(batch.rows(), column_count, max_payload_bytes, max_cells, max_rows):
+            digest = chunk_hash(chunk_index, chunk)
+            chunk_index += 1
+            total_rows += len(chunk)
+            if digest in written:
+                skipped_rows += len(chunk)
+                continue
+            if requests and delay:
+                LOGGER.info(f"{delay}秒待機します。")
+                time.sleep(delay)
+            _append_chunk(spreadsheet, worksheet, append_range, params, chunk, column_count)
+            ledger.record(ledger_key, run_id, digest, len(chunk))
+            requests += 1
+            appended_rows += len(chunk)
+            LOGGER.info(f"追記チャンク{chunk_index} の書き込み完了 ({len(chunk)} 行)")
+
+    ledger.complete(ledger_key, run_id)
+    LOGGER.info(f"追記完了: 追記 {appended_rows} 行 ({requests} リクエスト), 読み飛ばし {skipped_rows} 行")
+    return {'rows': total_rows, 'appended_rows': appended_rows, 'skipped_rows': skipped_rows}
 
 # スプシ貼り付け
+def export_to_spreadsheet(conn, sql_query, save_path_id, sheet_name, json_keyfile_path, paste_format, main_sheet_name, csv_file_name_column, main_table_name, category, chunk_size=10000, delay=0, diff_update=True, max_payload_bytes=2000000, max_cells=200000, append_mode=True, query_budget=None):
+    """
+    SQLの結果をスプレッドシートに貼り付け
+
+    リトライ間で共通の実行IDを発行し、最終行積立ての追記台帳で二重追記を防ぐ。
+    """
+    return _export_to_spreadsheet(
+        conn, sql_query, save_path_id, sheet_name, json_keyfile_path, paste_format, main_sheet_name,
+        csv_file_name_column, main_table_name, category, chunk_size, delay, diff_update,
+        max_payload_bytes, max_cells, append_mode, new_run_id(), query_budget
+    )
+
 @retry_on_exception
-def export_to_spreadsheet(conn, sql_query, save_path_id, sheet_name, json_keyfile_path, paste_format, main_sheet_name, csv_file_name_column, main_table_name, category, chunk_size=10000, delay=0):
+def _export_to_spreadsheet(conn, sql_query, save_path_id, sheet_name, json_keyfile_path, paste_format, main_sheet_name, csv_file_name_column, main_table_name, category, chunk_size=10000, delay=0, diff_update=True, max_payload_bytes=2000000, max_cells=200000, append_mode=True, append_run_id=None, query_budget=None):
 
     LOGGER.info("SQLクエリの実行を開始します。（スプシの貼り付け）")
     cursor = conn.cursor()
+    record_count = 0
+    prefetched = None
     try:
-        cursor.execute(sql_query)
-        fetchall = cursor.fetchall()
-        record_count = len(fetchall)
+        # 取得はアップロードと並行して進むため、上限はクエリの実行までに適用する
+        # （ヒントを付けるとアップロードが遅い場合に取得の途中でサーバーに打ち切られるため付与しない）
+        with query_guard(conn, sql_query, query_budget, streaming=True) as guarded_query:
+            cursor.execute(guarded_query)
 
         # ヘッダ行の取得
         headers = [i[0] for i in cursor.description]
 
-        # Decimal、date、datetimeオブジェクトを文字列に変換
-        converted_data = []
-        LOGGER.info(f"データ変換開始: 総レコード数 {record_count}")
-        for row_idx, row in enumerate(fetchall):
-            converted_row = []
-            for col_idx, cell in enumerate(row):
-                if isinstance(cell, (Decimal, date, datetime, timedelta)):
-                    converted_cell = str(cell)
-                    # サンプル行のみ詳細ログ出力（最初の10行のみ）
-                    if row_idx < 10:
-                        LOGGER.debug(f"行{row_idx+1}, 列{col_idx+1}: {type(cell).__name__} -> str: {converted_cell}")
-                elif cell is not None:
-                    converted_cell = cell
-                else:
-                    converted_cell = ''
-                converted_row.append(converted_cell)
-            converted_data.append(converted_row)
-        
-        # データ変換後の型チェック
-        LOGGER.info("データ変換完了。型チェックを実行します。")
-        for row_idx, row in enumerate(converted_data[:3]):  # 最初の3行をサンプルチェック
-            for col_idx, cell in enumerate(row):
-                cell_type = type(cell).__name__
-                if cell_type not in ['str', 'int', 'float', 'bool', 'NoneType']:
-                    LOGGER.warning(f"想定外の型が検出されました - 行{row_idx+1}, 列{col_idx+1}: {cell_type} = {cell}")
-                else:
-                    LOGGER.debug(f"行{row_idx+1}, 列{col_idx+1}: {cell_type} = {str(cell)[:50]}")  # 50文字まで表示
-        
-        write_to_log_sheet(csv_file_name_column, sheet_name, main_table_name, category, record_count, json_keyfile_path, "成功", None, save_path_id)  # ログシートに成功を書き込む
-
         SCOPES = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
         credentials = authenticate_google_api(json_keyfile_path, SCOPES)
         gc = gspread.authorize(credentials)
 
-        spreadsheet = gc.open_by_key(save_path_id)
+        spreadsheet = sheets_read(gc.open_by_key, save_path_id)
 
         if sheet_name == main_sheet_name:
             # 実行シートの場合は処理をスキップ
+            record_count = len(cursor.fetchall())
+            write_to_log_sheet(csv_file_name_column, sheet_name, main_table_name, category, record_count, json_keyfile_path, "成功", None, save_path_id)  # ログシートに成功を書き込む
             LOGGER.info(f"Skipping export to main sheet: {sheet_name}")
             return
 
@@ -1000,94 +1237,71 @@ def export_to_spreadsheet(conn, sql_query, save_path_id, sheet_name, json_keyfil
             LOGGER.info("CSVファイル名/SSシート名がブランクの場合、CSVファイル呼称を使用します。")
 
         try:
-            worksheet = spreadsheet.worksheet(sheet_name)
+            worksheet = sheets_read(spreadsheet.worksheet, sheet_name)
         except gspread.exceptions.WorksheetNotFound:
             # 指定されたシートが存在しない場合は新しいシートを追加
             LOGGER.info(f"シート '{sheet_name}' が存在しないため、新規作成します。")
-            worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=1000, cols=26)
+            worksheet = sheets_write(spreadsheet.add_worksheet, title=sheet_name, rows=1000, cols=26)
             # 新しいシートの場合、ヘッダ行を追加し、ブランク行を追加
-            worksheet.update('A1', [headers])
-            worksheet.append_row([''] * len(headers))  # ブランク行の追加
+            sheets_write(worksheet.update, 'A1', [headers])
+            sheets_write(worksheet.append_row, [''] * len(headers))  # ブランク行の追加
 
         # 既存シートの1行目をチェックし、ヘッダ行が存在しない場合は追加
-        if not worksheet.row_values(1):
-            worksheet.update('A1', [headers])
-            worksheet.append_row([''] * len(headers))  # ブランク行の追加
+        if not sheets_read(worksheet.row_values, 1):
+            sheets_write(worksheet.update, 'A1', [headers])
+            sheets_write(worksheet.append_row, [''] * len(headers))  # ブランク行の追加
             LOGGER.info("ヘッダ行をシートに追加しました。")
         else:
             LOGGER.info("ヘッダ行は既に存在します。")
 
         column_count = len(cursor.description)
-        last_column_letter = get_column_letter(column_count)
+        last_column_letter = column_letter(column_count)
         LOGGER.info(f"Column count: {column_count}, Last column letter: {last_column_letter}")
 
-        if paste_format == '最終行積立て':
-            last_row = len(worksheet.col_values(1)) + 1
-            if last_row > worksheet.row_count:
-                additional_rows = last_row - worksheet.row_count
-                worksheet.add_rows(additional_rows)
-            for i in range(0, len(converted_data), chunk_size):
-                chunk = converted_data[i:i + chunk_size]
-                LOGGER.info(f"チャンク{i//chunk_size + 1} (行{i+1}～{min(i+chunk_size, len(converted_data))}) の書き込みを開始")
-                
-                # チャンクの型チェック
-                for chunk_row_idx, chunk_row in enumerate(chunk[:1]):  # 最初の行のみチェック
-                    for col_idx, cell in enumerate(chunk_row):
-                        cell_type = type(cell).__name__
-                        if cell_type not in ['str', 'int', 'float', 'bool', 'NoneType']:
-                            LOGGER.error(f"チャンク内で想定外の型が検出: 行{chunk_row_idx+1}, 列{col_idx+1}: {cell_type} = {cell}")
-                
-                try:
-                    worksheet.update(f'A{last_row}', chunk)
-                    LOGGER.info(f"チャンク{i//chunk_size + 1} の書き込み完了")
-                except Exception as chunk_error:
-                    LOGGER.error(f"チャンク{i//chunk_size + 1} の書き込み中にエラー: {chunk_error}")
-                    LOGGER.error(f"エラー詳細:\n{traceback.format_exc()}")
-                    raise
-                    
-                last_row += len(chunk)
-                if delay:
-                    LOGGER.info(f"{delay}秒待機します。")
-                    time.sleep(delay)
+        # 推定ペイロードサイズに応じて書き込みリクエストをまとめる
+        writer = AdaptiveBatchWriter(
+            spreadsheet,
+            max_payload_bytes=max_payload_bytes,
+            max_cells=max_cells,
+            max_rows=chunk_size,
+            delay=delay
+        )
+
+        # DBからの取得・列変換を別スレッドで先行させ、アップロードと並行して処理する
+        LOGGER.info(f"データ取得・変換開始: {chunk_size} 件ずつ取得")
+        prefetched = prefetch_converted_batches(cursor, chunk_size or 10000)
+        batches = _log_fetched_batches(prefetched)
+
+        if paste_format == '最終行積立て' and append_mode:
+            # 追記位置をサーバー側で決定し、追記台帳でリトライ時の二重追記を防ぐ
+            record_count = append_with_ledger(
+                spreadsheet, worksheet, batches, column_count, append_run_id or new_run_id(),
+                max_payload_bytes, max_cells, max_rows=chunk_size, delay=delay
+            )['rows']
+        elif paste_format == '最終行積立て':
+            last_row = len(sheets_read(worksheet.col_values, 1)) + 1
+            for batch in batches:
+                _ensure_row_capacity(worksheet, last_row + record_count + len(batch) - 1)
+                _write_batch(writer, worksheet, batch, last_row + record_count, column_count)
+                record_count += len(batch)
+        elif paste_format == '全張替え' and diff_update:
+            # 既存データと比較し、変更のあった行のみ書き込む
+            record_count = diff_update_worksheet(worksheet, batches, column_count, writer)['rows']
         elif paste_format == '全張替え':
-            # 既存のヘッダ行を保持し、データ部分のみクリア
-            clear_range = f'A2:{last_column_letter}{worksheet.row_count}'
-            LOGGER.info(f"Clearing range: {clear_range}")
-            worksheet.batch_clear([clear_range])
-
-            data_row_count = len(converted_data)
-            rows_to_add = data_row_count - (worksheet.row_count - 1)
-            # 1万行ずつ追加
-            while rows_to_add > 0:
-                rows_to_add_now = min(10000, rows_to_add)
-                worksheet.add_rows(rows_to_add_now)
-                rows_to_add -= rows_to_add_now
-                LOGGER.info(f"{rows_to_add_now} 行をシートに追加しました。")
-
-            row_start = 2  # データの開始行は2行目から
-            for i in range(0, len(converted_data), chunk_size):
-                chunk = converted_data[i:i + chunk_size]
-                LOGGER.info(f"全張替えチャンク{i//chunk_size + 1} (行{i+1}～{min(i+chunk_size, len(converted_data))}) の書き込みを開始")
-                
-                # チャンクの型チェック
-                for chunk_row_idx, chunk_row in enumerate(chunk[:1]):  # 最初の行のみチェック
-                    for col_idx, cell in enumerate(chunk_row):
-                        cell_type = type(cell).__name__
-                        if cell_type not in ['str', 'int', 'float', 'bool', 'NoneType']:
-                            LOGGER.error(f"全張替えチャンク内で想定外の型が検出: 行{chunk_row_idx+1}, 列{col_idx+1}: {cell_type} = {cell}")
-                
-                try:
-                    worksheet.update(f'A{row_start}', chunk)
-                    LOGGER.info(f"全張替えチャンク{i//chunk_size + 1} の書き込み完了")
-                except Exception as chunk_error:
-                    LOGGER.error(f"全張替えチャンク{i//chunk_size + 1} の書き込み中にエラー: {chunk_error}")
-                    LOGGER.error(f"エラー詳細:\n{traceback.format_exc()}")
-                    raise
-                    
-                row_start += len(chunk)
-                if delay:
-                    LOGGER.info(f"{delay}秒待機します。")
-                    time.sleep(delay)
+            # 既存のヘッダ行を保持し、データ部分を上書きする
+            # （先にクリアすると取得が途中で失敗した場合にシートが空のまま残るため、書き込み後に残りの行のみクリア）
+            for batch in batches:
+                _ensure_row_capacity(worksheet, record_count + len(batch) + 1)
+                _write_batch(writer, worksheet, batch, 2 + record_count, column_count)  # データの開始行は2行目から
+                record_count += len(batch)
+            if worksheet.row_count >= record_count + 2:
+                clear_range = f'A{record_count + 2}:{last_column_letter}{worksheet.row_count}'
+                LOGGER.info(f"Clearing range: {clear_range}")
+                sheets_write(worksheet.batch_clear, [clear_range])
+        writer.close()
+        LOGGER.info(f"データ取得・書き込み完了: 総レコード数 {record_count}")
+
+        write_to_log_sheet(csv_file_name_column, sheet_name, main_table_name, category, record_count, json_keyfile_path, "成功", None, save_path_id)  # ログシートに成功を書き込む
 
         LOGGER.info(f"Data has been transferred to {sheet_name} sheet in {save_path_id} with {paste_format} method.")
     except Exception as e:
@@ -1098,10 +1312,16 @@ def export_to_spreadsheet(conn, sql_query, save_path_id, sheet_name, json_keyfil
         LOGGER.error(f"  - record_count: {record_count}")
         LOGGER.error(f"  - chunk_size: {chunk_size}")
         LOGGER.error(f"完全なスタックトレース:\n{traceback.format_exc()}")
-        write_to_log_sheet(csv_file_name_column, sheet_name, main_table_name, category, record_count, json_keyfile_path, "失敗", str(e), save_path_id)  # ログシートに失敗を書き込む
+        write_to_log_sheet(csv_file_name_column, sheet_name, main_table_name, category, record_count, json_keyfile_path, _log_result(e), str(e), save_path_id)  # ログシートに失敗を書き込む
         raise
     finally:
-        cursor.close()
+        if prefetched is not None:
+            prefetched.close()  # 取得スレッドを停止してからカーソルを閉じる
+        try:
+            cursor.close()
+        except Exception as close_error:
+            # 途中で中断した場合は未読の結果が残っていることがある
+            LOGGER.warning(f"カーソルのクローズ中にエラーが発生しました: {close_error}")
 
 # テスト実行
 @retry_on_exception
@@ -1121,16 +1341,16 @@ def setup_test_environment(test_execution, output_to_spreadsheet, save_path_id,
             spreadsheet_id = save_path_id
             
             try:
-                spreadsheet = gc.open_by_key(save_path_id)
+                spreadsheet = sheets_read(gc.open_by_key, save_path_id)
                 test_sheet_name = f"{csv_file_name}_test"
                 try:
-                    worksheet = spreadsheet.worksheet(test_sheet_name)
+                    worksheet = sheets_read(spreadsheet.worksheet, test_sheet_name)
                 except gspread.exceptions.WorksheetNotFound:
                     try:
-                        source_sheet = spreadsheet.worksheet(csv_file_name)
-                        worksheet = spreadsheet.add_worksheet(title=test_sheet_name, rows=source_sheet.row_count, cols=source_sheet.col_count)
-                        header_row = source_sheet.row_values(1)
-                        worksheet.insert_row(header_row, index=1)
+                        source_sheet = sheets_read(spreadsheet.worksheet, csv_file_name)
+                        worksheet = sheets_write(spreadsheet.add_worksheet, title=test_sheet_name, rows=source_sheet.row_count, cols=source_sheet.col_count)
+                        header_row = sheets_read(source_sheet.row_values, 1)
+                        sheets_write(worksheet.insert_row, header_row, index=1)
                         LOGGER.info(f"テスト用シート '{test_sheet_name}' を作成しました。")
                     except gspread.exceptions.WorksheetNotFound:
                         raise ValueError(f"The source sheet '{csv_file_name}' does not exist in the spreadsheet.")
@@ -1151,8 +1371,8 @@ def write_to_log_sheet(csv_file_name_column, sheet_name, main_table_name, catego
     client = gspread.authorize(credentials)
 
     try:
-        spreadsheet = client.open_by_key(log_spreadsheet_id)
-        worksheet = spreadsheet.worksheet(log_sheet_name)
+        spreadsheet = sheets_read(client.open_by_key, log_spreadsheet_id)
+        worksheet = sheets_read(spreadsheet.worksheet, log_sheet_name)
 
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         row_data = [
@@ -1167,7 +1387,7 @@ def write_to_log_sheet(csv_file_name_column, sheet_name, main_table_name, catego
                 LOGGER.warning(f"ログデータで想定外の型が検出: 項目{idx+1}: {item_type}")
         
         try:
-            worksheet.append_row(row_data)
+            sheets_write(worksheet.append_row, row_data)
         except Exception as log_error:
             LOGGER.error(f"ログシートへの書き込み中にエラーが発生: {log_error}")
             LOGGER.error(f"ログ書き込みエラーの詳細:\n{traceback.format_exc()}")
@@ -1179,7 +1399,7 @@ def write_to_log_sheet(csv_file_name_column, sheet_name, main_table_name, catego
 
 # DB項目のデータ型を強制指定
 def get_data_types(worksheet):
-    headers = worksheet.row_values(1)
+    headers = sheets_read(worksheet.row_values, 1)
     data_types = {}
 
     db_item_col = None
@@ -1192,10 +1412,10 @@ def get_data_types(worksheet):
             data_type_col = i
 
     if db_item_col is not None and data_type_col is not None:
-        last_row = len(worksheet.col_values(db_item_col + 1))
+        last_row = len(sheets_read(worksheet.col_values, db_item_col + 1))
 
-        db_item_range = worksheet.range(2, db_item_col + 1, last_row, db_item_col + 1)
-        data_type_range = worksheet.range(2, data_type_col + 1, last_row, data_type_col + 1)
+        db_item_range = sheets_read(worksheet.range, 2, db_item_col + 1, last_row, db_item_col + 1)
+        data_type_range = sheets_read(worksheet.range, 2, data_type_col + 1, last_row, data_type_col + 1)
 
         db_items = [cell.value for cell in db_item_range]
         data_types_list = [cell.value for cell in data_type_range]
@@ -1205,6 +1425,25 @@ def get_data_types(worksheet):
     #LOGGER.info(f"取得したデータ型: {data_types}")
     return data_types
 
+def get_filter_fields(worksheet):
+    """
+    選択シートから絞込に指定された項目と入力方式を取得する関数
+
+    Args:
+        worksheet: 選択シート
+
+    Returns:
+        絞込項目（DB項目）をキー、入力方式を値とする辞書。
+    """
+    records = sheets_read(worksheet.get_all_records)
+    filter_fields = {}
+    for record in records:
+        if str(record.get('絞込', '')).strip().upper() == 'TRUE':
+            db_item = str(record.get('DB項目', '')).strip()
+            if db_item:
+                filter_fields[db_item] = str(record.get('入力方式', '')).strip()
+    return filter_fields
+
 # Parquet用のデータ型を適用する関数（安全な変換）
 def apply_data_types_to_df_for_parquet(df, data_types, LOGGER):
     converted_columns = []
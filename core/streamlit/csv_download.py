@@ -1,5 +1,4 @@
 import streamlit as st
-import json
 import os
 from src.core.logging.logger import get_logger
 from src.streamlit_system.ui.session_manager import initialize_session_state
@@ -7,6 +6,7 @@ from src.streamlit_system.ui.session_manager import initialize_session_state
 # === 新構造モジュール ===
 from src.utils.data_processing import get_parquet_file_last_modified, load_parquet_file
 from src.streamlit_system.ui.display_utils import display_data
+from src.utils.dataset_metadata import load_dataset_metadata
 
 # === 旧構造モジュール（段階的移行中） ===
 from ..utils.utils import setup_ui as old_setup_ui, load_data, handle_filter_submission, load_and_initialize_data
@@ -15,7 +15,8 @@ from .subcode_streamlit_loader import (
     load_sheet_from_spreadsheet, 
     get_filtered_data_from_sheet, 
     load_and_filter_parquet, 
-    create_dynamic_input_fields
+    create_dynamic_input_fields,
+    get_control_sheet_version
 )
 
 # ロガーの設定
@@ -26,10 +27,6 @@ def csv_download(selected_display_name):
         sql_file_name = get_sql_file_name(selected_display_name)
         logger.info(f"Selected SQL file: {sql_file_name}")
         
-        # キャッシュ経由でスプレッドシート設定を取得
-        data = _cached_load_data(sql_file_name)
-        logger.debug(f"load_data result: {len(data) if data else 0}件のフィルタ設定を取得")
-        
         initialize_session_state()
         
         with open('styles.css', encoding='utf-8') as f:
@@ -51,6 +48,11 @@ def csv_download(selected_display_name):
         parquet_file_path = os.path.join(csv_base_path, f"{sql_file_name}.parquet")
         logger.info(f"Parquetファイルパス: {parquet_file_path}")
         logger.info(f"Parquetファイル存在確認: {os.path.exists(parquet_file_path)}")
+
+        # キャッシュ経由でスプレッドシート設定を取得（管理シートが編集されるまで再取得しない）
+        data = _cached_load_data(sql_file_name, get_control_sheet_version())
+        logger.debug(f"load_data result: {len(data) if data else 0}件のフィルタ設定を取得")
+
         last_modified = get_parquet_file_last_modified(parquet_file_path)
         
         # Noneの場合のデフォルト値を設定
@@ -75,16 +77,17 @@ def csv_download(selected_display_name):
         if 'filter_expanded' not in st.session_state:
             st.session_state['filter_expanded'] = False
         with st.expander("絞込検索", expanded=st.session_state.get('filter_expanded', True)):
-            submit_button = create_filter_form(data)
+            # バッチが出力した集計情報があれば、全行を読まずに選択肢の件数・日付の範囲を表示する
+            submit_button = create_filter_form(data, load_dataset_metadata(parquet_file_path))
         
         # 直近のフィルター入力がセッションに存在する場合は再実行時もフィルター継続
         has_filter_state = any(k.startswith('input_') for k in st.session_state.keys())
 
         if submit_button or has_filter_state:
             logger.info("フィルター送信ボタンが押されました")
-            filters_signature = json.dumps(st.session_state.get('input_fields', {}), ensure_ascii=False, sort_keys=True, default=str)
-            df = _cached_handle_filter_submission(parquet_file_path, filters_signature)
-            logger.info(f"handle_filter_submission結果: {df.shape if df is not None and not df.empty else 'None/Empty'}")
+            # 絞り込み結果は全セッション共有のキャッシュで保持し、条件を追加した場合は差分の条件だけを適用する
+            df = handle_filter_submission(parquet_file_path)
+            logger.info(f"handle_filter_submission結果: {f'{len(df)}件' if df is not None and not df.empty else 'None/Empty'}")
             # ページのリセットは明示的な送信時のみ行う（再描画では保持）
             if submit_button:
                 st.session_state['current_page'] = 1
@@ -97,12 +100,12 @@ def csv_download(selected_display_name):
             logger.info(f"load_and_initialize_data結果: {df.shape if df is not None and not df.empty else 'None/Empty'}")
         
         if df is not None and not df.empty:
-            # Parquet 全件読み込み → クライアント側ページングに戻す
+            # 全件は共有の DataFrame、絞り込み結果は行番号（FilteredRows）をページ単位で表示する
             page_size = st.session_state.get('limit', 20)
             st.session_state['total_records'] = len(df)
             st.session_state['__data_is_paged__'] = False
             logger.info(f"csv_download: Calling display_data with page_size={page_size}")
-            display_data(df, page_size, st.session_state['input_fields_types'])
+            display_data(df, page_size, st.session_state['input_fields_types'], parquet_file_path)
         else:
             logger.warning(f"DataFrame表示不可: df={df}")
             st.warning("DataFrame is None or empty. Cannot display the table.")
@@ -111,7 +114,7 @@ def csv_download(selected_display_name):
         logger.error(f"An error occurred: {str(e)}")
         st.error(f"エラーが発生しました: {str(e)}")
 
-def create_filter_form(data):
+def create_filter_form(data, metadata=None):
     with st.form(key='filter_form'):
         logger.debug(f"create_filter_form: データ件数 = {len(data) if data else 0}")
         logger.debug(f"create_filter_form: data sample = {data[:2] if data else []}")
@@ -121,7 +124,7 @@ def create_filter_form(data):
             for i, item in enumerate(data[:3]):
                 logger.debug(f"データ{i}: {item}")
         
-        input_fields, input_fields_types, options_dict = create_dynamic_input_fields(data)
+        input_fields, input_fields_types, options_dict = create_dynamic_input_fields(data, metadata)
         logger.debug(f"create_filter_form: input_fields = {len(input_fields) if input_fields else 0}件")
         logger.debug(f"create_filter_form: input_fields_types = {len(input_fields_types) if input_fields_types else 0}件")
         logger.debug(f"create_filter_form: input_fields keys = {list(input_fields.keys()) if input_fields else []}")
@@ -150,19 +153,13 @@ def create_filter_form(data):
 # ===== キャッシュラッパー =====
 
 @st.cache_data(ttl=300, show_spinner=False, max_entries=64)
-def _cached_load_data(sql_file_name: str):
-    """スプレッドシート設定のキャッシュ取得"""
-    # 旧関数は引数だけで決まるためキャッシュキーは関数引数に委譲
+def _cached_load_data(sql_file_name: str, control_sheet_version):
+    """スプレッドシート設定のキャッシュ取得（管理シートの版ごと）"""
+    # 絞込項目の設定はParquetファイルとは無関係に編集されるため、管理シートの modifiedTime が変わった時点で取り直す
+    # （更新日時を確認できない場合も ttl で取り直す）
     return load_data(sql_file_name)
 
 
-@st.cache_data(ttl=300, show_spinner=False, max_entries=16)
 def _cached_load_and_initialize_data(sql_file_name: str):
-    """初期データ読み込みのキャッシュ取得（Parquet）"""
+    """初期データ読み込み（Parquet）。全セッション共有のArrowテーブルキャッシュから取得する"""
     return load_and_initialize_data(sql_file_name)
-
-
-@st.cache_data(ttl=120, show_spinner=False, max_entries=64)
-def _cached_handle_filter_submission(parquet_file_path: str, filters_signature: str):
-    """フィルター適用後データのキャッシュ取得（Parquet）。フィルタ条件でキャッシュキーを分離"""
-    return handle_filter_submission(parquet_file_path)
\ No newline at end of file
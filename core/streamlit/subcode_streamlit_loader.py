@@ -31,7 +31,17 @@ except ImportError:
     from ..config.my_logging import setup_department_logger
     LOGGER = setup_department_logger('streamlit', app_type='streamlit')
 import traceback
+from functools import partial
 import numpy as np
+import pyarrow.parquet as pq
+from src.utils.parquet_filters import (
+    build_filter_expression, file_is_display_ordered, read_parquet_filtered, read_parquet_rows, to_display_order
+)
+from src.utils.parquet_index import lookup_row_ids
+from src.utils.filtered_rows import FilteredRows, ROW_POSITION_COLUMN, source_signature
+from src.utils.filter_cache import get_filter_result_cache
+from src.utils.dataset_metadata import column_date_range, column_value_counts, column_values
+from src.core.google_api.sheet_snapshot import get_snapshot_store
 
 # CSSファイルを読み込む関数
 def load_css(file_name):
@@ -69,8 +79,8 @@ def format_dates(df, data_types):
                 df[column] = pd.NaT  # その他のエラー発生時にもNaTに変換
     return df
 
-# Google Sheets APIへの認証処理を共通化
-def get_google_sheets_client():
+# Google API認証情報ファイルのパスを取得
+def get_json_keyfile_path():
     config_file = 'config/settings.ini'
     # 環境変数からJSON認証ファイルパスを取得
     from dotenv import load_dotenv
@@ -84,6 +94,11 @@ def get_google_sheets_client():
         config = configparser.ConfigParser()
         config.read(config_file, encoding='utf-8')
         json_keyfile_path = config.get('Credentials', {}).get('json_keyfile_path', '')
+    return json_keyfile_path
+
+# Google Sheets APIへの認証処理を共通化
+def get_google_sheets_client():
+    json_keyfile_path = get_json_keyfile_path()
     scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
     creds = ServiceAccountCredentials.from_json_keyfile_name(json_keyfile_path, scope)
     client = gspread.authorize(creds)
@@ -105,15 +120,10 @@ def load_sql_list_from_spreadsheet():
     spreadsheet_id = config['Spreadsheet']['spreadsheet_id']
     sheet_name = config['Spreadsheet']['eachdata_sheet']
     
-    client = get_google_sheets_client()
-
     try:
-        LOGGER.debug(f"スプレッドシート '{spreadsheet_id}' に接続中...")
-        spreadsheet = client.open_by_key(spreadsheet_id)
-        LOGGER.debug(f"シート '{sheet_name}' を開いています...")
-        sheet = spreadsheet.worksheet(sheet_name)
-        LOGGER.debug("データを取得中...")
-        data = sheet.get_all_values()
+        LOGGER.debug(f"スプレッドシート '{spreadsheet_id}' のシート '{sheet_name}' を取得中...")
+        # ローカルスナップショット経由で取得（シートが更新されている場合のみ再取得）
+        data = get_snapshot_store(get_json_keyfile_path()).get_values(spreadsheet_id, sheet_name)
         LOGGER.info(f"スプレッドシート '{spreadsheet_id}' のシート '{sheet_name}' からデータを正常に取得しました。")
     except gspread.exceptions.WorksheetNotFound as e:
         LOGGER.error(f"シート '{sheet_name}' がスプレッドシート '{spreadsheet_id}' に存在しません: {e}")
@@ -177,14 +187,20 @@ def get_sql_file_name(selected_option):
         LOGGER.warning(f"選択されたオプション '{selected_option}' に対応するSQLファイルが見つかりません。")
         return None
 
+# 管理シートの版（Drive の modifiedTime）を取得。シートが編集されると変わるため表示側のキャッシュのキーに使う
+def get_control_sheet_version():
+    config = configparser.ConfigParser()
+    config.read('config/settings.ini', encoding='utf-8')
+    spreadsheet_id = config['Spreadsheet']['spreadsheet_id']
+    return get_snapshot_store(get_json_keyfile_path()).modified_time(spreadsheet_id)
+
 # スプレッドシートからデータを読み込む処理を共通化（キャッシュ付き）
-@st.cache_data(ttl=600, show_spinner=False)  # 10分間キャッシュ
-def load_sheet_data_cached(sheet_name, spreadsheet_id):
+@st.cache_data(ttl=600, show_spinner=False)  # 10分間キャッシュ（シートが編集された場合は modified_time が変わり取り直す）
+def load_sheet_data_cached(sheet_name, spreadsheet_id, modified_time=None):
     """スプレッドシートデータをキャッシュ付きで取得"""
-    client = get_google_sheets_client()
     try:
-        sheet = client.open_by_key(spreadsheet_id).worksheet(sheet_name)
-        data = sheet.get_all_values()
+        # ローカルスナップショット経由で取得（シートが更新されている場合のみ再取得）
+        data = get_snapshot_store(get_json_keyfile_path()).get_values(spreadsheet_id, sheet_name)
         LOGGER.info(f"スプレッドシート '{spreadsheet_id}' のシート '{sheet_name}' を正常にロードしました。")
         return data
     except gspread.exceptions.WorksheetNotFound:
@@ -211,7 +227,8 @@ def load_sheet_from_spreadsheet(sheet_name):
     spreadsheet_id = config['Spreadsheet']['spreadsheet_id']
     
     # キャッシュ付きデータ取得
-    data = load_sheet_data_cached(sheet_name, spreadsheet_id)
+    modified_time = get_snapshot_store(get_json_keyfile_path()).modified_time(spreadsheet_id)
+    data = load_sheet_data_cached(sheet_name, spreadsheet_id, modified_time)
     if data is None:
         return None
     
@@ -275,8 +292,44 @@ def get_filtered_data_from_sheet(sheet):
         st.error(f"選択シートから条件を取得中にエラーが発生しました: {e}")
         return []
 
+def _item_options(item, metadata):
+    # 選択シートに選択項目がない場合は、集計情報の値（全件分ある場合のみ）を選択肢にする
+    if item['options'] or not metadata:
+        return item['options']
+    values = column_values(metadata, item['db_item'])
+    if values:
+        LOGGER.debug(f"集計情報の値を選択肢にします: {item['db_item']} ({len(values)}件)")
+    return [[value, value] for value in values or []]
+
+
+def _count_label(label, counts):
+    return f"{label} ({counts[label]:,}件)" if label in counts else label
+
+
+def _date_input_bounds(field, metadata):
+    # 既定の選択範囲（前後10年）より古い・新しいデータも選べるよう、データの範囲まで広げる
+    date_range = column_date_range(metadata, field)
+    if date_range is None:
+        return {}
+    today = datetime.now().date()
+    return {
+        'min_value': min(date_range[0], today.replace(year=today.year - 10, month=1, day=1)),
+        'max_value': max(date_range[1], today.replace(year=today.year + 10, month=12, day=31)),
+    }
+
+
 # 動的な入力フィールドを作成する関数内のチェックボックス部分
-def create_dynamic_input_fields(data):
+def create_dynamic_input_fields(data, metadata=None):
+    """
+    選択シートの絞込項目から入力フィールドを作成
+
+    Args:
+        data: 選択シートの絞込項目
+        metadata: Parquetファイルの集計情報（load_dataset_metadata の結果。Noneの場合は選択シートのみを使用）
+
+    Returns:
+        tuple: (入力フィールド, フィールドタイプ, オプション辞書)
+    """
     input_fields = {}
     input_fields_types = {}
     options_dict = {}
@@ -296,6 +349,8 @@ def create_dynamic_input_fields(data):
         column_index = i // items_per_column
         with columns[column_index]:
             label_text = item['db_item']
+            item_options = _item_options(item, metadata)
+            counts = column_value_counts(metadata, item['db_item'])
 
             if item['input_type'] == 'FA':
                 input_fields[item['db_item']] = st.text_input(label_text, key=f"input_{item['db_item']}")
@@ -303,14 +358,14 @@ def create_dynamic_input_fields(data):
                 LOGGER.debug(f"FA入力フィールドを作成しました: {item['db_item']}")
 
             elif item['input_type'] == 'プルダウン':
-                options = ['-'] + list(set([option[1] for option in item['options'] if len(option) > 1]))
-                input_fields[item['db_item']] = st.selectbox(label_text, options, key=f"input_{item['db_item']}")
+                options = ['-'] + list(set([option[1] for option in item_options if len(option) > 1]))
+                input_fields[item['db_item']] = st.selectbox(label_text, options, format_func=lambda label, counts=counts: _count_label(label, counts), key=f"input_{item['db_item']}")
                 input_fields_types[item['db_item']] = 'プルダウン'
-                options_dict[item['db_item']] = item['options']
+                options_dict[item['db_item']] = item_options
                 LOGGER.debug(f"プルダウン入力フィールドを作成しました: {item['db_item']} with options {options}")
 
             elif item['input_type'] == 'ラジオボタン':
-                options = [option[1] for option in item['options'] if len(option) > 1]
+                options = [option[1] for option in item_options if len(option) > 1]
                 radio_key = f"radio_{item['db_item']}"
                 clear_key = f"clear_radio_{item['db_item']}"
 
@@ -321,10 +376,10 @@ def create_dynamic_input_fields(data):
 
                 st.text(label_text)  # フリーワードのタイトルと同じサイズと文字タイプに統一
                 if options:
-                    radio_index = st.radio("", range(len(options)), format_func=lambda i: options[i], index=st.session_state.get(radio_key, 0), key=radio_key)
+                    radio_index = st.radio("", range(len(options)), format_func=lambda i, options=options, counts=counts: _count_label(options[i], counts), index=st.session_state.get(radio_key, 0), key=radio_key)
                     input_fields[item['db_item']] = options[radio_index] if radio_index is not None else None
                     input_fields_types[item['db_item']] = 'ラジオボタン'
-                    options_dict[item['db_item']] = item['options']
+                    options_dict[item['db_item']] = item_options
                     LOGGER.debug(f"ラジオボタン入力フィールドを作成しました: {item['db_item']} with options {options}")
                 else:
                     LOGGER.warning(f"ラジオボタン入力フィールド '{item['db_item']}' にオプションがありません。")
@@ -332,24 +387,29 @@ def create_dynamic_input_fields(data):
             elif item['input_type'] == 'チェックボックス':
                 st.text(label_text)  # フリーワードのタイトルと同じサイズと文字タイプに統一
                 checkbox_values = {}
-                for option in item['options']:
+                for option in item_options:
                     if len(option) > 1:
-                        checkbox_values[option[1]] = st.checkbox(option[1], key=f"checkbox_{item['db_item']}_{option[0]}")
+                        checkbox_values[option[1]] = st.checkbox(
+                            option[1], key=f"checkbox_{item['db_item']}_{option[0]}",
+                            help=f"{counts[option[1]]:,}件" if option[1] in counts else None
+                        )
                 input_fields[item['db_item']] = checkbox_values
                 input_fields_types[item['db_item']] = 'チェックボックス'
-                options_dict[item['db_item']] = item['options']  # オプションを保存
+                options_dict[item['db_item']] = item_options  # オプションを保存
                 LOGGER.debug(f"チェックボックス入力フィールドを作成しました: {item['db_item']} with options {options_dict[item['db_item']]}")
 
             elif item['input_type'] == 'Date':
-                start_date = st.date_input(f"{label_text} 開始日", key=f"start_date_{item['db_item']}", value=None)
-                end_date = st.date_input(f"{label_text} 終了日", key=f"end_date_{item['db_item']}", value=None)
+                date_bounds = _date_input_bounds(item['db_item'], metadata)
+                start_date = st.date_input(f"{label_text} 開始日", key=f"start_date_{item['db_item']}", value=None, **date_bounds)
+                end_date = st.date_input(f"{label_text} 終了日", key=f"end_date_{item['db_item']}", value=None, **date_bounds)
                 input_fields[item['db_item']] = {'start_date': start_date, 'end_date': end_date}
                 input_fields_types[item['db_item']] = 'date'
                 LOGGER.debug(f"Date入力フィールドを作成しました: {item['db_item']} with start_date={start_date}, end_date={end_date}")
 
             elif item['input_type'] == 'Datetime':
-                start_date = st.date_input(f"{label_text} 開始日", key=f"start_datetime_{item['db_item']}", value=None)
-                end_date = st.date_input(f"{label_text} 終了日", key=f"end_datetime_{item['db_item']}", value=None)
+                date_bounds = _date_input_bounds(item['db_item'], metadata)
+                start_date = st.date_input(f"{label_text} 開始日", key=f"start_datetime_{item['db_item']}", value=None, **date_bounds)
+                end_date = st.date_input(f"{label_text} 終了日", key=f"end_datetime_{item['db_item']}", value=None, **date_bounds)
                 input_fields[item['db_item']] = {'start_date': start_date, 'end_date': end_date}
                 input_fields_types[item['db_item']] = 'datetime'
                 LOGGER.debug(f"Datetime入力フィールドを作成しました: {item['db_item']} with start_date={start_date}, end_date={end_date}")
@@ -399,81 +459,149 @@ def truncate_text(text, max_length=35):
         return str(text)[:max_length] + "..."
     return text
 
-def load_and_filter_parquet(parquet_file_path, input_fields, input_fields_types, options_dict):
+def _read_filter_candidates(parquet_file_path, input_fields, input_fields_types, read_columns, position_column=None):
+    row_ids = lookup_row_ids(parquet_file_path, input_fields, input_fields_types)
+    if row_ids is not None:
+        # 検索用インデックスで求めた、条件に一致しうる行だけを読み込む
+        return read_parquet_rows(parquet_file_path, row_ids, read_columns, position_column)
+    # 変換できる条件と表示する列は読み込み時に適用し、該当しない行グループを読み飛ばす
+    schema = pq.read_schema(parquet_file_path)
+    filter_expression, filter_columns = build_filter_expression(schema, input_fields, input_fields_types)
+    return read_parquet_filtered(parquet_file_path, filter_expression, read_columns, filter_columns, position_column)
+
+def _fill_missing_values(df):
+    # None または nan 値を各列のデータ型に応じた値に置換
+    for column in df.columns:
+        if df[column].dtype == 'object':
+            df[column] = df[column].fillna('')
+        elif df[column].dtype == 'Int64':
+            df[column] = df[column].fillna(0)  # Int64型の列はNaNを0に置換
+        elif df[column].dtype == 'float64':
+            df[column] = df[column].fillna(np.nan)  # float64型の列はNaNをnp.nanに置換
+        else:
+            df[column] = df[column].fillna(pd.NA)  # その他の型はpd.NAに置換
+    LOGGER.info("NaN値を適切に置換しました。")
+    return df
+
+def _apply_filter_conditions(df, input_fields, input_fields_types):
+    # フィルタ条件の適用
+    for field, value in input_fields.items():
+        LOGGER.info(f"フィルタ条件 - {field}: {value}")  # フィルター条件をログに記録
+
+        if input_fields_types[field] == 'FA' and value:
+            if df[field].dtype == 'Int64':
+                try:
+                    df = df[df[field] == int(value)]
+                    LOGGER.debug(f"フィルタリング - {field} == {int(value)}")
+                except ValueError:
+                    LOGGER.warning(f"無効な整数値 '{value}' が入力されました。フィルタリングをスキップします。")
+            else:
+                df = df[df[field].astype(str).str.contains(value, na=False)]
+                LOGGER.debug(f"フィルタリング - {field} に '{value}' を含む")
+
+        elif input_fields_types[field] == 'プルダウン' and value != '-':
+            df = df[df[field] == value]
+            LOGGER.debug(f"フィルタリング - {field} == '{value}'")
+
+        elif input_fields_types[field] == 'ラジオボタン' and value:
+            df = df[df[field] == value]
+            LOGGER.debug(f"フィルタリング - {field} == '{value}'")
+
+        elif input_fields_types[field] == 'チェックボックス':
+            # 元の挙動に戻す：選択ラベルでそのまま比較
+            selected_labels = [label for label, selected in value.items() if selected]
+            if selected_labels:
+                df[field] = df[field].astype(str)
+                df = df[df[field].isin(selected_labels)]
+                LOGGER.debug(f"フィルタリング - {field} に選択されたラベル {selected_labels} が含まれる")
+
+        elif input_fields_types[field] in ['date', 'datetime']:
+            start_date = value.get('start_date')
+            end_date = value.get('end_date')
+            
+            df[field] = pd.to_datetime(df[field], errors='coerce')
+            LOGGER.debug(f"フィルタリング - {field} をdatetime型に変換しました。")
+            
+            if start_date and end_date:
+                start_datetime = pd.to_datetime(start_date).floor('D')
+                end_datetime = pd.to_datetime(end_date).replace(hour=23, minute=59, second=59, microsecond=999999)
+                df = df[(df[field] >= start_datetime) & (df[field] <= end_datetime)]
+                LOGGER.debug(f"フィルタリング - {field} を {start_datetime} から {end_datetime} までに制限しました。")
+            elif start_date:
+                start_datetime = pd.to_datetime(start_date).floor('D')
+                df = df[df[field] >= start_datetime]
+                LOGGER.debug(f"フィルタリング - {field} を {start_datetime} 以降に制限しました。")
+            elif end_date:
+                end_datetime = pd.to_datetime(end_date).replace(hour=23, minute=59, second=59, microsecond=999999)
+                df = df[df[field] <= end_datetime]
+                LOGGER.debug(f"フィルタリング - {field} を {end_datetime} 以前に制限しました。")
+    return df
+
+# 絞り込み結果のページを load_and_filter_parquet の結果と同じ表示形式に変換する
+def _prepare_display_frame(df, input_fields, input_fields_types):
+    df = _fill_missing_values(df)
+    for field, value in input_fields.items():
+        if field not in df.columns:
+            continue
+        if input_fields_types.get(field) == 'チェックボックス' and isinstance(value, dict) and any(value.values()):
+            df[field] = df[field].astype(str)
+        elif input_fields_types.get(field) in ['date', 'datetime']:
+            df[field] = pd.to_datetime(df[field], errors='coerce')
+    return df
+
+def load_and_filter_parquet(parquet_file_path, input_fields, input_fields_types, options_dict, columns=None):
     try:
-        df = pd.read_parquet(parquet_file_path)
+        read_columns = None if columns is None else list(columns) + list(input_fields)
+        df = _read_filter_candidates(parquet_file_path, input_fields, input_fields_types, read_columns)
         LOGGER.info(f"Parquetファイル '{parquet_file_path}' を正常に読み込みました。")
-        
-        # None または nan 値を各列のデータ型に応じた値に置換
-        for column in df.columns:
-            if df[column].dtype == 'object':
-                df[column] = df[column].fillna('')
-            elif df[column].dtype == 'Int64':
-                df[column] = df[column].fillna(0)  # Int64型の列はNaNを0に置換
-            elif df[column].dtype == 'float64':
-                df[column] = df[column].fillna(np.nan)  # float64型の列はNaNをnp.nanに置換
-            else:
-                df[column] = df[column].fillna(pd.NA)  # その他の型はpd.NAに置換
-        LOGGER.info("NaN値を適切に置換しました。")
-
-        # フィルタ条件の適用
-        for field, value in input_fields.items():
-            LOGGER.info(f"フィルタ条件 - {field}: {value}")  # フィルター条件をログに記録
-
-            if input_fields_types[field] == 'FA' and value:
-                if df[field].dtype == 'Int64':
-                    try:
-                        df = df[df[field] == int(value)]
-                        LOGGER.debug(f"フィルタリング - {field} == {int(value)}")
-                    except ValueError:
-                        LOGGER.warning(f"無効な整数値 '{value}' が入力されました。フィルタリングをスキップします。")
-                else:
-                    df = df[df[field].astype(str).str.contains(value, na=False)]
-                    LOGGER.debug(f"フィルタリング - {field} に '{value}' を含む")
-
-            elif input_fields_types[field] == 'プルダウン' and value != '-':
-                df = df[df[field] == value]
-                LOGGER.debug(f"フィルタリング - {field} == '{value}'")
-
-            elif input_fields_types[field] == 'ラジオボタン' and value:
-                df = df[df[field] == value]
-                LOGGER.debug(f"フィルタリング - {field} == '{value}'")
-
-            elif input_fields_types[field] == 'チェックボックス':
-                # 元の挙動に戻す：選択ラベルでそのまま比較
-                selected_labels = [label for label, selected in value.items() if selected]
-                if selected_labels:
-                    df[field] = df[field].astype(str)
-                    df = df[df[field].isin(selected_labels)]
-                    LOGGER.debug(f"フィルタリング - {field} に選択されたラベル {selected_labels} が含まれる")
-
-            elif input_fields_types[field] in ['date', 'datetime']:
-                start_date = value.get('start_date')
-                end_date = value.get('end_date')
-                
-                df[field] = pd.to_datetime(df[field], errors='coerce')
-                LOGGER.debug(f"フィルタリング - {field} をdatetime型に変換しました。")
-                
-                if start_date and end_date:
-                    start_datetime = pd.to_datetime(start_date).floor('D')
-                    end_datetime = pd.to_datetime(end_date).replace(hour=23, minute=59, second=59, microsecond=999999)
-                    df = df[(df[field] >= start_datetime) & (df[field] <= end_datetime)]
-                    LOGGER.debug(f"フィルタリング - {field} を {start_datetime} から {end_datetime} までに制限しました。")
-                elif start_date:
-                    start_datetime = pd.to_datetime(start_date).floor('D')
-                    df = df[df[field] >= start_datetime]
-                    LOGGER.debug(f"フィルタリング - {field} を {start_datetime} 以降に制限しました。")
-                elif end_date:
-                    end_datetime = pd.to_datetime(end_date).replace(hour=23, minute=59, second=59, microsecond=999999)
-                    df = df[df[field] <= end_datetime]
-                    LOGGER.debug(f"フィルタリング - {field} を {end_datetime} 以前に制限しました。")
-                
+        df = _fill_missing_values(df)
+        df = _apply_filter_conditions(df, input_fields, input_fields_types)
+
         if df.empty:
             LOGGER.warning("フィルタリング後のDataFrameが空です。")
             return pd.DataFrame()
         else:
             LOGGER.info("フィルタリング後のDataFrameが取得されました。")
-            return df.sort_index(ascending=False)  # フィルタリング後に降順に並べ替え
+            if columns is not None:
+                df = df[[column for column in columns if column in df.columns]]
+            # フィルタリング後に降順に並べ替え（表示順で書き出したファイルは読み込んだ順序のまま）
+            return to_display_order(df, file_is_display_ordered(parquet_file_path))
+    except Exception as e:
+        LOGGER.error(f"データフィルタリング中にエラーが発生しました: {e}")
+        LOGGER.debug(traceback.format_exc())
+        return None
+
+# 絞り込み結果を行番号で返す（絞り込みには条件の列だけを読み込み、表示する行は FilteredRows がページ単位で読み込む）
+# 同じ条件、または条件を追加しただけの結果を保持していれば、保持済みの行番号に差分の条件だけを適用する
+def filter_parquet_rows(parquet_file_path, input_fields, input_fields_types, columns=None):
+    try:
+        source = source_signature(parquet_file_path)
+        cache = get_filter_result_cache()
+        cached = cache.lookup(parquet_file_path, input_fields, input_fields_types, source)
+        if cached is not None and not cached[1]:
+            row_ids = cached[0]
+            LOGGER.info(f"保持済みの絞り込み結果を使用します: {len(row_ids)}件")
+        else:
+            if cached is not None:
+                base_row_ids, remaining = cached
+                df = read_parquet_rows(parquet_file_path, base_row_ids, list(remaining), ROW_POSITION_COLUMN)
+                df = _fill_missing_values(df)
+                # 保持済みの結果は表示順に並んでおり、絞り込んでも順序は変わらない
+                df = _apply_filter_conditions(df, remaining, input_fields_types)
+                row_ids = df[ROW_POSITION_COLUMN].to_numpy()
+            else:
+                df = _read_filter_candidates(
+                    parquet_file_path, input_fields, input_fields_types, list(input_fields), ROW_POSITION_COLUMN
+                )
+                df = _fill_missing_values(df)
+                df = _apply_filter_conditions(df, input_fields, input_fields_types)
+                # フィルタリング後に降順に並べ替えた順序（load_and_filter_parquet と同じ表示順）で保持する
+                row_ids = to_display_order(df, file_is_display_ordered(parquet_file_path))[ROW_POSITION_COLUMN].to_numpy()
+            cache.store(parquet_file_path, input_fields, input_fields_types, row_ids, source)
+            LOGGER.info(f"フィルタリング後の件数: {len(row_ids)}件")
+        prepare = partial(_prepare_display_frame, input_fields=dict(input_fields), input_fields_types=dict(input_fields_types))
+        refilter = partial(filter_parquet_rows, parquet_file_path, dict(input_fields), dict(input_fields_types), columns)
+        return FilteredRows(parquet_file_path, row_ids, columns, prepare, source, refilter)
     except Exception as e:
         LOGGER.error(f"データフィルタリング中にエラーが発生しました: {e}")
         LOGGER.debug(traceback.format_exc())
@@ -505,7 +633,7 @@ def on_sql_file_change(sql_files_dict):
 
         if os.path.exists(parquet_file_path):
             df = pd.read_parquet(parquet_file_path)
-            df = df.sort_index(ascending=False)  # インデックスの降順で並べ替え
+            df = to_display_order(df, file_is_display_ordered(parquet_file_path))  # インデックスの降順で並べ替え
             st.session_state['df'] = df
             st.session_state['total_records'] = len(df)
             LOGGER.info(f"Parquetファイル '{parquet_file_path}' をロードしました。")
@@ -533,6 +661,11 @@ def load_and_prepare_data(df, page_number, page_size):
     if df is None:
         LOGGER.info("DataFrameが存在しません。")
         return pd.DataFrame()  # 空のDataFrameを返す
+    if isinstance(df, FilteredRows):
+        # 絞り込み結果は表示するページの行だけを読み込む
+        limited_df = df.page(page_number, page_size)
+        LOGGER.info(f"ページ {page_number} のデータをロードしました。")
+        return limited_df
     offset = calculate_offset(page_number, page_size)
     limited_df = df.iloc[offset:offset + page_size]  # インデックスの降順は既にソート済みと仮定
     LOGGER.info(f"ページ {page_number} のデータをロードしました。")
@@ -7,6 +7,7 @@ except ImportError:
     # フォールバック：旧構造
     from ..config.database_connection import create_database_connection
 from ..config.my_logging import setup_department_logger
+from src.core.database.fetch_backend import read_sql_frame
 from ..data.subcode_loader import load_sql_from_file
 from ..config.config_loader import load_config
 
@@ -45,7 +46,7 @@ def execute_sql_query(sql_file_name, config_file):
             if sql_query is None:
                 raise FileNotFoundError(f"SQLファイルが見つかりません: {sql_file_name}")
             
-            df = pd.read_sql(sql_query, conn)
+            df = read_sql_frame(conn, sql_query, additional_config.get('fetch_backend'))
             return df
         except Exception as e:
             logger.error(f"SQL実行中にエラーが発生しました: {e}")
@@ -9,8 +9,10 @@ import numpy as np
 from functools import partial
 from datetime import datetime
 import pyarrow.parquet as pq
+from src.utils.arrow_cache import get_arrow_table_cache
+from src.utils.parquet_filters import read_parquet_page
 from ..streamlit.subcode_streamlit_loader import (
-    on_limit_change, load_and_filter_parquet,
+    on_limit_change, load_and_filter_parquet, filter_parquet_rows,
     load_sheet_from_spreadsheet,
     get_filtered_data_from_sheet
 )
@@ -120,14 +122,14 @@ def setup_ui(last_modified):
 def handle_filter_submission(parquet_file_path):
     input_values = st.session_state['input_fields']
     input_fields_types = st.session_state['input_fields_types']
-    options_dict = st.session_state['options_dict']
     
-    df = load_and_filter_parquet(parquet_file_path, input_values, input_fields_types, options_dict)
-    if df is not None and not df.empty:
-        st.session_state['df'] = df
-        st.session_state['total_records'] = len(df)
-        st.session_state['current_page'] = 1  # ページのみリセット（表示件数は保持）
-        return df
+    # 絞り込み結果は行番号だけを保持し、表示するページの行はページ送りのたびに読み込む
+    rows = filter_parquet_rows(parquet_file_path, input_values, input_fields_types)
+    if rows is not None and not rows.empty:
+        st.session_state['df'] = rows
+        st.session_state['total_records'] = len(rows)
+        # ページのリセットは呼び出し側で送信時のみ行う（同じ条件での再描画ではページを保持する）
+        return rows
     else:
         st.error("絞込条件に合致するデータがありません。")
         return None
@@ -274,17 +276,20 @@ def create_pagination_ui(df, page_size):
     
     return cols_pagination_top, total_pages
 
-# キャッシュを使用してParquetファイルを読み込む
-@st.cache_data(ttl=1800, show_spinner=False)  # 30分 = 1800秒
+def _to_display_frame(table):
+    return optimize_dtypes(table.to_pandas())
+
+# 全セッション共有のキャッシュを使用してParquetファイルを読み込む
 def load_parquet_file(file_path, num_rows=None):
     try:
-        table = pq.read_table(file_path)
-        total_rows = table.num_rows
+        total_rows = pq.read_metadata(file_path).num_rows
         if num_rows is not None and num_rows < total_rows:
-            df = table.slice(0, num_rows).to_pandas()
+            # 表示する行を含む行グループだけを読み、その行だけを変換する（ファイルサイズに依存しない）
+            df, total_rows = read_parquet_page(file_path, 0, num_rows)
+            df = optimize_dtypes(df)
         else:
-            df = table.to_pandas()
-        df = optimize_dtypes(df)
+            # 全件の場合は変換結果も共有し、セッションごとのコピーを持たない
+            df = get_arrow_table_cache().get_frame(file_path, _to_display_frame)
         LOGGER.info(f"load_parquet_file: Loaded DataFrame shape: {df.shape}, Total rows in file: {total_rows}")
         return df, total_rows
     except Exception as e:
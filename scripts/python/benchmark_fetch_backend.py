@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQL取得バックエンドのベンチマーク
+
+同じSQLを pandas / arrow の各バックエンドで取得し、処理速度（行/秒）と
+ピークメモリ（Pythonヒープ + Arrowメモリプール）を比較する。
+
+使い方:
+    python scripts/python/benchmark_fetch_backend.py <SQLファイル名> [--repeat 3]
+    python scripts/python/benchmark_fetch_backend.py --query "SELECT * FROM companies" --backend arrow
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import pyarrow as pa
+
+# プロジェクトルートをPythonパスに追加
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from core.config.config_loader import load_config
+from core.data.subcode_loader import load_sql_from_file
+from core.utils.db_utils import get_connection
+from src.core.database.fetch_backend import FETCH_BACKENDS, read_sql_frame
+
+
+def run_benchmark(conn, sql_query, backend):
+    """
+    指定バックエンドで1回取得し、計測結果を返す
+
+    Args:
+        conn: データベース接続
+        sql_query (str): SQLクエリ
+        backend (str): 取得バックエンド名
+
+    Returns:
+        dict: 行数・経過秒数・行/秒・ピークメモリ（MB）
+    """
+    pool = pa.default_memory_pool()
+    arrow_baseline = pool.bytes_allocated()
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = read_sql_frame(conn, sql_query, backend)
+    elapsed = time.perf_counter() - start
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    arrow_peak = max(0, pool.max_memory() - arrow_baseline) if pool.max_memory() else 0
+    rows = len(df)
+    return {
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_sec': rows / elapsed if elapsed > 0 else 0,
+        'python_peak_mb': python_peak / 1024 / 1024,
+        'arrow_peak_mb': arrow_peak / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQL取得バックエンドのベンチマーク')
+    parser.add_argument('sql_file', nargs='?', help='Google Drive上のSQLファイル名')
+    parser.add_argument('--query', help='SQLファイルの代わりに直接実行するSQL')
+    parser.add_argument('--backend', choices=sorted(FETCH_BACKENDS), action='append',
+                        help='計測するバックエンド（複数指定可、省略時は全て）')
+    parser.add_argument('--repeat', type=int, default=1, help='各バックエンドの計測回数')
+    parser.add_argument('--config', default='config/settings.ini', help='設定ファイルのパス')
+    args = parser.parse_args()
+
+    if not args.sql_file and not args.query:
+        parser.error('SQLファイル名または --query を指定してください')
+
+    ssh_config, db_config, local_port, additional_config = load_config(args.config)
+    if args.query:
+        sql_query = args.query
+    else:
+        sql_query = load_sql_from_file(args.sql_file, additional_config['google_folder_id'], additional_config['json_keyfile_path'])
+        if not sql_query:
+            print(f"[ERROR] SQLファイルを読み込めません: {args.sql_file}")
+            return 1
+
+    conn = get_connection(args.config)
+    if not conn:
+        print("[ERROR] データベース接続に失敗しました")
+        return 1
+
+    backends = args.backend or sorted(FETCH_BACKENDS)
+    try:
+        print(f"{'backend':<8} {'run':>3} {'rows':>10} {'sec':>8} {'rows/sec':>12} {'py peak MB':>11} {'arrow peak MB':>14}")
+        for backend in backends:
+            for run in range(1, args.repeat + 1):
+                result = run_benchmark(conn, sql_query, backend)
+                print(
+                    f"{backend:<8} {run:>3} {result['rows']:>10,} {result['seconds']:>8.2f} "
+                    f"{result['rows_per_sec']:>12,.0f} {result['python_peak_mb']:>11.1f} {result['arrow_peak_mb']:>14.1f}"
+                )
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
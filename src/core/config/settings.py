@@ -6,8 +6,8 @@
 - settings.ini: 一般設定（非秘匿）
 - secrets.env: 秘匿情報（パスワード、APIキー等）
 """
-from dataclasses import dataclass
-from typing import Dict, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 import configparser
 import os
 from dotenv import load_dotenv
@@ -22,6 +22,7 @@ class SSHConfig:
     db_host: str = "127.0.0.1"
     db_port: int = 3306
     local_port: int = 3306
+    tunnel_count: int = 1  # Streamlitの共有プールで開くSSHトンネルの本数
 
 
 @dataclass
@@ -59,6 +60,54 @@ class TuningConfig:
     batch_size: int = 1000
     delay: float = 0.1
     max_workers: int = 5
+    spreadsheet_diff_update: bool = True  # 全張替え時に差分のみ書き込む
+    spreadsheet_max_payload_bytes: int = 2000000  # スプシ書き込み1リクエストあたりの最大バイト数
+    spreadsheet_max_cells: int = 200000  # スプシ書き込み1リクエストあたりの最大セル数
+    spreadsheet_append_mode: bool = True  # 最終行積立てを values.append + 追記台帳で行う
+    fetch_backend: str = 'pandas'  # SQL取得バックエンド（pandas / arrow。arrow は実DBでの比較後に選択する）
+    ngram_index_columns: List[str] = field(default_factory=list)  # 部分一致検索用のn-gramインデックスを作成する列
+
+
+@dataclass
+class GoogleAPIQuotaConfig:
+    """Google APIクォータ設定（1分あたりのリクエスト数）"""
+    sheets_read_per_minute: float = 60
+    sheets_write_per_minute: float = 60
+    drive_per_minute: float = 600
+    max_retries: int = 6
+
+
+@dataclass
+class DatabasePoolConfig:
+    """共有コネクションプール設定（Streamlitアプリ用）"""
+    pool_size: int = 5
+    warmup_size: int = 2  # 起動時に開き、以降も ping で維持する接続数
+    idle_timeout: float = 300  # 未使用のまま経過したら接続を閉じる秒数（warmup_size 分を除く）
+    checkout_timeout: float = 60  # プールが埋まっている場合に空きを待つ秒数
+    health_check_interval: float = 30  # 未使用接続をバックグラウンドで検証する間隔（秒）
+    breaker_failure_threshold: int = 3  # サーキットブレーカーを作動させる連続接続失敗回数
+    breaker_cool_down: float = 30  # サーキットブレーカー作動後に接続を試行しない秒数
+
+
+@dataclass
+class ViewerCacheConfig:
+    """Streamlitのセッション間で共有するArrowテーブルキャッシュ設定"""
+    max_bytes: int = 2 * 1024 ** 3  # 保持するテーブルの合計サイズの上限（バイト）
+    filter_results_per_table: int = 16  # テーブルごとに保持する絞り込み結果の件数
+    csv_download_dir: str = ''  # CSVダウンロードの書き出し先（空の場合は一時ディレクトリ）
+    csv_download_max_age: int = 3600  # 書き出したCSVを保持する秒数
+    watch_datasets: bool = True  # Parquetファイルの更新を監視する（無効の場合は参照ごとに更新日時・サイズを確認）
+
+
+@dataclass
+class BatchSessionConfig:
+    """バッチ実行時のDBセッション設定"""
+    consistent_snapshot: bool = False  # 実行全体を読み取り専用の一貫スナップショットで取得する
+    snapshot_global_lock: bool = False  # 複数接続の開始時点をグローバル読み取りロックで揃える（RELOAD権限が必要）
+    net_read_timeout: int = 0  # 秒（0は変更しない）
+    net_write_timeout: int = 0  # 秒（0は変更しない）
+    max_execution_time: int = 0  # ミリ秒（0は変更しない）
+    entry_timeout: int = 0  # エントリーごとの実行時間の上限（秒、0は無制限）
 
 
 @dataclass
@@ -104,6 +153,10 @@ class AppConfig:
     slack: SlackConfig
     batch: BatchConfig
     csv: CSVConfig
+    google_quota: GoogleAPIQuotaConfig = field(default_factory=GoogleAPIQuotaConfig)
+    db_pool: DatabasePoolConfig = field(default_factory=DatabasePoolConfig)
+    viewer_cache: ViewerCacheConfig = field(default_factory=ViewerCacheConfig)
+    batch_session: BatchSessionConfig = field(default_factory=BatchSessionConfig)
     
     @classmethod
     def from_config_file(cls, config_file: str = "config/settings.ini") -> 'AppConfig':
@@ -167,7 +220,8 @@ class AppConfig:
             host=config['SSH']['host'],
             user=config['SSH']['user'],
             ssh_key_path=ssh_key_path,
-            local_port=3306
+            local_port=3306,
+            tunnel_count=config.getint('SSH', 'tunnel_count', fallback=1)
         )
         
         # データベース設定
@@ -215,7 +269,55 @@ class AppConfig:
             chunk_size=int(config['Tuning']['chunk_size']),
             batch_size=int(config['Tuning']['batch_size']),
             delay=float(config['Tuning']['delay']),
-            max_workers=int(config['Tuning']['max_workers'])
+            max_workers=int(config['Tuning']['max_workers']),
+            spreadsheet_diff_update=config.getboolean('Tuning', 'spreadsheet_diff_update', fallback=True),
+            spreadsheet_max_payload_bytes=config.getint('Tuning', 'spreadsheet_max_payload_bytes', fallback=2000000),
+            spreadsheet_max_cells=config.getint('Tuning', 'spreadsheet_max_cells', fallback=200000),
+            spreadsheet_append_mode=config.getboolean('Tuning', 'spreadsheet_append_mode', fallback=True),
+            fetch_backend=config.get('Tuning', 'fetch_backend', fallback='pandas'),
+            ngram_index_columns=[
+                column.strip()
+                for column in config.get('Tuning', 'ngram_index_columns', fallback='').split(',')
+                if column.strip()
+            ]
+        )
+        
+        # Google APIクォータ設定
+        google_quota_config = GoogleAPIQuotaConfig(
+            sheets_read_per_minute=config.getfloat('GoogleAPIQuota', 'sheets_read_per_minute', fallback=60),
+            sheets_write_per_minute=config.getfloat('GoogleAPIQuota', 'sheets_write_per_minute', fallback=60),
+            drive_per_minute=config.getfloat('GoogleAPIQuota', 'drive_per_minute', fallback=600),
+            max_retries=config.getint('GoogleAPIQuota', 'max_retries', fallback=6)
+        )
+        
+        # 共有コネクションプール設定
+        db_pool_config = DatabasePoolConfig(
+            pool_size=config.getint('DatabasePool', 'pool_size', fallback=5),
+            warmup_size=config.getint('DatabasePool', 'warmup_size', fallback=2),
+            idle_timeout=config.getfloat('DatabasePool', 'idle_timeout', fallback=300),
+            checkout_timeout=config.getfloat('DatabasePool', 'checkout_timeout', fallback=60),
+            health_check_interval=config.getfloat('DatabasePool', 'health_check_interval', fallback=30),
+            breaker_failure_threshold=config.getint('DatabasePool', 'breaker_failure_threshold', fallback=3),
+            breaker_cool_down=config.getfloat('DatabasePool', 'breaker_cool_down', fallback=30)
+        )
+        
+        # 共有Arrowテーブルキャッシュ設定（Streamlitアプリ用）
+        viewer_cache_config = ViewerCacheConfig(
+            max_bytes=config.getint('ViewerCache', 'max_bytes', fallback=2 * 1024 ** 3),
+            filter_results_per_table=config.getint('ViewerCache', 'filter_results_per_table', fallback=16),
+            csv_download_dir=config.get('ViewerCache', 'csv_download_dir', fallback=''),
+            csv_download_max_age=config.getint('ViewerCache', 'csv_download_max_age', fallback=3600),
+            watch_datasets=config.getboolean('ViewerCache', 'watch_datasets', fallback=True)
+        )
+        
+        # バッチ実行時のDBセッション設定
+        batch_session_config = BatchSessionConfig(
+            consistent_snapshot=config.getboolean('BatchSession', 'consistent_snapshot', fallback=False),
+            snapshot_global_lock=config.getboolean('BatchSession', 'snapshot_global_lock', fallback=False),
+            net_read_timeout=config.getint('BatchSession', 'net_read_timeout', fallback=0),
+            net_write_timeout=config.getint('BatchSession', 'net_write_timeout', fallback=0),
+            max_execution_time=config.getint('BatchSession', 'max_execution_time', fallback=0),
+            entry_timeout=config.getint('BatchSession', 'entry_timeout', fallback=0)
         )
         
         # ログ設定
@@ -259,7 +361,11 @@ class AppConfig:
             logging=logging_config,
             slack=slack_config,
             batch=batch_config,
-            csv=csv_config
+            csv=csv_config,
+            google_quota=google_quota_config,
+            db_pool=db_pool_config,
+            viewer_cache=viewer_cache_config,
+            batch_session=batch_session_config
         )
 
 
@@ -302,6 +408,18 @@ def load_config(config_file: str = "config/settings.ini") -> tuple:
         'batch_size': app_config.tuning.batch_size,
         'delay': app_config.tuning.delay,
         'max_workers': app_config.tuning.max_workers,
+        'spreadsheet_diff_update': app_config.tuning.spreadsheet_diff_update,
+        'spreadsheet_max_payload_bytes': app_config.tuning.spreadsheet_max_payload_bytes,
+        'spreadsheet_max_cells': app_config.tuning.spreadsheet_max_cells,
+        'spreadsheet_append_mode': app_config.tuning.spreadsheet_append_mode,
+        'fetch_backend': app_config.tuning.fetch_backend,
+        'ngram_index_columns': app_config.tuning.ngram_index_columns,
+        'consistent_snapshot': app_config.batch_session.consistent_snapshot,
+        'snapshot_global_lock': app_config.batch_session.snapshot_global_lock,
+        'net_read_timeout': app_config.batch_session.net_read_timeout,
+        'net_write_timeout': app_config.batch_session.net_write_timeout,
+        'max_execution_time': app_config.batch_session.max_execution_time,
+        'entry_timeout': app_config.batch_session.entry_timeout,
         'config_file': config_file,
         # Slack設定
         'slack_webhook_url': app_config.slack.webhook_url,
@@ -0,0 +1,139 @@
+"""
+サーキットブレーカー
+
+接続失敗が続いた接続先を一定時間「停止中」とみなし、呼び出し側をすぐに失敗させる。
+トンネル断の間に各呼び出しがそれぞれ再試行ループで待たされることを防ぐ。
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+from src.core.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOL_DOWN = 30.0
+
+
+class CircuitOpenError(ConnectionError):
+    """サーキットブレーカー作動中のため接続を試行しなかったことを示す例外"""
+
+
+class CircuitBreaker:
+    """連続失敗回数で開閉するサーキットブレーカー"""
+
+    def __init__(self, name: str, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, cool_down: float = DEFAULT_COOL_DOWN):
+        """
+        サーキットブレーカーを初期化
+
+        Args:
+            name: 接続先の名前（ログ用）
+            failure_threshold: 作動させる連続失敗回数
+            cool_down: 作動後に試行を止める秒数
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cool_down = cool_down
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        # クールダウン明けの試行（half-open）を開始した時刻
+        self._trial_started_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        """'closed' / 'open' / 'half_open' のいずれか"""
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at < self.cool_down:
+                return 'open'
+            return 'half_open'
+
+    def remaining(self) -> float:
+        """試行を再開するまでの残り秒数"""
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.cool_down - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """
+        接続を試行してよいか判定（クールダウン明けは1件だけ試行を許可する）
+
+        Returns:
+            bool: 試行してよい場合True
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.cool_down:
+                return False
+            if self._trial_started_at is not None and now - self._trial_started_at < self.cool_down:
+                return False
+            self._trial_started_at = now
+            return True
+
+    def check(self) -> None:
+        """
+        試行できない場合に CircuitOpenError を送出
+
+        Raises:
+            CircuitOpenError: サーキットブレーカー作動中の場合
+        """
+        if not self.allow():
+            raise CircuitOpenError(
+                f"{self.name} への接続を停止中です（サーキットブレーカー作動中、残り{self.remaining():.0f}秒）"
+            )
+
+    def record_success(self) -> None:
+        """試行の成功を記録"""
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"サーキットブレーカーを解除しました: {self.name}")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_started_at = None
+
+    def record_failure(self) -> None:
+        """試行の失敗を記録（閾値に達するかクールダウン明けの試行が失敗したら作動）"""
+        with self._lock:
+            self._failures += 1
+            trial_failed = self._trial_started_at is not None
+            self._trial_started_at = None
+            if trial_failed or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                logger.warning(
+                    f"サーキットブレーカーが作動しました: {self.name} "
+                    f"(連続失敗 {self._failures} 回, {self.cool_down:.0f}秒間は接続を試行しません)"
+                )
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(
+    name: str,
+    failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+    cool_down: float = DEFAULT_COOL_DOWN
+) -> CircuitBreaker:
+    """
+    接続先ごとに共有のサーキットブレーカーを取得
+
+    Args:
+        name: 接続先の名前
+        failure_threshold: 作動させる連続失敗回数（初回作成時のみ使用）
+        cool_down: 作動後に試行を止める秒数（初回作成時のみ使用）
+
+    Returns:
+        CircuitBreaker: サーキットブレーカー
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, failure_threshold, cool_down)
+            _breakers[name] = breaker
+        return breaker
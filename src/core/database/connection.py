@@ -5,28 +5,76 @@ MySQL接続とコネクションプールの管理を提供
 旧構造との互換性も提供
 """
 import mysql.connector
+import random
 import traceback
 import time
 from typing import Optional, Dict, Any
 from mysql.connector.pooling import MySQLConnectionPool
+from src.core.database.circuit_breaker import get_circuit_breaker
 from src.core.logging.logger import get_logger
 
+# 接続再試行の待ち時間（指数バックオフ、秒）
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 10.0
+
+
+def retry_delay(retry_count: int) -> float:
+    """
+    再試行までの待ち時間を計算（指数バックオフ + ジッター）
+    
+    Args:
+        retry_count: 失敗回数（1始まり）
+        
+    Returns:
+        float: 待ち時間（秒）
+    """
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** (retry_count - 1)))
+    return delay * random.uniform(0.5, 1.0)
+
 
 class DatabaseConnection:
     """データベース接続管理クラス"""
     
-    def __init__(self, db_config: Dict[str, Any], local_bind_port: int = 3306):
+    def __init__(self, db_config: Dict[str, Any], local_bind_port: int = 3306, breaker_name: Optional[str] = None):
         """
         データベース接続管理を初期化
         
         Args:
             db_config: データベース設定辞書
             local_bind_port: ローカルバインドポート
+            breaker_name: サーキットブレーカーの名前（省略時は転送先のホスト:ポート）
         """
         self.db_config = db_config
         self.local_bind_port = local_bind_port
         self.logger = get_logger(__name__)
         self._connection_pool: Optional[MySQLConnectionPool] = None
+        # ローカルポートはトンネルを張り直すと変わるため、同じ転送先への接続でサーキットブレーカーを共有する
+        if breaker_name is None:
+            target = f"{db_config['host']}:{db_config.get('port', 3306)}" if db_config.get('host') else local_bind_port
+            breaker_name = f"mysql:{target}"
+        self.breaker = get_circuit_breaker(breaker_name)
+        
+    def connect(self) -> mysql.connector.MySQLConnection:
+        """
+        データベースへの接続を1回だけ試行
+        
+        Returns:
+            MySQLConnection: データベース接続オブジェクト
+            
+        Raises:
+            mysql.connector.Error: 接続に失敗した場合
+        """
+        return mysql.connector.connect(
+            host='127.0.0.1',
+            port=self.local_bind_port,
+            user=self.db_config['user'],
+            password=self.db_config['password'],
+            database=self.db_config['database'],
+            auth_plugin='mysql_native_password',
+            connection_timeout=300,  # 接続タイムアウト
+            autocommit=True,
+            use_pure=True
+        )
         
     def create_connection(self, max_retries: int = 3) -> Optional[mysql.connector.MySQLConnection]:
         """
@@ -41,35 +89,36 @@ class DatabaseConnection:
         retry_count = 0
         
         while retry_count < max_retries:
-            try:
-                conn = mysql.connector.connect(
-                    host='127.0.0.1',
-                    port=self.local_bind_port,
-                    user=self.db_config['user'],
-                    password=self.db_config['password'],
-                    database=self.db_config['database'],
-                    auth_plugin='mysql_native_password',
-                    connection_timeout=300,  # 接続タイムアウト
-                    autocommit=True,
-                    use_pure=True
+            # 接続先が停止中と判断されている間は再試行ループで待たずに失敗させる
+            if not self.breaker.allow():
+                self.logger.error(
+                    f"データベースへの接続を停止中のため試行しません（残り{self.breaker.remaining():.0f}秒）"
                 )
+                return None
+            
+            try:
+                conn = self.connect()
                 
                 self.logger.info("データベースに接続しました。接続状態を確認します。")
                 conn.ping(reconnect=True)
                 self.logger.info("接続は有効です。")
                 
+                self.breaker.record_success()
                 return conn
                 
             except mysql.connector.Error as err:
+                self.breaker.record_failure()
                 retry_count += 1
                 self.logger.warning(f"データベース接続エラー (試行 {retry_count}/{max_retries}): {err}")
                 if retry_count >= max_retries:
                     self.logger.error("最大試行回数に達しました。接続を確立できません。")
                     return None
-                self.logger.info("10秒後に再試行します...")
-                time.sleep(10)
+                delay = retry_delay(retry_count)
+                self.logger.info(f"{delay:.1f}秒後に再試行します...")
+                time.sleep(delay)
                 
             except Exception as e:
+                self.breaker.record_failure()
                 self.logger.error(f"予期しないエラー: {e}")
                 self.logger.error(traceback.format_exc())
                 return None
@@ -122,6 +171,8 @@ class DatabaseConnection:
             
         try:
             conn = self._connection_pool.get_connection()
+            # トンネル断などで切れた接続をそのまま渡さないよう貸し出し前に確認する
+            conn.ping(reconnect=True, attempts=1)
             self.logger.debug("プールから接続を取得しました")
             return conn
             
@@ -0,0 +1,214 @@
+"""
+共有データベース接続管理
+
+Streamlitアプリのセッション間でSSHトンネルとコネクションプールを共有し、
+クエリごとのSSHハンドシェイク・MySQLログインを不要にする。
+トンネルは設定により複数本開き、新しい接続をラウンドロビンで振り分ける。
+トンネルや接続が切れている場合は再接続し、一定時間使われなかった接続は閉じる。
+"""
+import atexit
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Tuple
+
+import mysql.connector
+
+from src.core.database.circuit_breaker import get_circuit_breaker
+from src.core.database.connection import DatabaseConnection
+from src.core.database.pool import (
+    HealthCheckedPool,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_WARMUP_SIZE,
+    DEFAULT_MAX_IDLE_AGE,
+    DEFAULT_HEALTH_CHECK_INTERVAL,
+)
+from src.core.database.tunnel_group import TunnelGroup
+from src.core.logging.logger import get_logger
+
+DEFAULT_CHECKOUT_TIMEOUT = 60
+
+# ローカルポートへの接続自体が拒否された場合のエラー番号（CR_CONN_HOST_ERROR）
+_CONNECTION_REFUSED_ERRNO = 2003
+
+
+class SharedConnectionManager:
+    """SSHトンネルとコネクションプールを長期間保持する共有接続マネージャー"""
+
+    def __init__(
+        self,
+        ssh_config: Dict[str, Any],
+        db_config: Dict[str, Any],
+        pool_size: int = DEFAULT_POOL_SIZE,
+        warmup_size: int = DEFAULT_WARMUP_SIZE,
+        idle_timeout: float = DEFAULT_MAX_IDLE_AGE,
+        checkout_timeout: float = DEFAULT_CHECKOUT_TIMEOUT,
+        health_check_interval: float = DEFAULT_HEALTH_CHECK_INTERVAL,
+        breaker_failure_threshold: int = 3,
+        breaker_cool_down: float = 30,
+        tunnel_count: int = 1
+    ):
+        """
+        共有接続マネージャーを初期化（接続は start() または初回利用時に確立する）
+
+        Args:
+            ssh_config: SSH設定辞書
+            db_config: データベース設定辞書
+            pool_size: プールサイズ（同時に利用できる接続数）
+            warmup_size: 事前に開いて維持する接続数
+            idle_timeout: 未使用のまま経過したら接続を閉じる秒数
+            checkout_timeout: プールが埋まっている場合に空きを待つ秒数
+            health_check_interval: 未使用接続をバックグラウンドで検証する間隔（秒）
+            breaker_failure_threshold: サーキットブレーカーを作動させる連続接続失敗回数
+            breaker_cool_down: サーキットブレーカー作動後に接続を試行しない秒数
+            tunnel_count: 開くSSHトンネルの本数
+        """
+        self.ssh_config = ssh_config
+        self.db_config = db_config
+        self.checkout_timeout = checkout_timeout
+        self.logger = get_logger(__name__)
+        self.health_check_interval = health_check_interval
+        self._tunnels = TunnelGroup(ssh_config, tunnel_count)
+        # トンネルのローカルポートは接続ごとに変わるため、プール全体のブレーカーは転送先で識別する
+        self.breaker = get_circuit_breaker(
+            f"mysql:{ssh_config.get('host')}:{ssh_config.get('db_host')}:{ssh_config.get('db_port')}",
+            failure_threshold=breaker_failure_threshold,
+            cool_down=breaker_cool_down
+        )
+        self._pool = HealthCheckedPool(
+            self._connect,
+            self.breaker,
+            pool_size=pool_size,
+            warmup_size=warmup_size,
+            max_idle_age=idle_timeout,
+            health_check_interval=health_check_interval
+        )
+
+    def _connect(self) -> Any:
+        """ラウンドロビンで選んだトンネル経由で新しい接続を1本開く（プールから呼ばれる）"""
+        index, port = self._tunnels.acquire()
+        # トンネルごとの連続失敗も記録する（張り直しでポートが変わっても履歴を引き継ぐようトンネル番号で識別する）
+        database = DatabaseConnection(self.db_config, port, breaker_name=f"{self.breaker.name}:tunnel{index}")
+        database.breaker.check()
+        try:
+            conn = database.connect()
+        except (mysql.connector.InterfaceError, mysql.connector.OperationalError) as e:
+            database.breaker.record_failure()
+            # トンネル自体が壊れている場合のみ張り直す（認証エラー・DB側の接続数超過等では他の接続を巻き込まない）
+            if self._tunnel_broken(index, e):
+                self._tunnels.mark_failed(index)
+            raise
+        database.breaker.record_success()
+        return conn
+
+    def _tunnel_broken(self, index: int, error: Exception) -> bool:
+        """接続の失敗がトンネル側の問題によるものか判定"""
+        if not self._tunnels.tunnels[index].is_healthy():
+            return True
+        return (
+            getattr(error, 'errno', None) == _CONNECTION_REFUSED_ERRNO
+            or isinstance(error.__cause__, ConnectionRefusedError)
+        )
+
+    def start(self) -> None:
+        """事前接続とバックグラウンド検証・トンネル監視を開始"""
+        self._pool.start()
+        self._tunnels.start_monitor(self.health_check_interval)
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """
+        共有プールから検証済みの接続を借りる（with ブロックを抜けるとプールへ返却）
+
+        Yields:
+            MySQLConnection: データベース接続
+
+        Raises:
+            TimeoutError: checkout_timeout 秒以内に空きがない場合
+            CircuitOpenError: 接続先停止中と判断されている場合
+            ConnectionError: トンネルを確立できない場合
+        """
+        self.start()
+        conn = self._pool.get(timeout=self.checkout_timeout)
+        succeeded = False
+        try:
+            yield conn
+            succeeded = True
+        finally:
+            # 途中で失敗した接続は未読の結果や切断が残っている可能性があるため確認してから戻す
+            self._pool.put(conn, validate=not succeeded)
+
+    def close(self) -> None:
+        """共有接続を終了"""
+        self._pool.close()
+        self._tunnels.stop()
+
+
+def _manager_key(ssh_config: Dict[str, Any], db_config: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (
+        ssh_config.get('host'), ssh_config.get('user'), ssh_config.get('local_port'),
+        db_config.get('host'), db_config.get('port'), db_config.get('user'), db_config.get('database')
+    )
+
+
+_managers: Dict[Tuple[Any, ...], SharedConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_shared_connection_manager(config) -> SharedConnectionManager:
+    """
+    接続先ごとに共有の接続マネージャーを取得（プロセス内の全セッションで共有）
+
+    初回作成時にバックグラウンドで事前接続を開始する。
+
+    Args:
+        config: アプリケーション設定（AppConfig）
+
+    Returns:
+        SharedConnectionManager: 共有接続マネージャー
+    """
+    ssh_config = {
+        'host': config.ssh.host,
+        'user': config.ssh.user,
+        'ssh_key_path': config.ssh.ssh_key_path,
+        'db_host': config.database.host,
+        'db_port': config.database.port,
+        # 共有トンネルは空いているポートにバインドする（固定ポートはバッチのトンネルと衝突するため）
+        'local_port': 0
+    }
+    db_config = {
+        'host': config.database.host,
+        'port': config.database.port,
+        'user': config.database.user,
+        'password': config.database.password,
+        'database': config.database.database
+    }
+    key = _manager_key(ssh_config, db_config)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            pool_config = config.db_pool
+            manager = SharedConnectionManager(
+                ssh_config,
+                db_config,
+                pool_size=pool_config.pool_size,
+                warmup_size=pool_config.warmup_size,
+                idle_timeout=pool_config.idle_timeout,
+                checkout_timeout=pool_config.checkout_timeout,
+                health_check_interval=pool_config.health_check_interval,
+                breaker_failure_threshold=pool_config.breaker_failure_threshold,
+                breaker_cool_down=pool_config.breaker_cool_down,
+                tunnel_count=config.ssh.tunnel_count
+            )
+            manager.start()
+            _managers[key] = manager
+        return manager
+
+
+@atexit.register
+def close_shared_connection_managers() -> None:
+    """全ての共有接続マネージャーを終了"""
+    with _managers_lock:
+        managers = list(_managers.values())
+        _managers.clear()
+    for manager in managers:
+        manager.close()
@@ -0,0 +1,210 @@
+"""
+SQL取得バックエンド
+
+SQLの実行結果を DataFrame として取得する方法を切り替え可能にする。
+
+- pandas: 従来どおり pd.read_sql（セルごとに Python オブジェクトへ変換）
+- arrow:  raw カーソルで取得したバイト列を列単位で Arrow 配列に変換し、
+          型変換を Arrow のベクトル演算で行ってから DataFrame 化する
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+
+from src.core.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_FETCH_BACKEND = 'pandas'
+# arrow バックエンドの fetchmany 件数
+DEFAULT_FETCH_BATCH_ROWS = 50000
+
+# mysql.connector の FieldType コード → Arrow の型（None は Python 変換にフォールバック）
+_INTEGER_TYPE_CODES = {1, 2, 3, 8, 9, 13}    # TINY, SHORT, LONG, LONGLONG, INT24, YEAR
+_FLOAT_TYPE_CODES = {4, 5}                   # FLOAT, DOUBLE
+_DATE_TYPE_CODES = {10, 14}                  # DATE, NEWDATE
+_DATETIME_TYPE_CODES = {7, 12}               # TIMESTAMP, DATETIME
+_STRING_TYPE_CODES = {15, 245, 247, 249, 250, 251, 252, 253, 254}  # VARCHAR, JSON, ENUM, BLOB系, VAR_STRING, STRING
+_UNSIGNED_FLAG = 1 << 5
+_BINARY_CHARSET_ID = 63
+
+
+def _arrow_type(column: Sequence[Any]) -> Optional[pa.DataType]:
+    """cursor.description の1列分から変換先の Arrow 型を決定"""
+    type_code = column[1]
+    flags = column[7] if len(column) > 7 and column[7] else 0
+    if type_code in _INTEGER_TYPE_CODES:
+        return pa.uint64() if type_code == 8 and flags & _UNSIGNED_FLAG else pa.int64()
+    if type_code in _FLOAT_TYPE_CODES:
+        return pa.float64()
+    if type_code in _DATE_TYPE_CODES:
+        return pa.date32()
+    if type_code in _DATETIME_TYPE_CODES:
+        return pa.timestamp('us')
+    if type_code in _STRING_TYPE_CODES:
+        charset = column[8] if len(column) > 8 else None
+        return pa.binary() if charset == _BINARY_CHARSET_ID else pa.string()
+    # DECIMAL / TIME / BIT / SET などは接続のコンバーターで変換する
+    return None
+
+
+def _get_converter(conn):
+    converter = getattr(conn, 'converter', None)
+    if converter is None:
+        from mysql.connector.conversion import MySQLConverter
+        converter = MySQLConverter(getattr(conn, 'charset', 'utf8mb4'), True)
+    return converter
+
+
+def _decode_column(values: Sequence[Any], column: Sequence[Any], converter) -> pa.Array:
+    """
+    raw カーソルの1列分の値を Arrow 配列に変換
+
+    Args:
+        values: 列の生の値（bytes / bytearray / None）
+        column: cursor.description の該当列
+        converter: 接続の MySQLConverter（ベクトル変換できない列に使用）
+
+    Returns:
+        pa.Array: 変換済みの配列
+    """
+    target = _arrow_type(column)
+    if target is not None:
+        try:
+            raw = pa.array(values, type=pa.binary())
+            if pa.types.is_binary(target):
+                return raw
+            text = raw.cast(pa.string())
+            return text if pa.types.is_string(target) else text.cast(target)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+            # ゼロ日付や不正なUTF-8など、一括変換できない値を含む場合
+            pass
+
+    python_values = [None if v is None else converter.to_python(column, v) for v in values]
+    try:
+        return pa.array(python_values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return pa.array([None if v is None else str(v) for v in python_values], type=pa.string())
+
+
+def _unify_chunks(chunks: List[pa.Array]) -> List[pa.Array]:
+    """バッチ間で型が揃わない列（全NULLのバッチ等）を共通の型に揃える"""
+    types = {chunk.type for chunk in chunks if not pa.types.is_null(chunk.type)}
+    if not types:
+        return chunks
+    target = types.pop() if len(types) == 1 else pa.string()
+    return [chunk if chunk.type == target else chunk.cast(target) for chunk in chunks]
+
+
+def iter_arrow_batches(conn, sql_query: str, batch_size: int = DEFAULT_FETCH_BATCH_ROWS) -> Iterator[pa.RecordBatch]:
+    """
+    SQLを実行し、結果を Arrow RecordBatch として順に返す
+
+    Args:
+        conn: データベース接続
+        sql_query: SQLクエリ
+        batch_size: 1バッチあたりの取得件数
+
+    Yields:
+        pa.RecordBatch: 変換済みバッチ（バッチごとに型が異なる場合がある）
+    """
+    cursor = conn.cursor(raw=True)
+    try:
+        cursor.execute(sql_query)
+        description = cursor.description or []
+        names = [column[0] for column in description]
+        converter = _get_converter(conn)
+        yielded = False
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            arrays = [
+                _decode_column(values, column, converter)
+                for values, column in zip(zip(*rows), description)
+            ]
+            yielded = True
+            yield pa.RecordBatch.from_arrays(arrays, names=names)
+        if not yielded:
+            yield pa.RecordBatch.from_arrays(
+                [pa.array([], type=_arrow_type(column) or pa.string()) for column in description],
+                names=names
+            )
+    finally:
+        cursor.close()
+
+
+def fetch_arrow_table(conn, sql_query: str, batch_size: int = DEFAULT_FETCH_BATCH_ROWS) -> pa.Table:
+    """
+    SQLの実行結果を Arrow Table として取得
+
+    Args:
+        conn: データベース接続
+        sql_query: SQLクエリ
+        batch_size: 1バッチあたりの取得件数
+
+    Returns:
+        pa.Table: 実行結果
+    """
+    batches = list(iter_arrow_batches(conn, sql_query, batch_size))
+    names = batches[0].schema.names
+    columns = [
+        pa.chunked_array(_unify_chunks([batch.column(i) for batch in batches]))
+        for i in range(len(names))
+    ]
+    return pa.Table.from_arrays(columns, names=names)
+
+
+def _read_pandas(conn, sql_query: str) -> pd.DataFrame:
+    return pd.read_sql(sql_query, conn)
+
+
+def _read_arrow(conn, sql_query: str) -> pd.DataFrame:
+    return fetch_arrow_table(conn, sql_query).to_pandas()
+
+
+FETCH_BACKENDS: Dict[str, Callable[[Any, str], pd.DataFrame]] = {
+    'pandas': _read_pandas,
+    'arrow': _read_arrow,
+}
+
+
+def read_sql_frame(conn, sql_query: str, backend: Optional[str] = None) -> pd.DataFrame:
+    """
+    設定されたバックエンドでSQLを実行して DataFrame を取得
+
+    Args:
+        conn: データベース接続
+        sql_query: SQLクエリ
+        backend: 'pandas' / 'arrow'（Noneの場合は DEFAULT_FETCH_BACKEND）
+
+    Returns:
+        pd.DataFrame: 実行結果
+    """
+    name = (backend or DEFAULT_FETCH_BACKEND).lower()
+    reader = FETCH_BACKENDS.get(name)
+    if reader is None:
+        logger.warning(f"不明な取得バックエンドのため pandas を使用します: {backend}")
+        reader = _read_pandas
+    return reader(conn, sql_query)
+
+
+def iter_sql_frames(conn, sql_query: str, chunk_size: int, backend: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    設定されたバックエンドでSQLを実行し、chunk_size 件ずつ DataFrame を返す
+
+    Args:
+        conn: データベース接続
+        sql_query: SQLクエリ
+        chunk_size: 1チャンクあたりの件数
+        backend: 'pandas' / 'arrow'（Noneの場合は DEFAULT_FETCH_BACKEND）
+
+    Yields:
+        pd.DataFrame: チャンクデータ
+    """
+    if (backend or DEFAULT_FETCH_BACKEND).lower() == 'arrow':
+        for batch in iter_arrow_batches(conn, sql_query, chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_sql(sql_query, conn, chunksize=chunk_size)
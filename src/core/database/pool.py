@@ -0,0 +1,262 @@
+"""
+ヘルスチェック付きコネクションプール
+
+起動時に接続を事前に開いておき、貸し出し時に ping と最大アイドル時間で検証する。
+バックグラウンドで定期的に未使用接続を検証し、切断された接続を張り直す。
+新規接続はサーキットブレーカー経由で行い、接続先停止中は待たずに失敗させる。
+"""
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from src.core.database.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.core.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_WARMUP_SIZE = 2
+DEFAULT_MAX_IDLE_AGE = 300
+DEFAULT_HEALTH_CHECK_INTERVAL = 30
+
+
+class HealthCheckedPool:
+    """貸し出し時・バックグラウンドで接続を検証するコネクションプール"""
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        breaker: CircuitBreaker,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        warmup_size: int = DEFAULT_WARMUP_SIZE,
+        max_idle_age: float = DEFAULT_MAX_IDLE_AGE,
+        health_check_interval: float = DEFAULT_HEALTH_CHECK_INTERVAL
+    ):
+        """
+        コネクションプールを初期化（接続は start() または初回貸し出し時に開く）
+
+        Args:
+            connect: 新しい接続を1本開く関数（失敗時は例外を送出すること）
+            breaker: 新規接続に使用するサーキットブレーカー
+            pool_size: 同時に開く最大接続数
+            warmup_size: 常に開いておく未使用接続数
+            max_idle_age: 未使用のまま経過したら破棄する秒数（warmup_size 分は ping で維持）
+            health_check_interval: バックグラウンド検証の間隔（秒）
+        """
+        self._connect = connect
+        self.breaker = breaker
+        self.pool_size = pool_size
+        self.warmup_size = min(warmup_size, pool_size)
+        self.max_idle_age = max_idle_age
+        self.health_check_interval = health_check_interval
+        # (接続, 最終正常確認時刻) のリスト。末尾から貸し出すため先頭ほど古い
+        self._idle: List[Tuple[Any, float]] = []
+        self._opened = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._wake = threading.Event()
+        self._maintainer: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """事前接続とバックグラウンド検証を開始"""
+        with self._cond:
+            if self._closed or (self._maintainer is not None and self._maintainer.is_alive()):
+                return
+            self._maintainer = threading.Thread(target=self._maintain_loop, name='db-pool-health', daemon=True)
+            self._maintainer.start()
+
+    def _reserve(self) -> bool:
+        """接続数の枠を確保（_cond を保持した状態で呼ぶこと）"""
+        if self._opened >= self.pool_size:
+            return False
+        self._opened += 1
+        return True
+
+    def _unreserve(self) -> None:
+        with self._cond:
+            self._opened -= 1
+            self._cond.notify()
+
+    def _open(self) -> Any:
+        """サーキットブレーカー経由で新しい接続を開く"""
+        self.breaker.check()
+        try:
+            conn = self._connect()
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return conn
+
+    @staticmethod
+    def _close(conn: Any) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_alive(conn: Any) -> bool:
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn: Any) -> None:
+        """接続を破棄し、バックグラウンドで補充させる"""
+        self._close(conn)
+        self._unreserve()
+        self._wake.set()
+
+    def warmup(self) -> int:
+        """
+        未使用接続が warmup_size 本になるまで接続を開く
+
+        Returns:
+            int: 新たに開いた接続数
+        """
+        opened = 0
+        while True:
+            with self._cond:
+                if self._closed or len(self._idle) >= self.warmup_size or not self._reserve():
+                    break
+            try:
+                conn = self._open()
+            except CircuitOpenError as e:
+                self._unreserve()
+                logger.debug(f"事前接続を見送りました: {e}")
+                break
+            except Exception as e:
+                self._unreserve()
+                logger.warning(f"事前接続に失敗しました: {e}")
+                break
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+            opened += 1
+        if opened:
+            logger.info(f"コネクションプールに事前接続しました: {opened} 本")
+        return opened
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """
+        検証済みの接続を貸し出す
+
+        Args:
+            timeout: 空きを待つ最大秒数（Noneの場合は無制限）
+
+        Returns:
+            Any: データベース接続
+
+        Raises:
+            TimeoutError: timeout 秒以内に空きがない場合
+            CircuitOpenError: 新規接続が必要でサーキットブレーカー作動中の場合
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise ConnectionError("コネクションプールは終了しています")
+                    if self._idle:
+                        conn, checked_at = self._idle.pop()
+                        break
+                    if self._reserve():
+                        conn, checked_at = None, None
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"{timeout}秒以内に空き接続を取得できませんでした")
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                try:
+                    return self._open()
+                except Exception:
+                    self._unreserve()
+                    raise
+
+            if time.monotonic() - checked_at <= self.max_idle_age and self._is_alive(conn):
+                return conn
+            logger.info("無効になった接続を破棄して再取得します")
+            self._discard(conn)
+
+    def put(self, conn: Any, validate: bool = False) -> None:
+        """
+        接続を返却
+
+        Args:
+            conn: 返却する接続
+            validate: True の場合は ping で確認し、応答しなければ破棄する
+        """
+        if self._closed or (validate and not self._is_alive(conn)):
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _maintain_loop(self) -> None:
+        self.warmup()
+        while not self._closed:
+            self._wake.wait(self.health_check_interval)
+            self._wake.clear()
+            if self._closed:
+                return
+            try:
+                self._maintain()
+            except Exception as e:
+                logger.warning(f"コネクションプールの検証中にエラーが発生しました: {e}")
+
+    def _maintain(self) -> None:
+        """古い未使用接続の破棄・生存確認・事前接続の補充"""
+        now = time.monotonic()
+        expired: List[Any] = []
+        to_check: List[Any] = []
+        with self._cond:
+            keep_from = len(self._idle) - self.warmup_size
+            remaining = []
+            for index, (conn, checked_at) in enumerate(self._idle):
+                age = now - checked_at
+                if index < keep_from:
+                    # warmup_size を超える分は ping で延命せず、max_idle_age 経過で閉じる
+                    if age >= self.max_idle_age:
+                        expired.append(conn)
+                    else:
+                        remaining.append((conn, checked_at))
+                elif age >= self.health_check_interval:
+                    to_check.append(conn)
+                else:
+                    remaining.append((conn, checked_at))
+            self._idle = remaining
+            self._opened -= len(expired)
+
+        for conn in expired:
+            self._close(conn)
+        if expired:
+            logger.info(f"{self.max_idle_age:.0f}秒以上未使用の接続を閉じました: {len(expired)} 本")
+
+        dead = 0
+        for conn in to_check:
+            if self._is_alive(conn):
+                self.put(conn)
+            else:
+                dead += 1
+                self._close(conn)
+                self._unreserve()
+        if dead:
+            logger.warning(f"切断された接続を破棄しました: {dead} 本（再接続します）")
+
+        self.warmup()
+
+    def close(self) -> None:
+        """全ての未使用接続を閉じ、以降の貸し出しを停止"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._opened -= len(idle)
+            self._cond.notify_all()
+        self._wake.set()
+        for conn, _ in idle:
+            self._close(conn)
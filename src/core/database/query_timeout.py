@@ -0,0 +1,182 @@
+"""
+エントリーごとのクエリ実行時間の上限
+
+バッチの各エントリーに実行時間の上限を設け、1件の長時間クエリが後続のエントリーを止めないようにする。
+
+- SELECT 文に `/*+ MAX_EXECUTION_TIME(ms) */` オプティマイザヒントを付与し、サーバー側で打ち切る
+- ヒントが効かない場合（WITH 句から始まる文や結果の転送中など）に備え、
+  上限を過ぎたら別接続から `KILL QUERY <connection_id>` を発行するウォッチドッグを動かす
+"""
+import re
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import mysql.connector
+
+from src.core.database.connection import DatabaseConnection
+from src.core.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+# サーバー側のヒントで打ち切られる前にウォッチドッグが動かないよう、KILL QUERY を遅らせる秒数
+DEFAULT_KILL_GRACE = 5
+
+ER_QUERY_TIMEOUT = 3024  # maximum statement execution time exceeded
+
+# 先頭のコメント・空白に続く最初の SELECT キーワード
+_LEADING_SELECT = re.compile(
+    r'^((?:\s+|--[^\n]*(?:\n|$)|#[^\n]*(?:\n|$)|/\*(?!\+).*?\*/)*)(SELECT)\b',
+    re.IGNORECASE | re.DOTALL
+)
+_EXISTING_HINT = re.compile(r'/\*\+[^*]*MAX_EXECUTION_TIME', re.IGNORECASE)
+
+
+class QueryTimeoutError(TimeoutError):
+    """エントリーの実行時間の上限を超えたため、クエリを打ち切った"""
+
+
+def add_max_execution_time_hint(sql_query: str, timeout_ms: int) -> str:
+    """
+    SELECT 文に MAX_EXECUTION_TIME ヒントを付与
+
+    SELECT から始まらない文（WITH 句など）や既にヒントがある文はそのまま返す。
+
+    Args:
+        sql_query: SQLクエリ
+        timeout_ms: 上限（ミリ秒）
+
+    Returns:
+        str: ヒント付きのSQLクエリ
+    """
+    if timeout_ms <= 0 or _EXISTING_HINT.search(sql_query):
+        return sql_query
+    return _LEADING_SELECT.sub(
+        lambda m: f"{m.group(1)}{m.group(2)} /*+ MAX_EXECUTION_TIME({int(timeout_ms)}) */",
+        sql_query,
+        count=1
+    )
+
+
+class QueryBudget:
+    """エントリーごとの実行時間の上限（ヒント + KILL QUERY ウォッチドッグ）"""
+
+    def __init__(self, timeout: float, connect: Callable[[], Any], kill_grace: float = DEFAULT_KILL_GRACE):
+        """
+        実行時間の上限を初期化
+
+        Args:
+            timeout: 1エントリーあたりの上限（秒）
+            connect: KILL QUERY を発行する別接続を開く関数
+            kill_grace: ヒントによる打ち切りを待ってから KILL QUERY を発行するまでの猶予（秒）
+        """
+        self.timeout = timeout
+        self.connect = connect
+        self.kill_grace = kill_grace
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], db_config: Dict[str, Any], local_bind_port: int) -> Optional['QueryBudget']:
+        """
+        load_config の追加設定から上限を作成
+
+        Args:
+            config: 追加設定辞書
+            db_config: データベース設定辞書（KILL QUERY 用の別接続に使用）
+            local_bind_port: SSHトンネルのローカルバインドポート
+
+        Returns:
+            Optional[QueryBudget]: 上限（entry_timeout が0以下の場合はNone）
+        """
+        timeout = config.get('entry_timeout', 0)
+        if not timeout or timeout <= 0:
+            return None
+        return cls(timeout, DatabaseConnection(db_config, local_bind_port).connect)
+
+    def _kill(self, conn_id: int, state: Dict[str, Any]) -> None:
+        with state['lock']:
+            if not state['active']:
+                return
+            state['timed_out'] = True
+            logger.warning(f"実行時間の上限（{self.timeout}秒）を超えたため、クエリを停止します: connection_id={conn_id}")
+            side = None
+            try:
+                side = self.connect()
+                cursor = side.cursor()
+                try:
+                    cursor.execute(f"KILL QUERY {int(conn_id)}")
+                finally:
+                    cursor.close()
+            except mysql.connector.Error as e:
+                logger.error(f"KILL QUERY の発行に失敗しました: connection_id={conn_id}, {e}")
+            finally:
+                if side is not None:
+                    side.close()
+
+    @contextmanager
+    def guard(self, conn, sql_query: str, streaming: bool = False) -> Iterator[str]:
+        """
+        ヒントを付与したSQLを返し、ブロックの実行中はウォッチドッグで監視する
+
+        Args:
+            conn: クエリを実行する接続
+            sql_query: SQLクエリ
+            streaming: ブロックの外で結果を少しずつ取得する場合True
+                （サーバー側の上限は取得の完了まで数えるため、ヒントを付与せずウォッチドッグのみで監視する）
+
+        Yields:
+            str: ヒント付きのSQLクエリ
+
+        Raises:
+            QueryTimeoutError: 上限を超えてクエリが打ち切られた場合
+        """
+        state = {'lock': threading.Lock(), 'active': True, 'timed_out': False}
+        conn_id = getattr(conn, 'connection_id', None)
+        timer = None
+        if conn_id is not None:
+            timer = threading.Timer(self.timeout + self.kill_grace, self._kill, args=(conn_id, state))
+            timer.daemon = True
+            timer.start()
+        try:
+            yield sql_query if streaming else add_max_execution_time_hint(sql_query, int(self.timeout * 1000))
+        except Exception as e:
+            if state['timed_out'] or getattr(e, 'errno', None) == ER_QUERY_TIMEOUT:
+                self._discard_unread_result(conn)
+                raise QueryTimeoutError(f"実行時間の上限（{self.timeout}秒）を超えました: {e}") from e
+            raise
+        finally:
+            if timer is not None:
+                timer.cancel()
+            # KILL QUERY の発行中であれば完了を待ち、以降のクエリを誤って停止しないようにする
+            with state['lock']:
+                state['active'] = False
+
+    @staticmethod
+    def _discard_unread_result(conn) -> None:
+        """打ち切られたクエリの未読の結果を読み捨て、接続を次のエントリーで使えるようにする"""
+        try:
+            if getattr(conn, 'unread_result', False):
+                conn.consume_results()
+        except mysql.connector.Error as e:
+            logger.warning(f"打ち切ったクエリの結果を破棄できません: {e}")
+
+
+@contextmanager
+def query_guard(conn, sql_query: str, budget: Optional[QueryBudget] = None, streaming: bool = False) -> Iterator[str]:
+    """
+    上限が設定されていれば QueryBudget.guard を適用し、なければSQLをそのまま返す
+
+    Args:
+        conn: クエリを実行する接続
+        sql_query: SQLクエリ
+        budget: 実行時間の上限（Noneの場合は制限なし）
+        streaming: ブロックの外で結果を少しずつ取得する場合True（QueryBudget.guard を参照）
+
+    Yields:
+        str: 実行するSQLクエリ
+    """
+    if budget is None:
+        yield sql_query
+        return
+    with budget.guard(conn, sql_query, streaming) as guarded_query:
+        yield guarded_query
+
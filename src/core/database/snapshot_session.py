@@ -0,0 +1,172 @@
+"""
+一貫スナップショット読み取りセッション
+
+バッチ実行の開始時に `START TRANSACTION READ ONLY, WITH CONSISTENT SNAPSHOT` を開き、
+同じ実行内のエントリー（企業・教室・求人・契約など）を同一時点のデータで取得する。
+読み取り専用の一貫性読み取りのため行ロックも取得しない。
+セッション変数（net_read_timeout / net_write_timeout / MAX_EXECUTION_TIME）も設定から適用する。
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import mysql.connector
+
+from src.core.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _execute(conn, statement: str) -> None:
+    cursor = conn.cursor()
+    try:
+        cursor.execute(statement)
+    finally:
+        cursor.close()
+
+
+class SnapshotSession:
+    """複数の接続で読み取り専用の一貫スナップショットを保持するセッション"""
+
+    def __init__(
+        self,
+        connections: Sequence[Any],
+        consistent_snapshot: bool = True,
+        global_lock: bool = False,
+        net_read_timeout: int = 0,
+        net_write_timeout: int = 0,
+        max_execution_time: int = 0
+    ):
+        """
+        セッションを初期化
+
+        Args:
+            connections: 対象の接続（並列ワーカーごとの接続）
+            consistent_snapshot: 一貫スナップショットのトランザクションを開くか
+            global_lock: 複数接続の開始時点を FLUSH TABLES WITH READ LOCK で揃えるか（RELOAD権限が必要）
+            net_read_timeout: net_read_timeout（秒、0以下は変更しない）
+            net_write_timeout: net_write_timeout（秒、0以下は変更しない）
+            max_execution_time: MAX_EXECUTION_TIME（ミリ秒、0以下は変更しない）
+        """
+        self.connections = list(connections)
+        self.consistent_snapshot = consistent_snapshot
+        self.global_lock = global_lock
+        self.session_variables = {
+            'net_read_timeout': net_read_timeout,
+            'net_write_timeout': net_write_timeout,
+            'MAX_EXECUTION_TIME': max_execution_time,
+        }
+        # 接続ごとのセッション開始時の connection_id（再接続の検出用）
+        self._connection_ids: Dict[int, Optional[int]] = {}
+
+    @classmethod
+    def from_config(cls, connections: Sequence[Any], config: Dict[str, Any]) -> 'SnapshotSession':
+        """
+        load_config の追加設定からセッションを作成
+
+        Args:
+            connections: 対象の接続
+            config: 追加設定辞書
+
+        Returns:
+            SnapshotSession: セッション
+        """
+        return cls(
+            connections,
+            consistent_snapshot=config.get('consistent_snapshot', False),
+            global_lock=config.get('snapshot_global_lock', False),
+            net_read_timeout=config.get('net_read_timeout', 0),
+            net_write_timeout=config.get('net_write_timeout', 0),
+            max_execution_time=config.get('max_execution_time', 0)
+        )
+
+    def _apply_session_variables(self, conn) -> None:
+        for name, value in self.session_variables.items():
+            if not value or value <= 0:
+                continue
+            try:
+                _execute(conn, f"SET SESSION {name} = {int(value)}")
+            except mysql.connector.Error as e:
+                logger.warning(f"セッション変数を設定できません: {name}={value}, {e}")
+
+    def _begin(self, conn) -> None:
+        _execute(conn, "SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        _execute(conn, "START TRANSACTION READ ONLY, WITH CONSISTENT SNAPSHOT")
+        self._connection_ids[id(conn)] = getattr(conn, 'connection_id', None)
+
+    def _begin_all(self, connections: List[Any]) -> None:
+        """全接続でスナップショットを開始（可能なら同一時点に揃える）"""
+        if self.global_lock and len(connections) > 1:
+            try:
+                _execute(connections[0], "FLUSH TABLES WITH READ LOCK")
+            except mysql.connector.Error as e:
+                logger.warning(f"グローバル読み取りロックを取得できないため、順に開始します: {e}")
+            else:
+                try:
+                    for conn in connections:
+                        self._begin(conn)
+                finally:
+                    _execute(connections[0], "UNLOCK TABLES")
+                return
+        # ロックなしの場合も連続して開始し、接続間の時点のずれを最小にする
+        for conn in connections:
+            self._begin(conn)
+
+    def start(self) -> 'SnapshotSession':
+        """
+        セッション変数を適用し、スナップショットを開始
+
+        Returns:
+            SnapshotSession: 自身
+        """
+        for conn in self.connections:
+            self._apply_session_variables(conn)
+        if self.consistent_snapshot:
+            try:
+                self._begin_all(self.connections)
+                logger.info(f"読み取り専用の一貫スナップショットを開始しました（接続数: {len(self.connections)}）")
+            except mysql.connector.Error as e:
+                # スナップショットを開始できなくても従来どおり autocommit で処理を続行する
+                logger.warning(f"一貫スナップショットを開始できないため、通常モードで実行します: {e}")
+                self.consistent_snapshot = False
+        return self
+
+    def ensure(self, conn=None) -> None:
+        """
+        再接続でスナップショットが失われた接続を検出し、新しいスナップショットを開始
+
+        Args:
+            conn: 確認する接続（Noneの場合は全接続）
+        """
+        if not self.consistent_snapshot:
+            return
+        for target in ([conn] if conn is not None else self.connections):
+            started_id = self._connection_ids.get(id(target))
+            current_id = getattr(target, 'connection_id', None)
+            if started_id == current_id:
+                continue
+            logger.warning(
+                "再接続によりスナップショットが失われたため、新しいスナップショットを開始します"
+                "（以降のエントリーは他のエントリーと同一時点ではありません）"
+            )
+            self._apply_session_variables(target)
+            try:
+                self._begin(target)
+            except mysql.connector.Error as e:
+                logger.warning(f"スナップショットを再開始できません: {e}")
+
+    def end(self) -> None:
+        """スナップショットのトランザクションを終了"""
+        if not self.consistent_snapshot:
+            return
+        for conn in self.connections:
+            try:
+                _execute(conn, "COMMIT")
+            except mysql.connector.Error as e:
+                logger.warning(f"スナップショットの終了時にエラーが発生しました: {e}")
+        self._connection_ids.clear()
+        logger.info("読み取り専用の一貫スナップショットを終了しました")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.end()
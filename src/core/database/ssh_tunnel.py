@@ -74,6 +74,18 @@ class SSHTunnel:
         """
         return self.tunnel is not None and self.tunnel.is_active
     
+    def is_healthy(self) -> bool:
+        """
+        SSH トンネルが転送可能な状態かチェック（SSHセッション自体の切断も検出する）
+        
+        Returns:
+            bool: 正常ならTrue
+        """
+        if not self.is_active():
+            return False
+        transport = getattr(self.tunnel, '_transport', None)
+        return transport is None or transport.is_active()
+    
     def get_local_bind_port(self) -> Optional[int]:
         """
         ローカルバインドポートを取得
@@ -0,0 +1,134 @@
+"""
+複数SSHトンネル管理
+
+同じ接続先へのSSHトンネルを複数本開き、新しいDB接続をラウンドロビンで振り分ける。
+paramiko のチャネル処理は1本のトンネルあたり1コアで頭打ちになるため、
+並列にクエリを実行する場合はトンネルを分けてスループットを確保する。
+各トンネルは個別に監視し、切断されたものだけを再起動する。
+"""
+import itertools
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.database.ssh_tunnel import SSHTunnel
+from src.core.logging.logger import get_logger
+
+DEFAULT_MONITOR_INTERVAL = 30
+
+
+class TunnelGroup:
+    """同じ接続先への複数のSSHトンネルを管理するクラス"""
+
+    def __init__(self, ssh_config: Dict[str, Any], tunnel_count: int = 1):
+        """
+        トンネルグループを初期化（トンネルは初回利用時に開く）
+
+        Args:
+            ssh_config: SSH設定辞書
+            tunnel_count: 開くトンネルの本数
+        """
+        self.logger = get_logger(__name__)
+        self.tunnels: List[SSHTunnel] = [
+            SSHTunnel(self._tunnel_config(ssh_config)) for _ in range(max(1, tunnel_count))
+        ]
+        self._locks = [threading.Lock() for _ in self.tunnels]
+        self._counter = itertools.count()
+        self._stop = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _tunnel_config(ssh_config: Dict[str, Any]) -> Dict[str, Any]:
+        config = dict(ssh_config)
+        # 共有トンネルは空いているローカルポートを自動で割り当てる
+        # （設定の固定ポートはバッチ等が個別に開くトンネルが使用するため、1本目も使わない）
+        config['local_port'] = 0
+        return config
+
+    def __len__(self) -> int:
+        return len(self.tunnels)
+
+    def ensure(self, index: int) -> int:
+        """
+        指定したトンネルが正常であることを確認し、必要なら再起動する
+
+        Args:
+            index: トンネル番号
+
+        Returns:
+            int: ローカルバインドポート
+
+        Raises:
+            ConnectionError: トンネルを確立できない場合
+        """
+        with self._locks[index]:
+            tunnel = self.tunnels[index]
+            if not tunnel.is_healthy():
+                if tunnel.tunnel is not None:
+                    self.logger.warning(f"SSHトンネル#{index}が切断されています。再接続します")
+                if not tunnel.restart():
+                    raise ConnectionError(f"SSHトンネル#{index}の確立に失敗しました")
+            return tunnel.get_local_bind_port()
+
+    def acquire(self) -> Tuple[int, int]:
+        """
+        ラウンドロビンで次のトンネルを選ぶ（確立できないトンネルは飛ばす）
+
+        Returns:
+            Tuple[int, int]: (トンネル番号, ローカルバインドポート)
+
+        Raises:
+            ConnectionError: 全てのトンネルを確立できない場合
+        """
+        last_error: Optional[ConnectionError] = None
+        for _ in range(len(self.tunnels)):
+            index = next(self._counter) % len(self.tunnels)
+            try:
+                return index, self.ensure(index)
+            except ConnectionError as e:
+                last_error = e
+        raise last_error
+
+    def mark_failed(self, index: int) -> None:
+        """
+        転送先に届かなかったトンネルを停止（次回利用時に再起動される）
+
+        Args:
+            index: トンネル番号
+        """
+        with self._locks[index]:
+            self.tunnels[index].stop()
+
+    def check_health(self) -> None:
+        """起動済みのトンネルを確認し、切断されたものだけを再起動"""
+        for index, tunnel in enumerate(self.tunnels):
+            if tunnel.tunnel is None or tunnel.is_healthy():
+                continue
+            try:
+                self.ensure(index)
+            except ConnectionError as e:
+                self.logger.error(f"SSHトンネルの再起動に失敗しました: {e}")
+
+    def start_monitor(self, interval: float = DEFAULT_MONITOR_INTERVAL) -> None:
+        """
+        バックグラウンドでのトンネル監視を開始
+
+        Args:
+            interval: 監視間隔（秒）
+        """
+        if self._monitor is not None and self._monitor.is_alive():
+            return
+        self._stop.clear()
+        self._monitor = threading.Thread(
+            target=self._monitor_loop, args=(interval,), name='ssh-tunnel-monitor', daemon=True
+        )
+        self._monitor.start()
+
+    def _monitor_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.check_health()
+
+    def stop(self) -> None:
+        """全てのトンネルを停止"""
+        self._stop.set()
+        for index in range(len(self.tunnels)):
+            self.mark_failed(index)
@@ -0,0 +1,183 @@
+"""
+スプレッドシート追記台帳
+
+最終行積立て（values.append）で書き込んだチャンクを、シートごとに実行ID・チャンクハッシュで
+ローカルのJSONファイルに記録する。リトライ時には記録済みのチャンクを読み飛ばし、
+同じデータが二重に追記されることを防ぐ。
+
+台帳ファイルは複数のバッチプロセスで共有するため、更新のたびにファイルロック下で読み直して反映する。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+    import fcntl
+
+from src.core.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_LEDGER_PATH = os.path.join('logs', 'append_ledger.json')
+
+
+def new_run_id() -> str:
+    """
+    追記処理の実行IDを生成
+
+    Returns:
+        str: 実行ID
+    """
+    return uuid.uuid4().hex
+
+
+def chunk_hash(chunk_index: int, rows: List[List[Any]]) -> str:
+    """
+    チャンクのハッシュを計算（同一内容のチャンクを区別するため連番を含める）
+
+    Args:
+        chunk_index: 実行内のチャンク連番
+        rows: チャンクの行データ
+
+    Returns:
+        str: SHA-1ハッシュ
+    """
+    payload = json.dumps(rows, ensure_ascii=False, default=str)
+    return hashlib.sha1(f"{chunk_index}:{payload}".encode('utf-8')).hexdigest()
+
+
+@contextmanager
+def _file_lock(lock_path: str) -> Iterator[None]:
+    """ロックファイルによるプロセス間の排他制御"""
+    directory = os.path.dirname(lock_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(lock_path, 'a+b') as f:
+        if msvcrt is not None:
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class AppendLedger:
+    """シートごとの追記済みチャンクを記録する台帳"""
+
+    def __init__(self, path: str = DEFAULT_LEDGER_PATH):
+        """
+        台帳を初期化
+
+        Args:
+            path: 台帳ファイルのパス
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def sheet_key(spreadsheet_id: str, sheet_title: str) -> str:
+        """台帳のキー（スプレッドシートID + シート名）"""
+        return f"{spreadsheet_id}:{sheet_title}"
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"追記台帳を読み込めないため空の台帳を使用します: {self.path}, {e}")
+            return {}
+
+    def _save(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """スレッド間・プロセス間で台帳ファイルの読み書きを排他する"""
+        with self._lock, _file_lock(f"{self.path}.lock"):
+            yield
+
+    def written_chunks(self, key: str, run_id: str) -> Set[str]:
+        """
+        指定した実行で書き込み済みのチャンクハッシュを取得
+
+        Args:
+            key: シートキー
+            run_id: 実行ID
+
+        Returns:
+            Set[str]: 書き込み済みのチャンクハッシュ
+        """
+        with self._locked():
+            entry = self._load().get(key)
+            if not entry or entry.get('run_id') != run_id:
+                return set()
+            return set(entry.get('chunks', []))
+
+    def record(self, key: str, run_id: str, chunk: str, rows: int) -> None:
+        """
+        書き込み済みチャンクを記録
+
+        Args:
+            key: シートキー
+            run_id: 実行ID
+            chunk: チャンクハッシュ
+            rows: チャンクの行数
+        """
+        with self._locked():
+            # 他のプロセスが記録したシートの内容を上書きしないよう、ファイルから読み直して反映する
+            entries = self._load()
+            entry = entries.get(key)
+            if not entry or entry.get('run_id') != run_id:
+                # シートごとに最新の実行のみ保持する
+                entry = {'run_id': run_id, 'chunks': [], 'rows': 0}
+                entries[key] = entry
+            entry['chunks'].append(chunk)
+            entry['rows'] += rows
+            entry['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            self._save(entries)
+
+    def complete(self, key: str, run_id: Optional[str] = None) -> None:
+        """
+        追記完了後に台帳から削除
+
+        Args:
+            key: シートキー
+            run_id: 実行ID（指定時は一致する場合のみ削除）
+        """
+        with self._locked():
+            entries = self._load()
+            entry = entries.get(key)
+            if entry is None or (run_id is not None and entry.get('run_id') != run_id):
+                return
+            del entries[key]
+            self._save(entries)
@@ -0,0 +1,342 @@
+"""
+スプレッドシート一括書き込み
+
+書き込み対象の行範囲をリクエストサイズ（推定ペイロードバイト数・セル数・行数）に応じて
+values_batch_update にまとめて送信する。
+応答時間やエラー応答に応じて1リクエストあたりの上限を自動調整し、
+幅の狭いシートでは少ないリクエスト数で、幅の広いシートでは10MB制限を超えないように書き込む。
+"""
+import json
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.core.logging.logger import get_logger
+from src.core.google_api.rate_limiter import sheets_write, get_status_code
+
+logger = get_logger(__name__)
+
+# Sheets APIのリクエスト上限（10MB）に対する安全上限
+HARD_MAX_PAYLOAD_BYTES = 9_000_000
+# 自動調整の下限
+MIN_PAYLOAD_BYTES = 64_000
+MIN_CELLS = 1_000
+
+# 値1件あたりのJSON区切り文字（", "）等のオーバーヘッド
+_CELL_OVERHEAD_BYTES = 2
+
+
+def column_letter(column_index: int) -> str:
+    """
+    列番号（1始まり）を列文字に変換
+
+    Args:
+        column_index: 列番号
+
+    Returns:
+        str: 列文字（例: 1 -> A, 27 -> AA）
+    """
+    column_index -= 1
+    letter = ''
+    while column_index >= 0:
+        letter = chr(column_index % 26 + 65) + letter
+        column_index = column_index // 26 - 1
+    return letter
+
+
+def a1_range(sheet_title: str, start_row: int, end_row: int, column_count: int) -> str:
+    """
+    シート名付きのA1形式範囲を生成
+
+    Args:
+        sheet_title: シート名
+        start_row: 開始行（1始まり）
+        end_row: 終了行（1始まり、この行を含む）
+        column_count: 列数
+
+    Returns:
+        str: A1形式の範囲（例: 'Sheet1'!A2:D10）
+    """
+    escaped_title = sheet_title.replace("'", "''")
+    return f"'{escaped_title}'!A{start_row}:{column_letter(column_count)}{end_row}"
+
+
+def estimate_row_bytes(row: List[Any]) -> int:
+    """
+    1行分のシリアライズ後のバイト数を推定
+
+    Args:
+        row: 行データ
+
+    Returns:
+        int: 推定バイト数
+    """
+    return len(json.dumps(row, ensure_ascii=False, default=str).encode('utf-8')) + _CELL_OVERHEAD_BYTES
+
+
+def iter_payload_chunks(
+    rows: List[List[Any]],
+    column_count: int,
+    max_payload_bytes: int = 2_000_000,
+    max_cells: int = 200_000,
+    max_rows: Optional[int] = None
+) -> Iterator[List[List[Any]]]:
+    """
+    行データを推定ペイロードサイズ・セル数・行数の上限ごとに分割
+
+    Args:
+        rows: 行データ
+        column_count: 列数
+        max_payload_bytes: 1チャンクあたりの最大バイト数
+        max_cells: 1チャンクあたりの最大セル数
+        max_rows: 1チャンクあたりの最大行数（Noneの場合は制限なし）
+
+    Yields:
+        List[List[Any]]: 分割された行データ
+    """
+    max_payload_bytes = min(max_payload_bytes, HARD_MAX_PAYLOAD_BYTES)
+    chunk: List[List[Any]] = []
+    chunk_bytes = 0
+    for row in rows:
+        row_bytes = estimate_row_bytes(row)
+        if chunk and (
+            chunk_bytes + row_bytes > max_payload_bytes
+            or (len(chunk) + 1) * column_count > max_cells
+            or (max_rows is not None and len(chunk) + 1 > max_rows)
+        ):
+            yield chunk
+            chunk, chunk_bytes = [], 0
+        chunk.append(row)
+        chunk_bytes += row_bytes
+    if chunk:
+        yield chunk
+
+
+def _is_size_related_error(error: Exception) -> bool:
+    """リクエストサイズの超過によるエラーか判定（分割すれば成功する可能性がある）"""
+    # 5xx はレートリミッターが再試行済みのため、分割して再送すると再試行の回数が分割の数だけ増える
+    status = get_status_code(error)
+    if status == 413:
+        return True
+    message = str(error).lower()
+    return status == 400 and ('too large' in message or 'payload' in message or 'exceeds' in message)
+
+
+@dataclass
+class BatchWriteStats:
+    """一括書き込みの統計"""
+    requests: int = 0
+    ranges: int = 0
+    rows: int = 0
+    cells: int = 0
+    payload_bytes: int = 0
+    seconds: float = 0.0
+    splits: int = 0
+    shrinks: int = 0
+    grows: int = 0
+
+
+class AdaptiveBatchWriter:
+    """ペイロードサイズに応じて values_batch_update をまとめる書き込みクラス"""
+
+    def __init__(
+        self,
+        spreadsheet,
+        max_payload_bytes: int = 2_000_000,
+        max_cells: int = 200_000,
+        max_rows: Optional[int] = None,
+        target_latency: float = 15.0,
+        delay: float = 0,
+        value_input_option: str = 'RAW'
+    ):
+        """
+        一括書き込みクラスを初期化
+
+        Args:
+            spreadsheet: gspreadのSpreadsheetオブジェクト
+            max_payload_bytes: 1リクエストあたりの最大ペイロードバイト数
+            max_cells: 1リクエストあたりの最大セル数
+            max_rows: 1リクエストあたりの最大行数（Noneの場合は制限なし）
+            target_latency: 1リクエストの目標応答秒数（超えた場合は上限を縮小）
+            delay: リクエスト間の待機秒数
+            value_input_option: 値の入力形式（RAW / USER_ENTERED）
+        """
+        self.spreadsheet = spreadsheet
+        self.ceiling_bytes = max(MIN_PAYLOAD_BYTES, min(int(max_payload_bytes), HARD_MAX_PAYLOAD_BYTES))
+        self.ceiling_cells = max(MIN_CELLS, int(max_cells))
+        self.max_rows = max_rows
+        self.target_latency = target_latency
+        self.delay = delay
+        self.value_input_option = value_input_option
+
+        # 現在の上限（応答に応じて変動）
+        self.limit_bytes = self.ceiling_bytes
+        self.limit_cells = self.ceiling_cells
+
+        # 送信待ち: (シート名, 開始行, 行データ, 列数, 推定バイト数)
+        self._pending: List[Tuple[str, int, List[List[Any]], int, int]] = []
+        self._pending_bytes = 0
+        self._pending_cells = 0
+        self._pending_rows = 0
+        self.stats = BatchWriteStats()
+
+    def add_rows(self, sheet_title: str, start_row: int, rows: List[List[Any]], column_count: int) -> None:
+        """
+        書き込む行範囲を追加（上限に達した時点で送信）
+
+        Args:
+            sheet_title: シート名
+            start_row: 書き込み開始行（1始まり）
+            rows: 行データ
+            column_count: 列数
+        """
+        piece: List[List[Any]] = []
+        piece_start = start_row
+        piece_bytes = 0
+
+        for row in rows:
+            row_bytes = estimate_row_bytes(row)
+            if self._would_overflow(len(piece) + 1, piece_bytes + row_bytes, column_count):
+                if piece:
+                    self._enqueue(sheet_title, piece_start, piece, column_count, piece_bytes)
+                    piece_start += len(piece)
+                    piece, piece_bytes = [], 0
+                if self._pending and self._would_overflow(1, row_bytes, column_count):
+                    self.flush()
+            piece.append(row)
+            piece_bytes += row_bytes
+
+        if piece:
+            self._enqueue(sheet_title, piece_start, piece, column_count, piece_bytes)
+
+    def _would_overflow(self, rows: int, payload_bytes: int, column_count: int) -> bool:
+        """送信待ちに追加すると上限を超えるか判定"""
+        if self._pending_rows + rows <= 1:
+            return False
+        return (
+            self._pending_bytes + payload_bytes > self.limit_bytes
+            or self._pending_cells + rows * column_count > self.limit_cells
+            or (self.max_rows is not None and self._pending_rows + rows > self.max_rows)
+        )
+
+    def _enqueue(self, sheet_title: str, start_row: int, rows: List[List[Any]], column_count: int, payload_bytes: int) -> None:
+        last = self._pending[-1] if self._pending else None
+        if last and last[0] == sheet_title and last[3] == column_count and last[1] + len(last[2]) == start_row:
+            # 直前の範囲と連続する場合は1つの範囲にまとめる
+            self._pending[-1] = (sheet_title, last[1], last[2] + rows, column_count, last[4] + payload_bytes)
+        else:
+            self._pending.append((sheet_title, start_row, rows, column_count, payload_bytes))
+        self._pending_bytes += payload_bytes
+        self._pending_cells += len(rows) * column_count
+        self._pending_rows += len(rows)
+
+    def flush(self) -> None:
+        """送信待ちの範囲をまとめて送信"""
+        if not self._pending:
+            return
+        pending = self._pending
+        self._pending = []
+        self._pending_bytes = self._pending_cells = self._pending_rows = 0
+        self._send(pending)
+
+    def _send(self, items: List[Tuple[str, int, List[List[Any]], int, int]]) -> None:
+        """values_batch_update を実行（サイズ起因のエラー時は分割して再送）"""
+        if self.stats.requests and self.delay:
+            logger.info(f"{self.delay}秒待機します。")
+            time.sleep(self.delay)
+
+        body = {
+            'valueInputOption': self.value_input_option,
+            'data': [
+                {'range': a1_range(title, start, start + len(rows) - 1, cols), 'values': rows}
+                for title, start, rows, cols, _ in items
+            ]
+        }
+        row_count = sum(len(rows) for _, _, rows, _, _ in items)
+        cell_count = sum(len(rows) * cols for _, _, rows, cols, _ in items)
+        payload_bytes = sum(b for _, _, _, _, b in items)
+
+        started = time.monotonic()
+        try:
+            sheets_write(self.spreadsheet.values_batch_update, body)
+        except Exception as e:
+            if not _is_size_related_error(e) or row_count <= 1:
+                logger.error(f"一括書き込みエラー ({len(items)} 範囲 / {row_count} 行 / 約{payload_bytes:,} bytes): {e}")
+                raise
+            self._shrink(f"エラー応答 ({e})")
+            self.stats.splits += 1
+            first, second = self._split(items)
+            logger.warning(f"一括書き込みを分割して再送します ({row_count} 行 -> {self._row_count(first)} + {self._row_count(second)} 行)")
+            self._send(first)
+            self._send(second)
+            return
+
+        elapsed = time.monotonic() - started
+        self.stats.requests += 1
+        self.stats.ranges += len(items)
+        self.stats.rows += row_count
+        self.stats.cells += cell_count
+        self.stats.payload_bytes += payload_bytes
+        self.stats.seconds += elapsed
+        logger.info(
+            f"一括書き込み{self.stats.requests} 完了: {len(items)} 範囲 / {row_count} 行 / "
+            f"{cell_count} セル / 約{payload_bytes:,} bytes / {elapsed:.1f}秒"
+        )
+        self._adapt(elapsed, payload_bytes, cell_count)
+
+    @staticmethod
+    def _row_count(items) -> int:
+        return sum(len(rows) for _, _, rows, _, _ in items)
+
+    @staticmethod
+    def _split(items):
+        """送信単位を2分割（範囲が1つの場合は行で分割）"""
+        if len(items) > 1:
+            middle = len(items) // 2
+            return items[:middle], items[middle:]
+        title, start, rows, cols, _ = items[0]
+        middle = len(rows) // 2
+        head, tail = rows[:middle], rows[middle:]
+        return (
+            [(title, start, head, cols, sum(estimate_row_bytes(r) for r in head))],
+            [(title, start + middle, tail, cols, sum(estimate_row_bytes(r) for r in tail))]
+        )
+
+    def _shrink(self, reason: str) -> None:
+        """上限を半分に縮小"""
+        self.limit_bytes = max(MIN_PAYLOAD_BYTES, self.limit_bytes // 2)
+        self.limit_cells = max(MIN_CELLS, self.limit_cells // 2)
+        self.stats.shrinks += 1
+        logger.info(f"一括書き込み上限を縮小: {self.limit_bytes:,} bytes / {self.limit_cells:,} セル - {reason}")
+
+    def _adapt(self, elapsed: float, payload_bytes: int, cell_count: int) -> None:
+        """応答時間に応じて上限を調整"""
+        if elapsed > self.target_latency:
+            self._shrink(f"応答時間 {elapsed:.1f}秒")
+        elif elapsed < self.target_latency / 4 and (
+            payload_bytes >= self.limit_bytes * 0.8 or cell_count >= self.limit_cells * 0.8
+        ):
+            # 上限付近まで詰めたリクエストが速く終わった場合のみ拡大
+            new_bytes = min(self.ceiling_bytes, int(self.limit_bytes * 1.5))
+            new_cells = min(self.ceiling_cells, int(self.limit_cells * 1.5))
+            if (new_bytes, new_cells) != (self.limit_bytes, self.limit_cells):
+                self.limit_bytes, self.limit_cells = new_bytes, new_cells
+                self.stats.grows += 1
+                logger.debug(f"一括書き込み上限を拡大: {self.limit_bytes:,} bytes / {self.limit_cells:,} セル")
+
+    def close(self) -> Dict[str, Any]:
+        """
+        残りを送信して統計を返す
+
+        Returns:
+            Dict[str, Any]: 書き込み統計
+        """
+        self.flush()
+        stats = asdict(self.stats)
+        if self.stats.requests:
+            logger.info(
+                f"一括書き込み完了: リクエスト {self.stats.requests} 回, {self.stats.rows} 行, "
+                f"{self.stats.cells} セル, 約{self.stats.payload_bytes:,} bytes, {self.stats.seconds:.1f}秒 "
+                f"(分割 {self.stats.splits} 回, 縮小 {self.stats.shrinks} 回, 拡大 {self.stats.grows} 回)"
+            )
+        return stats
@@ -15,6 +15,7 @@ from tenacity import retry, stop_after_attempt, wait_exponential, before_sleep_l
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
 from src.core.logging.logger import get_logger
+from src.core.google_api.rate_limiter import drive_call
 
 
 class GoogleDriveClient:
@@ -76,12 +77,12 @@ class GoogleDriveClient:
             service = self._get_service()
             
             # ファイル情報を取得
-            file_metadata = service.files().get(fileId=file_id).execute()
+            file_metadata = drive_call(service.files().get(fileId=file_id).execute)
             self.logger.info(f"ファイル情報取得: {file_metadata.get('name')}")
             
             # ファイル内容を取得
             request = service.files().get_media(fileId=file_id)
-            file_content = request.execute()
+            file_content = drive_call(request.execute)
             
             # バイナリデータを文字列に変換
             content = file_content.decode('utf-8')
@@ -130,10 +131,10 @@ class GoogleDriveClient:
             query = " and ".join(query_parts)
             
             # ファイル検索実行
-            results = service.files().list(
+            results = drive_call(service.files().list(
                 q=query,
                 fields="files(id, name, mimeType, modifiedTime)"
-            ).execute()
+            ).execute)
             
             files = results.get('files', [])
             self.logger.info(f"ファイル検索完了: {len(files)} 件見つかりました")
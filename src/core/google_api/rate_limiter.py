@@ -0,0 +1,323 @@
+"""
+Google API レートリミッター
+
+Sheets読み取り・Sheets書き込み・Driveのクォータ区分ごとにトークンバケットを持ち、
+全てのGoogle API呼び出しを共通の窓口で制御する。
+429（Quota exceeded）や一時的な5xxエラーはリクエスト単位でジッター付き指数バックオフにより再試行し、
+スロットリングに要した時間をメトリクスとして記録する。
+"""
+import random
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Optional, Set
+
+from src.core.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+# クォータ区分
+SHEETS_READ = 'sheets_read'
+SHEETS_WRITE = 'sheets_write'
+DRIVE = 'drive'
+
+# 既定のクォータ（1分あたりのリクエスト数）
+# Sheets API: 読み取り/書き込みとも 60 req/min/user、Drive API: 余裕を持たせて 600 req/min
+DEFAULT_REQUESTS_PER_MINUTE = {
+    SHEETS_READ: 60,
+    SHEETS_WRITE: 60,
+    DRIVE: 600,
+}
+
+# 再試行対象のHTTPステータス
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+# 冪等でない呼び出し（values.append など）の再試行対象。429 はサーバーが処理していないため再送できる
+RATE_LIMIT_STATUS_CODES = {429}
+# HTTPステータスを持たない例外でクォータ超過と判定するエラー理由
+QUOTA_ERROR_REASONS = ('RATE_LIMIT_EXCEEDED', 'RESOURCE_EXHAUSTED', 'Quota exceeded')
+
+
+class TokenBucket:
+    """トークンバケット（スレッドセーフ）"""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        """
+        トークンバケットを初期化
+
+        Args:
+            rate_per_second: 1秒あたりの補充トークン数
+            capacity: バケット容量（バースト許容量）
+        """
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate_per_second)
+        self._last_refill = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        トークンを取得（不足時は補充まで待機）
+
+        Args:
+            tokens: 取得するトークン数
+
+        Returns:
+            float: 待機した秒数
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait_seconds = (tokens - self._tokens) / self.rate_per_second
+            time.sleep(wait_seconds)
+            waited += wait_seconds
+
+    def drain(self) -> None:
+        """429受信時にバケットを空にし、後続リクエストも補充を待たせる"""
+        with self._lock:
+            self._tokens = 0.0
+            self._last_refill = time.monotonic()
+
+
+@dataclass
+class QuotaMetrics:
+    """クォータ区分ごとのメトリクス"""
+    requests: int = 0
+    throttled_requests: int = 0
+    throttled_seconds: float = 0.0
+    rate_limit_errors: int = 0
+    retries: int = 0
+    backoff_seconds: float = 0.0
+    failures: int = 0
+
+
+def get_status_code(error: Exception) -> Optional[int]:
+    """
+    gspread / googleapiclient の例外からHTTPステータスを取得
+
+    Args:
+        error: 発生した例外
+
+    Returns:
+        int: HTTPステータスコード（取得できない場合はNone）
+    """
+    # gspread.exceptions.APIError
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is not None:
+        return int(status)
+    # googleapiclient.errors.HttpError
+    resp = getattr(error, 'resp', None)
+    status = getattr(resp, 'status', None)
+    if status is not None:
+        return int(status)
+    # ステータスが取れない場合はクォータ超過を示すエラー理由だけで判定する
+    # （「429」の文字列は行番号やIDにも含まれ得るため判定に使わない）
+    message = str(error)
+    if any(reason in message for reason in QUOTA_ERROR_REASONS):
+        return 429
+    return None
+
+
+def _get_retry_after(error: Exception) -> Optional[float]:
+    """Retry-Afterヘッダーが付与されていれば秒数を返す"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or getattr(error, 'resp', None)
+    try:
+        value = headers.get('retry-after') or headers.get('Retry-After') if headers else None
+        return float(value) if value else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+class GoogleAPIRateLimiter:
+    """クォータ区分ごとのトークンバケットによるGoogle APIレートリミッター"""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[Dict[str, float]] = None,
+        max_retries: int = 6,
+        base_backoff: float = 1.0,
+        max_backoff: float = 64.0
+    ):
+        """
+        レートリミッターを初期化
+
+        Args:
+            requests_per_minute: クォータ区分ごとの1分あたりリクエスト数
+            max_retries: 1リクエストあたりの最大再試行回数
+            base_backoff: バックオフの基準秒数
+            max_backoff: バックオフの上限秒数
+        """
+        quotas = dict(DEFAULT_REQUESTS_PER_MINUTE)
+        if requests_per_minute:
+            quotas.update(requests_per_minute)
+
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._metrics: Dict[str, QuotaMetrics] = {}
+        self._metrics_lock = threading.Lock()
+
+        for quota_class, per_minute in quotas.items():
+            rate = per_minute / 60.0
+            # 1分間のクォータを使い切らないよう、バースト容量は10秒分に抑える
+            self._buckets[quota_class] = TokenBucket(rate, max(1.0, rate * 10))
+            self._metrics[quota_class] = QuotaMetrics()
+
+    def _bucket(self, quota_class: str) -> TokenBucket:
+        if quota_class not in self._buckets:
+            raise ValueError(f"不明なクォータ区分です: {quota_class}")
+        return self._buckets[quota_class]
+
+    def backoff_seconds(self, attempt: int) -> float:
+        """指数バックオフ（ジッター付き）の待機秒数を計算"""
+        return min(self.max_backoff, self.base_backoff * (2 ** attempt)) + random.uniform(0, 1)
+
+    def call(self, quota_class: str, func: Callable[..., Any], *args,
+             retry_statuses: Optional[Set[int]] = None, **kwargs) -> Any:
+        """
+        レート制御下でGoogle API呼び出しを実行
+
+        Args:
+            quota_class: クォータ区分（sheets_read / sheets_write / drive）
+            func: 実行する関数
+            *args: 関数の位置引数
+            retry_statuses: 再試行するHTTPステータス（省略時は RETRYABLE_STATUS_CODES）
+            **kwargs: 関数のキーワード引数
+
+        Returns:
+            Any: 関数の戻り値
+        """
+        bucket = self._bucket(quota_class)
+        metrics = self._metrics[quota_class]
+        retry_statuses = RETRYABLE_STATUS_CODES if retry_statuses is None else retry_statuses
+        attempt = 0
+
+        while True:
+            waited = bucket.acquire()
+            with self._metrics_lock:
+                metrics.requests += 1
+                if waited > 0:
+                    metrics.throttled_requests += 1
+                    metrics.throttled_seconds += waited
+
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                status = get_status_code(e)
+                if status not in retry_statuses or attempt >= self.max_retries:
+                    with self._metrics_lock:
+                        metrics.failures += 1
+                    raise
+
+                if status == 429:
+                    bucket.drain()
+                sleep_seconds = _get_retry_after(e) or self.backoff_seconds(attempt)
+                with self._metrics_lock:
+                    metrics.retries += 1
+                    metrics.backoff_seconds += sleep_seconds
+                    if status == 429:
+                        metrics.rate_limit_errors += 1
+
+                name = getattr(func, '__qualname__', repr(func))
+                logger.warning(
+                    f"Google API一時エラー (HTTP {status}) - {quota_class}:{name} "
+                    f"{sleep_seconds:.1f}秒後に再試行します ({attempt + 1}/{self.max_retries})"
+                )
+                time.sleep(sleep_seconds)
+                attempt += 1
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        クォータ区分ごとのメトリクスを取得
+
+        Returns:
+            Dict[str, Dict[str, Any]]: メトリクス辞書
+        """
+        with self._metrics_lock:
+            return {quota_class: asdict(m) for quota_class, m in self._metrics.items()}
+
+    def reset_metrics(self) -> None:
+        """メトリクスをリセット"""
+        with self._metrics_lock:
+            for quota_class in self._metrics:
+                self._metrics[quota_class] = QuotaMetrics()
+
+    def log_metrics(self) -> None:
+        """メトリクスをログ出力"""
+        for quota_class, m in self.get_metrics().items():
+            if m['requests'] == 0:
+                continue
+            logger.info(
+                f"Google APIメトリクス [{quota_class}] リクエスト: {m['requests']}件, "
+                f"待機: {m['throttled_requests']}件/{m['throttled_seconds']:.1f}秒, "
+                f"429: {m['rate_limit_errors']}件, 再試行: {m['retries']}件/{m['backoff_seconds']:.1f}秒, "
+                f"失敗: {m['failures']}件"
+            )
+
+
+_rate_limiter: Optional[GoogleAPIRateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> GoogleAPIRateLimiter:
+    """
+    プロセス共通のレートリミッターを取得
+
+    Returns:
+        GoogleAPIRateLimiter: 共有レートリミッター
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = _create_rate_limiter_from_config()
+    return _rate_limiter
+
+
+def _create_rate_limiter_from_config() -> GoogleAPIRateLimiter:
+    """設定ファイルのクォータ設定からレートリミッターを作成（読み込めない場合は既定値）"""
+    try:
+        from src.core.config.settings import AppConfig
+        quota = AppConfig.from_config_file('config/settings.ini').google_quota
+        return GoogleAPIRateLimiter(
+            requests_per_minute={
+                SHEETS_READ: quota.sheets_read_per_minute,
+                SHEETS_WRITE: quota.sheets_write_per_minute,
+                DRIVE: quota.drive_per_minute,
+            },
+            max_retries=quota.max_retries
+        )
+    except Exception as e:
+        logger.debug(f"クォータ設定を読み込めないため既定値を使用します: {e}")
+        return GoogleAPIRateLimiter()
+
+
+def sheets_read(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Sheets読み取りクォータでAPIを呼び出す"""
+    return get_rate_limiter().call(SHEETS_READ, func, *args, **kwargs)
+
+
+def sheets_write(func: Callable[..., Any], *args, retry_statuses: Optional[Set[int]] = None, **kwargs) -> Any:
+    """Sheets書き込みクォータでAPIを呼び出す（冪等でない呼び出しは retry_statuses で再試行を絞る）"""
+    return get_rate_limiter().call(SHEETS_WRITE, func, *args, retry_statuses=retry_statuses, **kwargs)
+
+
+def drive_call(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """DriveクォータでAPIを呼び出す"""
+    return get_rate_limiter().call(DRIVE, func, *args, **kwargs)
+
+
+def get_rate_limit_metrics() -> Dict[str, Dict[str, Any]]:
+    """共有レートリミッターのメトリクスを取得"""
+    return get_rate_limiter().get_metrics()
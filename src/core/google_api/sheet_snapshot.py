@@ -0,0 +1,230 @@
+"""
+管理シートのローカルスナップショット
+
+スプレッドシートのシート内容をローカルのJSONに保存し、
+Drive の modifiedTime が変わった場合のみ Sheets API から再取得する。
+バッチ起動時・Streamlit表示時の Sheets API 呼び出しを定常状態でゼロにし、
+Google側の障害時も直近のスナップショットで処理を継続できるようにする。
+"""
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import gspread
+from gspread.utils import numericise_all
+from googleapiclient.discovery import build
+
+from src.core.logging.logger import get_logger
+from src.core.google_api.rate_limiter import sheets_read, drive_call
+
+logger = get_logger(__name__)
+
+DEFAULT_SNAPSHOT_DIR = os.path.join('cache', 'sheet_snapshots')
+# Drive の modifiedTime を再確認するまでの秒数
+DEFAULT_CHECK_INTERVAL = 60
+
+
+def _safe_file_name(name: str) -> str:
+    """シート名をファイル名に使える形に変換"""
+    return re.sub(r'[\\/:*?"<>|\s]', '_', name)
+
+
+def values_to_records(values: List[List[Any]]) -> List[Dict[str, Any]]:
+    """
+    シートの値をレコード形式に変換（gspread の get_all_records と同じ数値変換を行う）
+
+    Args:
+        values: get_all_values 形式の2次元リスト
+
+    Returns:
+        List[Dict[str, Any]]: ヘッダ行をキーとしたレコードのリスト
+    """
+    if not values:
+        return []
+    headers = values[0]
+    records = []
+    for row in values[1:]:
+        padded_row = list(row) + [''] * (len(headers) - len(row))
+        records.append(dict(zip(headers, numericise_all(padded_row[:len(headers)]))))
+    return records
+
+
+class SheetSnapshotStore:
+    """スプレッドシートのシート内容をローカルにスナップショット保存するストア"""
+
+    def __init__(self, credentials, snapshot_dir: str = DEFAULT_SNAPSHOT_DIR, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        """
+        スナップショットストアを初期化
+
+        Args:
+            credentials: Google API認証情報
+            snapshot_dir: スナップショットの保存先ディレクトリ
+            check_interval: modifiedTime を再確認するまでの秒数
+        """
+        self.credentials = credentials
+        self.snapshot_dir = snapshot_dir
+        self.check_interval = check_interval
+        self._gc = None
+        self._drive = None
+        self._lock = threading.Lock()
+        # spreadsheet_id -> (確認時刻, modifiedTime)
+        self._modified_times: Dict[str, Tuple[float, str]] = {}
+
+    def _snapshot_path(self, spreadsheet_id: str, sheet_name: str) -> str:
+        return os.path.join(self.snapshot_dir, spreadsheet_id, f"{_safe_file_name(sheet_name)}.json")
+
+    def _load_snapshot(self, spreadsheet_id: str, sheet_name: str) -> Optional[Dict[str, Any]]:
+        path = self._snapshot_path(spreadsheet_id, sheet_name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+            return snapshot if snapshot.get('sheet_name') == sheet_name else None
+        except (OSError, ValueError) as e:
+            logger.warning(f"スナップショットを読み込めません: {path}, {e}")
+            return None
+
+    def _save_snapshot(self, snapshot: Dict[str, Any]) -> None:
+        path = self._snapshot_path(snapshot['spreadsheet_id'], snapshot['sheet_name'])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def _get_modified_time(self, spreadsheet_id: str) -> str:
+        """Drive からスプレッドシートの modifiedTime を取得（check_interval 秒間は再利用）"""
+        cached = self._modified_times.get(spreadsheet_id)
+        if cached and time.monotonic() - cached[0] < self.check_interval:
+            return cached[1]
+        if self._drive is None:
+            self._drive = build('drive', 'v3', credentials=self.credentials, cache_discovery=False)
+        metadata = drive_call(
+            self._drive.files().get(fileId=spreadsheet_id, fields='modifiedTime', supportsAllDrives=True).execute
+        )
+        modified_time = metadata['modifiedTime']
+        self._modified_times[spreadsheet_id] = (time.monotonic(), modified_time)
+        return modified_time
+
+    def modified_time(self, spreadsheet_id: str) -> Optional[str]:
+        """
+        スプレッドシートの modifiedTime を取得（check_interval 秒間は再利用）
+
+        表示側のキャッシュを、シートが編集された時点で取り直すためのキーに使う。
+
+        Args:
+            spreadsheet_id: スプレッドシートID
+
+        Returns:
+            Optional[str]: modifiedTime（確認できない場合はNone）
+        """
+        try:
+            with self._lock:
+                return self._get_modified_time(spreadsheet_id)
+        except Exception as e:
+            logger.warning(f"スプレッドシートの更新日時を確認できません: {spreadsheet_id}, {e}")
+            return None
+
+    def _fetch_values(self, spreadsheet_id: str, sheet_name: str) -> List[List[Any]]:
+        """Sheets API からシートの全値を取得"""
+        if self._gc is None:
+            self._gc = gspread.authorize(self.credentials)
+        spreadsheet = sheets_read(self._gc.open_by_key, spreadsheet_id)
+        worksheet = sheets_read(spreadsheet.worksheet, sheet_name)
+        return sheets_read(worksheet.get_all_values)
+
+    def get_values(self, spreadsheet_id: str, sheet_name: str) -> List[List[Any]]:
+        """
+        シートの全値を取得（スナップショットが最新ならローカルから返す）
+
+        Args:
+            spreadsheet_id: スプレッドシートID
+            sheet_name: シート名
+
+        Returns:
+            List[List[Any]]: get_all_values 形式の2次元リスト
+        """
+        with self._lock:
+            snapshot = self._load_snapshot(spreadsheet_id, sheet_name)
+
+            try:
+                modified_time = self._get_modified_time(spreadsheet_id)
+            except Exception as e:
+                if snapshot is None:
+                    raise
+                logger.warning(
+                    f"更新日時を確認できないためスナップショットを使用します: {sheet_name} "
+                    f"(v{snapshot['version']}, {snapshot['fetched_at']}取得): {e}"
+                )
+                return snapshot['values']
+
+            if snapshot is not None and snapshot.get('modified_time') == modified_time:
+                logger.debug(f"スナップショットを使用: {sheet_name} (v{snapshot['version']})")
+                return snapshot['values']
+
+            try:
+                values = self._fetch_values(spreadsheet_id, sheet_name)
+            except gspread.exceptions.WorksheetNotFound:
+                raise
+            except Exception as e:
+                if snapshot is None:
+                    raise
+                logger.warning(
+                    f"シートを取得できないため前回のスナップショットを使用します: {sheet_name} "
+                    f"(v{snapshot['version']}, {snapshot['fetched_at']}取得): {e}"
+                )
+                return snapshot['values']
+
+            version = (snapshot or {}).get('version', 0) + 1
+            self._save_snapshot({
+                'spreadsheet_id': spreadsheet_id,
+                'sheet_name': sheet_name,
+                'modified_time': modified_time,
+                'fetched_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'version': version,
+                'values': values,
+            })
+            logger.info(f"スナップショットを更新しました: {sheet_name} (v{version}, {len(values)}行, modifiedTime={modified_time})")
+            return values
+
+    def get_records(self, spreadsheet_id: str, sheet_name: str) -> List[Dict[str, Any]]:
+        """
+        シートをレコード形式で取得（get_all_records 互換）
+
+        Args:
+            spreadsheet_id: スプレッドシートID
+            sheet_name: シート名
+
+        Returns:
+            List[Dict[str, Any]]: レコードのリスト
+        """
+        return values_to_records(self.get_values(spreadsheet_id, sheet_name))
+
+
+_stores: Dict[str, SheetSnapshotStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_snapshot_store(json_keyfile_path: str) -> SheetSnapshotStore:
+    """
+    認証情報ファイルごとに共有のスナップショットストアを取得
+
+    Args:
+        json_keyfile_path: 認証情報JSONファイルのパス
+
+    Returns:
+        SheetSnapshotStore: スナップショットストア
+    """
+    with _stores_lock:
+        store = _stores.get(json_keyfile_path)
+        if store is None:
+            from src.core.google_api.auth import authenticate_google_api
+            scopes = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+            store = SheetSnapshotStore(authenticate_google_api(json_keyfile_path, scopes))
+            _stores[json_keyfile_path] = store
+        return store
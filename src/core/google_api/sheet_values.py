@@ -0,0 +1,207 @@
+"""
+スプレッドシート書き込み値の変換
+
+SQLの取得結果を cursor.description の型情報に基づいて列単位で変換し、
+書き込みバッチごとに行リストを生成する。
+"""
+import queue
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Iterator, List, Sequence, Tuple
+
+# mysql.connector の FieldType コード
+# 文字列に変換する型（Decimal / date / datetime / timedelta が返る）
+_STRINGIFY_TYPE_CODES = {
+    0,    # DECIMAL
+    246,  # NEWDECIMAL
+    7,    # TIMESTAMP
+    10,   # DATE
+    11,   # TIME
+    12,   # DATETIME
+    14,   # NEWDATE
+}
+# そのまま書き込める型（int / float / str が返る）
+_PASSTHROUGH_TYPE_CODES = {
+    1,    # TINY
+    2,    # SHORT
+    3,    # LONG
+    4,    # FLOAT
+    5,    # DOUBLE
+    8,    # LONGLONG
+    9,    # INT24
+    13,   # YEAR
+    15,   # VARCHAR
+    253,  # VAR_STRING
+    254,  # STRING
+}
+
+_STRINGIFY_TYPES = (Decimal, date, datetime, timedelta)
+
+
+def _stringify_column(values: Sequence[Any]) -> List[Any]:
+    """列全体を文字列に変換（NULLは空文字）"""
+    return ['' if v is None else str(v) for v in values]
+
+
+def _passthrough_column(values: Sequence[Any]) -> List[Any]:
+    """列全体をそのまま使用（NULLは空文字）"""
+    return ['' if v is None else v for v in values]
+
+
+def _inspect_column(values: Sequence[Any]) -> List[Any]:
+    """型情報から判定できない列は値ごとに判定して変換"""
+    return [
+        str(v) if isinstance(v, _STRINGIFY_TYPES) else ('' if v is None else v)
+        for v in values
+    ]
+
+
+def column_converters(description: Sequence[Sequence[Any]]) -> List[Callable[[Sequence[Any]], List[Any]]]:
+    """
+    cursor.description から列ごとの変換関数を決定
+
+    Args:
+        description: cursor.description
+
+    Returns:
+        List[Callable]: 列ごとの変換関数
+    """
+    converters = []
+    for column in description:
+        type_code = column[1] if len(column) > 1 else None
+        if type_code in _STRINGIFY_TYPE_CODES:
+            converters.append(_stringify_column)
+        elif type_code in _PASSTHROUGH_TYPE_CODES:
+            converters.append(_passthrough_column)
+        else:
+            converters.append(_inspect_column)
+    return converters
+
+
+class ColumnarRows:
+    """列単位で保持した書き込みデータ（行リストは必要な範囲だけ生成する）"""
+
+    def __init__(self, columns: List[List[Any]], row_count: int):
+        """
+        列データを初期化
+
+        Args:
+            columns: 列ごとの値リスト
+            row_count: 行数
+        """
+        self.columns = columns
+        self.row_count = row_count
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[Any]], description: Sequence[Sequence[Any]]) -> 'ColumnarRows':
+        """
+        取得結果の行タプルから列データを作成
+
+        Args:
+            rows: cursor.fetchall() / fetchmany() の結果
+            description: cursor.description
+
+        Returns:
+            ColumnarRows: 変換済みの列データ
+        """
+        converters = column_converters(description)
+        if not rows:
+            return cls([[] for _ in converters], 0)
+        columns = [convert(column) for convert, column in zip(converters, zip(*rows))]
+        return cls(columns, len(rows))
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    @property
+    def column_count(self) -> int:
+        return len(self.columns)
+
+    def rows(self, start: int = 0, end: int = None) -> List[List[Any]]:
+        """
+        指定範囲の行リストを生成
+
+        Args:
+            start: 開始位置（0始まり）
+            end: 終了位置（この位置を含まない、Noneの場合は最後まで）
+
+        Returns:
+            List[List[Any]]: 行リスト
+        """
+        end = self.row_count if end is None else min(end, self.row_count)
+        if start >= end:
+            return []
+        return [list(row) for row in zip(*(column[start:end] for column in self.columns))]
+
+    def iter_batches(self, batch_size: int) -> Iterator[Tuple[int, List[List[Any]]]]:
+        """
+        書き込みバッチ単位で行リストを生成
+
+        Args:
+            batch_size: 1バッチあたりの行数
+
+        Yields:
+            Tuple[int, List[List[Any]]]: (開始位置, 行リスト)
+        """
+        for start in range(0, self.row_count, batch_size):
+            yield start, self.rows(start, start + batch_size)
+
+
+_FETCH_DONE = object()
+
+
+def prefetch_converted_batches(cursor, batch_size: int, max_queued: int = 2) -> Iterator[ColumnarRows]:
+    """
+    取得・変換を別スレッドで先行実行し、変換済みバッチを順に返す
+
+    DBからの fetchmany と列変換をバックグラウンドで行い、
+    呼び出し側のアップロード処理と並行させる。キューの上限によりメモリ使用量を抑える。
+
+    Args:
+        cursor: execute済みのカーソル（このスレッドからは使用しないこと）
+        batch_size: fetchmany の取得件数
+        max_queued: 先行取得しておく最大バッチ数
+
+    Yields:
+        ColumnarRows: 変換済みバッチ
+    """
+    description = cursor.description
+    batches: 'queue.Queue[Any]' = queue.Queue(maxsize=max_queued)
+    stop = threading.Event()
+
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            while not stop.is_set():
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if not put(ColumnarRows.from_rows(rows, description)):
+                    return
+        except Exception as e:
+            put(e)
+        finally:
+            put(_FETCH_DONE)
+
+    producer = threading.Thread(target=produce, name='sheet-export-fetch', daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = batches.get()
+            if item is _FETCH_DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join()
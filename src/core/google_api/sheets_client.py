@@ -15,6 +15,8 @@ from tenacity import retry, stop_after_attempt, wait_exponential, before_sleep_l
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
 from src.core.logging.logger import get_logger
+from src.core.google_api.rate_limiter import sheets_read, sheets_write
+from src.core.google_api.sheet_snapshot import get_snapshot_store
 
 
 class GoogleSheetsClient:
@@ -73,8 +75,8 @@ class GoogleSheetsClient:
         """
         try:
             gc = self._get_client()
-            spreadsheet = gc.open_by_key(spreadsheet_id)
-            worksheet = spreadsheet.worksheet(sheet_name)
+            spreadsheet = sheets_read(gc.open_by_key, spreadsheet_id)
+            worksheet = sheets_read(spreadsheet.worksheet, sheet_name)
             
             self.logger.info(f"ワークシート取得完了: {sheet_name}")
             return worksheet
@@ -106,8 +108,8 @@ class GoogleSheetsClient:
             List[Tuple]: SQLファイル情報のタプルリスト
         """
         try:
-            worksheet = self.get_worksheet(spreadsheet_id, sheet_name)
-            records = worksheet.get_all_records()
+            # ローカルスナップショット経由で取得（シートが更新されている場合のみ再取得）
+            records = get_snapshot_store(self.credentials_file).get_records(spreadsheet_id, sheet_name)
             
             self.logger.info(f"シート読み込み完了: {sheet_name}, {len(records)} 件")
             
@@ -188,12 +190,12 @@ class GoogleSheetsClient:
             worksheet = self.get_worksheet(spreadsheet_id, sheet_name)
             
             # シートをクリア
-            worksheet.clear()
+            sheets_write(worksheet.clear)
             
             # データを書き込み
             if data:
                 # バッチアップデートで効率的に書き込み
-                worksheet.update(f'A1:{self._get_range_notation(len(data), len(data[0]))}', data)
+                sheets_write(worksheet.update, f'A1:{self._get_range_notation(len(data), len(data[0]))}', data)
                 
                 self.logger.info(f"データ書き込み完了: {sheet_name}, {len(data)} 行")
                 return True
@@ -282,7 +284,7 @@ class GoogleSheetsClient:
                     self.logger.warning(f"想定外の型が検出: 項目{idx+1}: {item_type} = {item}")
             
             # ログを追加
-            worksheet.append_row(row_data)
+            sheets_write(worksheet.append_row, row_data)
             
             self.logger.info(f"ログエントリ書き込み完了: {csv_file_name}")
             return True
@@ -302,7 +304,7 @@ class GoogleSheetsClient:
             Dict[str, str]: データ型マッピング
         """
         try:
-            headers = worksheet.row_values(1)
+            headers = sheets_read(worksheet.row_values, 1)
             data_types = {}
             
             db_item_col = None
@@ -316,10 +318,10 @@ class GoogleSheetsClient:
                     data_type_col = i
             
             if db_item_col is not None and data_type_col is not None:
-                last_row = len(worksheet.col_values(db_item_col + 1))
+                last_row = len(sheets_read(worksheet.col_values, db_item_col + 1))
                 
-                db_item_range = worksheet.range(2, db_item_col + 1, last_row, db_item_col + 1)
-                data_type_range = worksheet.range(2, data_type_col + 1, last_row, data_type_col + 1)
+                db_item_range = sheets_read(worksheet.range, 2, db_item_col + 1, last_row, db_item_col + 1)
+                data_type_range = sheets_read(worksheet.range, 2, data_type_col + 1, last_row, data_type_col + 1)
                 
                 db_items = [cell.value for cell in db_item_range]
                 data_types_list = [cell.value for cell in data_type_range]
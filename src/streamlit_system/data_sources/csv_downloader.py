@@ -13,8 +13,8 @@ from typing import Optional, Dict, Any
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
 from src.core.config.settings import AppConfig
-from src.core.database.connection import DatabaseConnection
-from src.core.database.ssh_tunnel import SSHTunnel
+from src.core.database.connection_manager import get_shared_connection_manager
+from src.core.database.fetch_backend import read_sql_frame, iter_sql_frames
 from src.core.logging.logger import get_logger
 
 
@@ -125,41 +125,7 @@ class CSVDownloader:
         Returns:
             pd.DataFrame: 実行結果（失敗時はNone）
         """
-        ssh_tunnel = None
-        db_connection = None
-        
         try:
-            # SSH接続を確立
-            ssh_config = {
-                'host': self.config.ssh.host,
-                'user': self.config.ssh.user,
-                'ssh_key_path': self.config.ssh.ssh_key_path,
-                'db_host': self.config.database.host,
-                'db_port': self.config.database.port,
-                'local_port': self.config.ssh.local_port
-            }
-            
-            ssh_tunnel = SSHTunnel(ssh_config)
-            if not ssh_tunnel.start():
-                self.logger.error("SSH接続の確立に失敗")
-                return None
-            
-            # データベース接続を確立
-            db_config = {
-                'host': self.config.database.host,
-                'port': self.config.database.port,
-                'user': self.config.database.user,
-                'password': self.config.database.password,
-                'database': self.config.database.database
-            }
-            
-            db_connection = DatabaseConnection(db_config, ssh_tunnel.get_local_bind_port())
-            conn = db_connection.create_connection()
-            
-            if not conn:
-                self.logger.error("データベース接続の確立に失敗")
-                return None
-            
             # SQLクエリを読み込み（将来的にはGoogle Driveから）
             sql_query = self._load_sql_query(sql_file)
             if not sql_query:
@@ -169,8 +135,9 @@ class CSVDownloader:
             if conditions:
                 sql_query = self._add_conditions_to_sql(sql_query, conditions)
             
-            # SQLを実行
-            data = pd.read_sql(sql_query, conn)
+            # 共有プールの接続でSQLを実行
+            with get_shared_connection_manager(self.config).connection() as conn:
+                data = read_sql_frame(conn, sql_query, self.config.tuning.fetch_backend)
             
             self.logger.info(f"SQL実行完了: {sql_file}, {len(data)} 行取得")
             return data
@@ -178,17 +145,6 @@ class CSVDownloader:
         except Exception as e:
             self.logger.error(f"SQL実行エラー: {sql_file}, {e}")
             return None
-            
-        finally:
-            # リソースをクリーンアップ
-            if db_connection and hasattr(db_connection, '_current_connection'):
-                try:
-                    db_connection._current_connection.close()
-                except:
-                    pass
-            
-            if ssh_tunnel:
-                ssh_tunnel.stop()
     
     def _execute_sql_file_chunked(
         self,
@@ -207,38 +163,7 @@ class CSVDownloader:
         Yields:
             pd.DataFrame: チャンクデータ
         """
-        ssh_tunnel = None
-        db_connection = None
-        
         try:
-            # 接続を確立（前回と同様）
-            ssh_config = {
-                'host': self.config.ssh.host,
-                'user': self.config.ssh.user,
-                'ssh_key_path': self.config.ssh.ssh_key_path,
-                'db_host': self.config.database.host,
-                'db_port': self.config.database.port,
-                'local_port': self.config.ssh.local_port
-            }
-            
-            ssh_tunnel = SSHTunnel(ssh_config)
-            if not ssh_tunnel.start():
-                return
-            
-            db_config = {
-                'host': self.config.database.host,
-                'port': self.config.database.port,
-                'user': self.config.database.user,
-                'password': self.config.database.password,
-                'database': self.config.database.database
-            }
-            
-            db_connection = DatabaseConnection(db_config, ssh_tunnel.get_local_bind_port())
-            conn = db_connection.create_connection()
-            
-            if not conn:
-                return
-            
             # SQLクエリを読み込み
             sql_query = self._load_sql_query(sql_file)
             if not sql_query:
@@ -248,23 +173,13 @@ class CSVDownloader:
             if conditions:
                 sql_query = self._add_conditions_to_sql(sql_query, conditions)
             
-            # チャンク単位で実行
-            for chunk in pd.read_sql(sql_query, conn, chunksize=chunk_size):
-                yield chunk
+            # チャンク単位で実行（全チャンクを読み終えるまで接続を保持）
+            with get_shared_connection_manager(self.config).connection() as conn:
+                for chunk in iter_sql_frames(conn, sql_query, chunk_size, self.config.tuning.fetch_backend):
+                    yield chunk
                 
         except Exception as e:
             self.logger.error(f"チャンク形式SQL実行エラー: {sql_file}, {e}")
-            
-        finally:
-            # リソースをクリーンアップ
-            if db_connection and hasattr(db_connection, '_current_connection'):
-                try:
-                    db_connection._current_connection.close()
-                except:
-                    pass
-            
-            if ssh_tunnel:
-                ssh_tunnel.stop()
     
     def _load_sql_query(self, sql_file: str) -> Optional[str]:
         """
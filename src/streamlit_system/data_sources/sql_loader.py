@@ -12,8 +12,8 @@ from typing import List, Optional, Dict, Any
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
 from src.core.config.settings import AppConfig
-from src.core.database.connection import DatabaseConnection
-from src.core.database.ssh_tunnel import SSHTunnel
+from src.core.database.connection_manager import get_shared_connection_manager
+from src.core.database.fetch_backend import read_sql_frame
 from src.core.logging.logger import get_logger
 
 
@@ -77,17 +77,9 @@ class SQLLoader:
         Returns:
             pd.DataFrame: 実行結果（失敗時はNone）
         """
-        ssh_tunnel = None
-        db_connection = None
-        
         try:
             self.logger.info(f"SQL実行開始: {sql_file}")
             
-            # 接続を確立
-            ssh_tunnel, db_connection, conn = self._establish_connections()
-            if not conn:
-                return None
-            
             # SQLクエリを読み込み
             sql_query = self._load_sql_query(sql_file)
             if not sql_query:
@@ -104,8 +96,9 @@ class SQLLoader:
                 else:
                     sql_query = f"{sql_query} LIMIT {limit}"
             
-            # SQLを実行
-            data = pd.read_sql(sql_query, conn)
+            # 共有プールの接続でSQLを実行
+            with self._connections().connection() as conn:
+                data = read_sql_frame(conn, sql_query, self.config.tuning.fetch_backend)
             
             self.logger.info(f"SQL実行完了: {sql_file}, {len(data)} 行取得")
             return data
@@ -113,9 +106,6 @@ class SQLLoader:
         except Exception as e:
             self.logger.error(f"SQL実行エラー: {sql_file}, {e}")
             return None
-            
-        finally:
-            self._cleanup_connections(db_connection, ssh_tunnel)
 
     def execute_sql_file_count(
         self,
@@ -127,26 +117,20 @@ class SQLLoader:
         
         SELECT COUNT(*) FROM (<base_sql_with_conditions>) AS t 形式で集計
         """
-        ssh_tunnel = None
-        db_connection = None
         try:
             self.logger.info(f"件数取得開始: {sql_file}")
-            ssh_tunnel, db_connection, conn = self._establish_connections()
-            if not conn:
-                return None
             base_sql = self._load_sql_query(sql_file)
             if not base_sql:
                 return None
             if conditions:
                 base_sql = self._add_conditions_to_sql(base_sql, conditions)
             count_sql = f"SELECT COUNT(*) AS cnt FROM ({base_sql}) AS t"
-            df = pd.read_sql(count_sql, conn)
+            with self._connections().connection() as conn:
+                df = read_sql_frame(conn, count_sql, self.config.tuning.fetch_backend)
             return int(df.iloc[0]['cnt']) if not df.empty else 0
         except Exception as e:
             self.logger.error(f"件数取得エラー: {e}")
             return None
-        finally:
-            self._cleanup_connections(db_connection, ssh_tunnel)
     
     def execute_sql_query(
         self,
@@ -163,23 +147,16 @@ class SQLLoader:
         Returns:
             pd.DataFrame: 実行結果（失敗時はNone）
         """
-        ssh_tunnel = None
-        db_connection = None
-        
         try:
             self.logger.info("SQLクエリ実行開始")
             
-            # 接続を確立
-            ssh_tunnel, db_connection, conn = self._establish_connections()
-            if not conn:
-                return None
-            
             # 行数制限を追加
             if limit and limit > 0:
                 sql_query = f"{sql_query} LIMIT {limit}"
             
-            # SQLを実行
-            data = pd.read_sql(sql_query, conn)
+            # 共有プールの接続でSQLを実行
+            with self._connections().connection() as conn:
+                data = read_sql_frame(conn, sql_query, self.config.tuning.fetch_backend)
             
             self.logger.info(f"SQLクエリ実行完了: {len(data)} 行取得")
             return data
@@ -187,9 +164,6 @@ class SQLLoader:
         except Exception as e:
             self.logger.error(f"SQLクエリ実行エラー: {e}")
             return None
-            
-        finally:
-            self._cleanup_connections(db_connection, ssh_tunnel)
     
     def get_table_schema(self, table_name: str) -> Optional[pd.DataFrame]:
         """
@@ -323,69 +297,11 @@ class SQLLoader:
             self.logger.error(f"SQL条件追加エラー: {e}")
             return sql_query
     
-    def _establish_connections(self):
+    def _connections(self):
         """
-        SSH接続とデータベース接続を確立
+        セッション間で共有するSSHトンネル・コネクションプールを取得
         
         Returns:
-            tuple: (ssh_tunnel, db_connection, mysql_connection)
+            SharedConnectionManager: 共有接続マネージャー
         """
-        try:
-            # SSH接続を確立
-            ssh_config = {
-                'host': self.config.ssh.host,
-                'user': self.config.ssh.user,
-                'ssh_key_path': self.config.ssh.ssh_key_path,
-                'db_host': self.config.database.host,
-                'db_port': self.config.database.port,
-                'local_port': self.config.ssh.local_port
-            }
-            
-            ssh_tunnel = SSHTunnel(ssh_config)
-            if not ssh_tunnel.start():
-                self.logger.error("SSH接続の確立に失敗")
-                return None, None, None
-            
-            # データベース接続を確立
-            db_config = {
-                'host': self.config.database.host,
-                'port': self.config.database.port,
-                'user': self.config.database.user,
-                'password': self.config.database.password,
-                'database': self.config.database.database
-            }
-            
-            db_connection = DatabaseConnection(db_config, ssh_tunnel.get_local_bind_port())
-            conn = db_connection.create_connection()
-            
-            if not conn:
-                self.logger.error("データベース接続の確立に失敗")
-                ssh_tunnel.stop()
-                return None, None, None
-            
-            return ssh_tunnel, db_connection, conn
-            
-        except Exception as e:
-            self.logger.error(f"接続確立エラー: {e}")
-            return None, None, None
-    
-    def _cleanup_connections(self, db_connection, ssh_tunnel):
-        """
-        接続をクリーンアップ
-        
-        Args:
-            db_connection: データベース接続オブジェクト
-            ssh_tunnel: SSHトンネルオブジェクト
-        """
-        try:
-            if db_connection and hasattr(db_connection, '_current_connection'):
-                try:
-                    db_connection._current_connection.close()
-                except:
-                    pass
-            
-            if ssh_tunnel:
-                ssh_tunnel.stop()
-                
-        except Exception as e:
-            self.logger.error(f"接続クリーンアップエラー: {e}")
\ No newline at end of file
+        return get_shared_connection_manager(self.config)
@@ -5,18 +5,26 @@ Streamlit 表示ユーティリティモジュール
 """
 import streamlit as st
 import pandas as pd
-from typing import Tuple, Optional, Any, Dict
+from typing import Tuple, Optional, Any, Dict, Union
 import numpy as np
 import json
+import os
+import time
+import uuid
+from functools import partial
 from src.core.logging.logger import get_logger
 from src.streamlit_system.data_sources.sql_loader import SQLLoader
+from src.utils.csv_export import DEFAULT_CHUNK_ROWS, csv_download_key, get_csv_download_store, iter_frame_chunks
+from src.utils.filtered_rows import FilteredRows, source_signature
+from src.utils.dataset_watch import get_dataset_watcher
 
 logger = get_logger(__name__)
+
+# 「DBから最新データを取得」の取得結果・CSVを共有する秒数（DBのデータはParquetファイルの版とは無関係に更新される）
+LIVE_DB_CACHE_SECONDS = 60
+
 def _clear_prepared_csv_artifacts() -> None:
-    keys_to_clear = [
-        '__page_csv_ready__', '__page_csv_rows__', '__page_csv_filename__',
-        '__full_csv_ready__', '__full_csv_rows__', '__full_csv_filename__'
-    ]
+    keys_to_clear = ['__page_csv_rows__', '__full_csv_rows__']
     for k in keys_to_clear:
         if k in st.session_state:
             del st.session_state[k]
@@ -102,14 +110,69 @@ def truncate_text(text: str, max_length: int = 35) -> str:
     return str(text)
 
 
-def display_data(df: pd.DataFrame, page_size: int, input_fields_types: dict) -> None:
+def _csv_download_key(df: Union[pd.DataFrame, FilteredRows], parquet_file_path: Optional[str]) -> Optional[str]:
+    """
+    同じデータのCSVを全セッションで共有するためのキー（テーブル, 絞り込み条件, ファイルの版）
+    
+    Args:
+        df (Union[pd.DataFrame, FilteredRows]): ダウンロード対象
+        parquet_file_path (Optional[str]): df がParquetファイルの全件の場合のファイルパス
+        
+    Returns:
+        Optional[str]: キー（共有できない場合はNone）
+    """
+    try:
+        if isinstance(df, FilteredRows):
+            filters_signature = json.dumps(st.session_state.get('input_fields', {}), ensure_ascii=False, sort_keys=True, default=str)
+            return csv_download_key('filtered', os.path.abspath(df.parquet_file_path), filters_signature, df.source)
+        if parquet_file_path and os.path.exists(parquet_file_path):
+            return csv_download_key('all', os.path.abspath(parquet_file_path), source_signature(parquet_file_path))
+    except OSError as e:
+        logger.warning(f"CSVの共有キーを作成できません: {e}")
+    return None
+
+
+def _csv_chunks(df: Union[pd.DataFrame, FilteredRows], input_fields_types: dict):
+    """
+    CSV用に変換した DataFrame を分割して返す（絞り込み結果は分割ごとに読み込む）
+    
+    Args:
+        df (Union[pd.DataFrame, FilteredRows]): ダウンロード対象
+        input_fields_types (dict): フィールドタイプ辞書
+        
+    Yields:
+        pd.DataFrame: CSV用に変換した DataFrame
+    """
+    from src.utils.data_processing import prepare_csv_data
+    if isinstance(df, FilteredRows):
+        frames = (df.take(start, start + DEFAULT_CHUNK_ROWS) for start in range(0, max(len(df), 1), DEFAULT_CHUNK_ROWS))
+    else:
+        frames = iter_frame_chunks(df)
+    for frame in frames:
+        yield prepare_csv_data(frame, input_fields_types).astype(str)
+
+
+def _csv_download_button(csv_path: str, label: str, file_name: str, key: str) -> bool:
+    """
+    書き出したCSVファイルをダウンロードボタンで渡す
+
+    ボタンを表示している間はCSVの内容がセッションのメモリに保持されるため、準備した実行でのみ呼び出す
+    （以降の再実行では表示せず、再度準備した場合は書き出し済みのファイルを使う）。
+    """
+    with open(csv_path, 'rb') as csv_file:
+        return st.download_button(label=label, data=csv_file, file_name=file_name, mime="text/csv", key=key)
+
+
+def display_data(df: Union[pd.DataFrame, FilteredRows], page_size: int, input_fields_types: dict,
+                 parquet_file_path: Optional[str] = None) -> None:
     """
     データを表示（ページネーション対応・高速化最適化）
     
     Args:
-        df (pd.DataFrame): 表示対象DataFrame
+        df (Union[pd.DataFrame, FilteredRows]): 表示対象DataFrame、または絞り込み結果（表示するページだけを読み込む）
         page_size (int): ページサイズ
         input_fields_types (dict): フィールドタイプ辞書
+        parquet_file_path (Optional[str]): df がParquetファイルの全件の場合のファイルパス（CSVを他のセッションと共有する）
     """
     import time
     start_time = time.time()
@@ -166,7 +229,11 @@ def display_data(df: pd.DataFrame, page_size: int, input_fields_types: dict) ->
             st.session_state['options_dict'] = preserved_options_dict
             st.session_state['limit'] = preserved_limit
             st.session_state['current_page'] = 1
-            st.cache_data.clear()
+            # 全ユーザーのキャッシュは消さず、監視で検知できなかった更新だけを反映する（ファイルが変わっていればキーが変わる）
+            sql_file = st.session_state.get('selected_sql_file')
+            reload_path = parquet_file_path or (_snapshot_parquet_path(sql_file) if sql_file else None)
+            if reload_path and get_dataset_watcher().refresh(reload_path):
+                logger.info(f"リロードでParquetファイルの更新を反映しました: {reload_path}")
             logger.info("リセットボタン押下完了 - データのみクリア、絞り込み条件は保持")
             st.rerun()
 
@@ -185,15 +252,15 @@ def display_data(df: pd.DataFrame, page_size: int, input_fields_types: dict) ->
                     st.session_state['filter_expanded'] = False
                     if pyperclip is None:
                         raise RuntimeError("pyperclip が見つかりません。requirements.txt を確認してください。")
-                    csv_data = get_paginated_df(df, st.session_state.get('limit', page_size)).to_csv(index=False, sep='\t')
+                    page_df = get_paginated_df(df, st.session_state.get('limit', page_size))
+                    csv_data = page_df.to_csv(index=False, sep='\t')
                     pyperclip.copy(csv_data)
-                    st.toast(f"📋 {len(get_paginated_df(df, st.session_state.get('limit', page_size)))}行をコピーしました", icon="✅")
+                    st.toast(f"📋 {len(page_df)}行をコピーしました", icon="✅")
                 except Exception as e:
                     logger.error(f"コピー失敗: {e}")
                     st.error(f"コピーに失敗しました: {e}")
         with col_dl:
-            download_df = df
-            display_csv_download_button_isolated(download_df, input_fields_types)
+            display_csv_download_button_isolated(df, input_fields_types, _csv_download_key(df, parquet_file_path))
     
     # メタ情報（サイズ/時間）は非表示に変更（ユーザー要望）
     
@@ -253,7 +320,7 @@ def display_data(df: pd.DataFrame, page_size: int, input_fields_types: dict) ->
     
     # 表示時間は非表示に変更（ユーザー要望）
     
-    logger.info(f"データ表示完了: Full DataFrame shape: {df.shape}, Page size: {page_size}, Render time: {render_time:.3f}s")
+    logger.info(f"データ表示完了: Total rows: {total_rows}, Page size: {page_size}, Render time: {render_time:.3f}s")
 
 
 def display_row_selector() -> None:
@@ -289,23 +356,29 @@ def display_row_selector() -> None:
             logger.info(f"表示件数を{current_limit}から{selected_limit}に変更、ページを1にリセット")
 
 
-def get_paginated_df(df: pd.DataFrame, page_size: int) -> pd.DataFrame:
+def get_paginated_df(df: Union[pd.DataFrame, FilteredRows], page_size: int) -> pd.DataFrame:
     """
     ページネーション用にDataFrameを切り詰め
     
     Args:
-        df (pd.DataFrame): 対象DataFrame
+        df (Union[pd.DataFrame, FilteredRows]): 対象DataFrame、または絞り込み結果
         page_size (int): ページサイズ
         
     Returns:
         pd.DataFrame: ページネーション済みDataFrame
     """
-    # 大規模データでの全件ソートは高コストのため回避
-    if not df.empty and len(df) <= 5000:
+    current_page = st.session_state.get('current_page', 1)
+    if isinstance(df, FilteredRows):
+        # 絞り込み結果は表示順に並んでいるため、ページの行だけを読み込む
+        result_df = df.page(current_page, page_size)
+        logger.info(f"get_paginated_df: page={current_page}, page_size={page_size}, total={len(df)}, result shape: {result_df.shape}")
+        return result_df
+
+    # 大規模データでの全件ソートは高コストのため回避（表示順に並んでいる場合は並べ替えない）
+    if not df.empty and len(df) <= 5000 and not df.index.is_monotonic_decreasing:
         df = df.sort_index(ascending=False)
         logger.debug("ページネーション前に降順ソートを適用（<=5000件）")
     
-    current_page = st.session_state.get('current_page', 1)
     start_index = (current_page - 1) * page_size
     end_index = start_index + page_size
     
@@ -544,10 +617,17 @@ def display_table_action_buttons(df_view: pd.DataFrame, input_fields_types: dict
         display_csv_download_button_isolated(target_df, input_fields_types)
 
         # 全件ダウンロード（同条件・LIMIT/OFFSETなし）
+        # 通常は最終データ取得時点のParquetから作成し、DBへの再クエリは明示的に選択した場合のみ行う
         sql_file = st.session_state.get('selected_sql_file')
         conditions: Dict[str, Any] = st.session_state.get('input_fields', {})
 
         if sql_file:
+            use_live_db = st.checkbox(
+                "DBから最新データを取得",
+                value=False,
+                help="最終データ取得日時以降の更新が必要な場合のみ選択してください（DBに接続して再取得するため時間がかかります）",
+                key="full_csv_live_db"
+            )
             prepare_clicked = st.button(
                 "📥 全件ダウンロードの準備",
                 help="同じ条件で全レコードを取得してCSVを準備します（初回のみ時間がかかる場合があります）",
@@ -556,33 +636,75 @@ def display_table_action_buttons(df_view: pd.DataFrame, input_fields_types: dict
 
             if prepare_clicked:
                 try:
-                    full_df_cached = fetch_full_df_cached(sql_file, conditions)
-                    st.session_state['__full_csv_ready__'] = full_df_cached.to_csv(index=False)
-                    st.session_state['__full_csv_rows__'] = len(full_df_cached)
-                    st.session_state['__full_csv_filename__'] = f"data_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}_all.csv"
-                    st.toast(f"全件データを準備しました（{len(full_df_cached)}行）", icon="✅")
+                    if use_live_db:
+                        # DBの取得結果は短時間だけ共有し、同じ時間枠の同条件のCSVは全セッションで共有する
+                        live_bucket = int(time.time() // LIVE_DB_CACHE_SECONDS)
+                        key = csv_download_key('db', sql_file, conditions, live_bucket)
+
+                        def full_chunks():
+                            # 書き出し済みのCSVがあればDBからは取得しない
+                            yield from iter_frame_chunks(fetch_full_df_cached(sql_file, conditions, live_bucket))
+                    else:
+                        parquet_file_path = _snapshot_parquet_path(sql_file)
+                        if not os.path.exists(parquet_file_path):
+                            raise FileNotFoundError(f"Parquetファイルが見つかりません: {parquet_file_path}")
+                        key = csv_download_key(
+                            'snapshot', os.path.abspath(parquet_file_path),
+                            json.dumps(conditions, ensure_ascii=False, sort_keys=True, default=str),
+                            source_signature(parquet_file_path)
+                        )
+                        full_chunks = partial(_snapshot_csv_chunks, parquet_file_path, conditions, input_fields_types)
+
+                    csv_path, rows = get_csv_download_store().write(key, full_chunks())
+                    st.session_state['__full_csv_rows__'] = rows
+                    st.toast(f"全件データを準備しました（{rows}行）", icon="✅")
+                    _csv_download_button(
+                        csv_path,
+                        label="📥 全件ダウンロード",
+                        file_name=f"data_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}_all.csv",
+                        key="csv_download_all"
+                    )
+                except FileNotFoundError as e:
+                    logger.error(f"全件CSV準備エラー: {e}")
+                    st.error("データファイルが見つかりません。「DBから最新データを取得」を選択して再度お試しください")
                 except Exception as e:
                     logger.error(f"全件CSV準備エラー: {e}")
                     st.error("全件CSVの準備に失敗しました")
 
-        if '__full_csv_ready__' in st.session_state:
-            st.download_button(
-                label="📥 全件ダウンロード",
-                data=st.session_state['__full_csv_ready__'].encode('cp932', errors='replace'),
-                file_name=st.session_state.get('__full_csv_filename__', f"data_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}_all.csv"),
-                mime="text/csv",
-                key="csv_download_all"
-            )
-
             # 件数情報を補足表示
             rows = st.session_state.get('__full_csv_rows__')
             if rows is not None:
-                st.caption(f"全件CSV: {rows:,} 行")
+                note = "" if prepare_clicked else "（再度ダウンロードする場合は準備ボタンを押してください）"
+                st.caption(f"全件CSV: {rows:,} 行{note}")
 
 
-@st.cache_data(ttl=600, max_entries=64)
-def fetch_full_df_cached(sql_file: str, conditions: Dict[str, Any]) -> pd.DataFrame:
-    """同条件の全件データをDBから取得（キャッシュ付）"""
+def _snapshot_parquet_path(sql_file: str) -> str:
+    """SQLファイルに対応するParquetファイル（最終データ取得時点のスナップショット）のパス"""
+    try:
+        from src.core.config.settings import AppConfig
+        csv_base_path = AppConfig.from_config_file('config/settings.ini').paths.csv_base_path
+    except ImportError:
+        # フォールバック：旧構造
+        import configparser
+        config = configparser.ConfigParser()
+        config.read('config/settings.ini', encoding='utf-8')
+        csv_base_path = config['Paths']['csv_base_path']
+    return os.path.join(os.path.normpath(csv_base_path), f"{os.path.splitext(sql_file)[0]}.parquet")
+
+
+def _snapshot_csv_chunks(parquet_file_path: str, conditions: Dict[str, Any], input_fields_types: dict):
+    """Parquetファイルを画面と同じ条件で絞り込み、分割ごとにCSV用に変換して返す"""
+    # 画面の絞り込みと同じ処理（FA・プルダウン・チェックボックス・日付等）を使い、表示中の結果と一致させる
+    from core.streamlit.subcode_streamlit_loader import filter_parquet_rows
+    rows = filter_parquet_rows(parquet_file_path, conditions, input_fields_types)
+    if rows is None:
+        raise RuntimeError(f"Parquetファイルの絞り込みに失敗しました: {parquet_file_path}")
+    yield from _csv_chunks(rows, input_fields_types)
+
+
+@st.cache_data(ttl=LIVE_DB_CACHE_SECONDS, max_entries=64)
+def fetch_full_df_cached(sql_file: str, conditions: Dict[str, Any], live_bucket: int) -> pd.DataFrame:
+    """同条件の全件データをDBから取得（LIVE_DB_CACHE_SECONDS の時間枠ごとにキャッシュ、「DBから最新データを取得」を選択した場合のみ使用）"""
     loader = SQLLoader()
     df_full = loader.execute_sql_file(sql_file, conditions=conditions, limit=None)
     if df_full is None:
@@ -591,13 +713,17 @@ def fetch_full_df_cached(sql_file: str, conditions: Dict[str, Any]) -> pd.DataFr
 
 
 
-def display_csv_download_button_isolated(df: pd.DataFrame, input_fields_types: dict) -> None:
+def display_csv_download_button_isolated(df: Union[pd.DataFrame, FilteredRows], input_fields_types: dict,
+                                         download_key: Optional[str] = None) -> None:
     """
     CSVダウンロードボタンを表示（分離版・セッション状態保護）
     
+    CSVは一時ファイルに分割して書き出し、セッションにはファイルパスだけを保持する。
+    
     Args:
-        df (pd.DataFrame): ダウンロード対象DataFrame
+        df (Union[pd.DataFrame, FilteredRows]): ダウンロード対象DataFrame、または絞り込み結果（書き出し時に分割して読み込む）
         input_fields_types (dict): フィールドタイプ辞書
+        download_key (Optional[str]): 同じデータのCSVを他のセッションと共有するキー（Noneの場合は共有しない）
     """
     if df.empty:
         return
@@ -610,40 +736,25 @@ def display_csv_download_button_isolated(df: pd.DataFrame, input_fields_types: d
     
     # 二段階方式：準備→ダウンロード（レンダリング時の重処理を回避）
     try:
-        ready_key = '__page_csv_ready__'
         rows_key = '__page_csv_rows__'
-        fname_key = '__page_csv_filename__'
-
-        if st.button("📄 CSV準備", key="prepare_page_csv"):
-            from src.utils.data_processing import prepare_csv_data
-            csv_df = prepare_csv_data(df, input_fields_types)
-            logger.debug(f"CSV変換前データ型: {csv_df.dtypes.to_dict()}")
-            csv_df = csv_df.astype(str)
-            st.session_state[ready_key] = csv_df.to_csv(index=False)
-            st.session_state[rows_key] = len(csv_df)
-            st.session_state[fname_key] = f"data_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            st.toast(f"このページのCSVを準備しました（{len(csv_df)}行）", icon="✅")
-
-        if ready_key in st.session_state:
-            download_clicked = st.download_button(
+
+        prepare_clicked = st.button("📄 CSV準備", key="prepare_page_csv")
+        if prepare_clicked:
+            key = download_key or csv_download_key('session', uuid.uuid4().hex)
+            csv_path, rows = get_csv_download_store().write(key, _csv_chunks(df, input_fields_types))
+            st.session_state[rows_key] = rows
+            st.toast(f"このページのCSVを準備しました（{rows}行）", icon="✅")
+            _csv_download_button(
+                csv_path,
                 label="📥 ダウンロード",
-                data=st.session_state[ready_key].encode('cp932', errors='replace'),
-                file_name=st.session_state.get(fname_key, f"data_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv"),
-                mime="text/csv",
+                file_name=f"data_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 key="csv_download_isolated"
             )
 
-            if download_clicked:
-                logger.info(f"CSVダウンロード実行 - 条件保護中 (limit={preserved_limit})")
-                st.session_state['limit'] = preserved_limit
-                st.session_state['input_fields'] = preserved_input_fields
-                st.session_state['input_fields_types'] = preserved_input_fields_types
-                st.session_state['options_dict'] = preserved_options_dict
-                logger.info("CSVダウンロード完了 - セッション状態復元済み")
-
-            rows = st.session_state.get(rows_key)
-            if rows is not None:
-                st.caption(f"このページCSV: {rows:,} 行")
+        rows = st.session_state.get(rows_key)
+        if rows is not None:
+            note = "" if prepare_clicked else "（再度ダウンロードする場合は「CSV準備」を押してください）"
+            st.caption(f"このページCSV: {rows:,} 行{note}")
 
         logger.debug("CSVダウンロードUI表示完了")
 
@@ -655,7 +766,7 @@ def display_csv_download_button_isolated(df: pd.DataFrame, input_fields_types: d
         # フォールバック: 基本的なCSVダウンロード
         try:
             logger.info("フォールバック: 基本的なCSVダウンロードを試行")
-            simple_csv = df.copy()
+            simple_csv = df.to_frame() if isinstance(df, FilteredRows) else df.copy()
             # すべての値を文字列に変換
             simple_csv = simple_csv.astype(str, errors='ignore')
             simple_csv_string = simple_csv.to_csv(index=False)
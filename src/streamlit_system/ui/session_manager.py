@@ -4,8 +4,9 @@ Streamlit セッション管理モジュール
 セッション状態の初期化と管理を担当
 """
 import streamlit as st
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from src.core.logging.logger import get_logger
+from src.utils.dataset_metadata import column_values
 
 logger = get_logger(__name__)
 
@@ -37,12 +38,13 @@ def initialize_session_state() -> None:
     logger.debug("セッション状態初期化完了")
 
 
-def create_dynamic_input_fields(data: List[Dict]) -> Tuple[Dict[str, Any], Dict[str, str], Dict[str, List]]:
+def create_dynamic_input_fields(data: List[Dict], metadata: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Dict[str, str], Dict[str, List]]:
     """
     動的入力フィールドを作成
     
     Args:
         data (List[Dict]): スプレッドシートデータ
+        metadata (Optional[Dict[str, Any]]): Parquetファイルの集計情報（選択肢を全行の走査なしで取得する）
         
     Returns:
         Tuple[Dict, Dict, Dict]: (入力フィールド, フィールドタイプ, オプション辞書)
@@ -73,7 +75,9 @@ def create_dynamic_input_fields(data: List[Dict]) -> Tuple[Dict[str, Any], Dict[
         
         # セレクトボックス用のオプションを生成
         if field_type == 'select':
-            unique_values = list(set([row.get(field_name, '') for row in data if row.get(field_name)]))
+            unique_values = column_values(metadata, field_name)
+            if unique_values is None:
+                unique_values = list(set([row.get(field_name, '') for row in data if row.get(field_name)]))
             options_dict[field_name] = unique_values
         
         # 初期値設定
@@ -0,0 +1,256 @@
+"""
+プロセス共有のArrowテーブルキャッシュ
+
+Streamlitの全セッションで同じParquetファイルの読み込み結果（pa.Table）を共有する。
+pa.Table は変更不可のため、参照をそのまま返しても他のセッションに影響しない（コピーなし）。
+表示用に変換した DataFrame も同じエントリーに保持し、全セッションで同じ参照を返す。
+キーは (パス, 更新日時, サイズ) とし、ファイルが更新されると次回の参照時に読み直す。
+合計サイズが上限を超えた場合は最も長く使われていないファイルから破棄する。
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.core.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+CacheKey = Tuple[str, int, int]
+
+
+def _normalize_path(parquet_file_path: str) -> str:
+    return os.path.normcase(os.path.abspath(parquet_file_path))
+
+
+def _cache_key(parquet_file_path: str) -> CacheKey:
+    stat = os.stat(parquet_file_path)
+    return _normalize_path(parquet_file_path), stat.st_mtime_ns, stat.st_size
+
+
+class _Entry:
+    """1ファイル分のキャッシュ（テーブルと変換済み DataFrame）"""
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+        self.frames: Dict[str, pd.DataFrame] = {}
+        self.nbytes = table.nbytes
+
+
+class ArrowTableCache:
+    """Parquetファイルの読み込み結果を共有するLRUキャッシュ"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        キャッシュを初期化
+
+        Args:
+            max_bytes: 保持するテーブル・DataFrame の合計サイズの上限（バイト）
+        """
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[CacheKey, _Entry]' = OrderedDict()
+        self._resident_bytes = 0
+        self._lock = threading.Lock()
+        # 同じファイルを複数セッションが同時に開いた場合も読み込み・変換は1回にする
+        self._loading: Dict[str, threading.Lock] = {}
+        self._hits = 0
+        self._misses = 0
+        # 読み込み済みかの確認（peek）はヒット率に含めず別に数える
+        self._peeks = 0
+        self._evictions = 0
+
+    def _discard(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key)
+        self._resident_bytes -= entry.nbytes
+
+    def _evict_for(self, nbytes: int, keep: Optional[CacheKey] = None) -> None:
+        """nbytes を追加できるまで、最も長く使われていないエントリーを破棄"""
+        for key in list(self._entries):
+            if self._resident_bytes + nbytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._discard(key)
+            self._evictions += 1
+            logger.info(f"キャッシュから破棄しました: {key[0]}")
+
+    def _lookup(self, key: CacheKey) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _loading_lock(self, key: CacheKey) -> threading.Lock:
+        with self._lock:
+            return self._loading.setdefault(key[0], threading.Lock())
+
+    def _load(self, parquet_file_path: str, key: CacheKey) -> _Entry:
+        entry = self._lookup(key)
+        if entry is not None:
+            with self._lock:
+                self._hits += 1
+            return entry
+        with self._loading_lock(key):
+            # 待っている間に他のセッションが読み込んでいれば、それを使う
+            entry = self._lookup(key)
+            if entry is not None:
+                with self._lock:
+                    self._hits += 1
+                return entry
+            table = pq.read_table(parquet_file_path)
+            entry = _Entry(table)
+            with self._lock:
+                self._misses += 1
+                # 同じパスの古い版（更新前のファイル）は不要になるため破棄する
+                for stale in [k for k in self._entries if k[0] == key[0]]:
+                    self._discard(stale)
+                if entry.nbytes > self.max_bytes:
+                    logger.warning(
+                        f"上限を超えるためキャッシュしません: {key[0]} "
+                        f"({entry.nbytes / 1024 ** 2:.1f}MB > {self.max_bytes / 1024 ** 2:.1f}MB)"
+                    )
+                    return entry
+                self._evict_for(entry.nbytes)
+                self._entries[key] = entry
+                self._resident_bytes += entry.nbytes
+            logger.info(f"Parquetファイルをキャッシュに読み込みました: {parquet_file_path} ({table.num_rows}件, {table.nbytes / 1024 ** 2:.1f}MB)")
+            return entry
+
+    def peek(self, parquet_file_path: str) -> Optional[pa.Table]:
+        """
+        読み込み済みの場合のみテーブルを取得（未読み込みの場合は読み込まずにNoneを返す）
+
+        Args:
+            parquet_file_path: Parquetファイルパス
+
+        Returns:
+            Optional[pa.Table]: テーブル（全セッションで共有）
+        """
+        entry = self._lookup(_cache_key(parquet_file_path))
+        if entry is None:
+            return None
+        with self._lock:
+            self._peeks += 1
+        return entry.table
+
+    def get_table(self, parquet_file_path: str) -> pa.Table:
+        """
+        Parquetファイルのテーブルを取得（未読み込み・更新済みの場合は読み込む）
+
+        Args:
+            parquet_file_path: Parquetファイルパス
+
+        Returns:
+            pa.Table: テーブル（全セッションで共有）
+        """
+        return self._load(parquet_file_path, _cache_key(parquet_file_path)).table
+
+    def get_frame(self, parquet_file_path: str, convert: Callable[[pa.Table], pd.DataFrame]) -> pd.DataFrame:
+        """
+        テーブルを変換した DataFrame を取得（変換は変換関数ごとに1回）
+
+        Args:
+            parquet_file_path: Parquetファイルパス
+            convert: テーブルを DataFrame に変換する関数
+
+        Returns:
+            pd.DataFrame: 変換済みの DataFrame（全セッションで共有のため変更しないこと）
+        """
+        key = _cache_key(parquet_file_path)
+        entry = self._load(parquet_file_path, key)
+        name = f"{convert.__module__}.{convert.__qualname__}"
+        frame = entry.frames.get(name)
+        if frame is not None:
+            return frame
+        with self._loading_lock(key):
+            frame = entry.frames.get(name)
+            if frame is not None:
+                return frame
+            frame = convert(entry.table)
+            nbytes = int(frame.memory_usage(deep=True).sum())
+            with self._lock:
+                if key not in self._entries:
+                    # 破棄済み・キャッシュ対象外のエントリーには保持しない
+                    return frame
+                self._evict_for(nbytes, keep=key)
+                if self._resident_bytes + nbytes > self.max_bytes:
+                    logger.warning(f"上限を超えるため変換結果をキャッシュしません: {key[0]}")
+                    return frame
+                entry.frames[name] = frame
+                entry.nbytes += nbytes
+                self._resident_bytes += nbytes
+            return frame
+
+    def invalidate(self, parquet_file_path: Optional[str] = None) -> None:
+        """
+        キャッシュを破棄
+
+        Args:
+            parquet_file_path: 破棄するファイル（Noneの場合は全て）
+        """
+        with self._lock:
+            if parquet_file_path is None:
+                self._entries.clear()
+                self._resident_bytes = 0
+                return
+            path = _normalize_path(parquet_file_path)
+            for key in [k for k in self._entries if k[0] == path]:
+                self._discard(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        キャッシュの統計情報を取得
+
+        Returns:
+            Dict[str, Any]: ヒット率・保持サイズ・件数など
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'peeks': self._peeks,
+                'evictions': self._evictions,
+                'entries': len(self._entries),
+                'resident_bytes': self._resident_bytes,
+                'max_bytes': self.max_bytes,
+                'files': [
+                    {'path': key[0], 'rows': entry.table.num_rows, 'bytes': entry.nbytes}
+                    for key, entry in reversed(self._entries.items())
+                ],
+            }
+
+
+_cache: Optional[ArrowTableCache] = None
+_cache_lock = threading.Lock()
+
+
+def _configured_max_bytes() -> int:
+    try:
+        from src.core.config.settings import AppConfig
+        return AppConfig.from_config_file('config/settings.ini').viewer_cache.max_bytes
+    except Exception as e:
+        logger.warning(f"キャッシュ設定を読み込めないため既定値を使用します: {e}")
+        return DEFAULT_MAX_BYTES
+
+
+def get_arrow_table_cache() -> ArrowTableCache:
+    """
+    プロセス共有のArrowテーブルキャッシュを取得
+
+    Returns:
+        ArrowTableCache: 共有キャッシュ
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ArrowTableCache(_configured_max_bytes())
+        return _cache
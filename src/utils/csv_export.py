@@ -0,0 +1,192 @@
+"""
+ディスクに書き出すCSVダウンロード（全セッション共有）
+
+CSVを文字列としてセッションに保持せず、一時ディレクトリのファイルに cp932 で分割して書き込み、
+ダウンロード時はファイルから渡す。同じデータ（テーブル, 絞り込み条件, ファイルの版）の
+CSVは全セッションで同じファイルを使い、一定時間を過ぎたファイルは次の準備時に削除する。
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+from src.core.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+CSV_ENCODING = 'cp932'
+DEFAULT_CHUNK_ROWS = 50000
+DEFAULT_MAX_AGE = 3600
+
+_CSV_SUFFIX = '.csv'
+_META_SUFFIX = '.json'
+
+
+def csv_download_key(*parts: Any) -> str:
+    """
+    CSVを共有する単位のキー（テーブル, 絞り込み条件, ファイルの版など）
+
+    Args:
+        *parts: キーを構成する値（JSONに変換できる値）
+
+    Returns:
+        str: キー（ファイル名に使用する）
+    """
+    text = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def iter_frame_chunks(df: pd.DataFrame, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterable[pd.DataFrame]:
+    """
+    DataFrame を一定行数ごとに分割
+
+    Args:
+        df: 対象DataFrame
+        chunk_rows: 1回に書き込む行数
+
+    Yields:
+        pd.DataFrame: 分割した DataFrame（コピーなし）
+    """
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+class CSVDownloadStore:
+    """キーごとに1ファイルを書き出すCSVの保存先"""
+
+    def __init__(self, directory: Optional[str] = None, max_age: int = DEFAULT_MAX_AGE):
+        """
+        保存先を初期化
+
+        Args:
+            directory: 保存先ディレクトリ（Noneの場合は一時ディレクトリ）
+            max_age: ファイルを保持する秒数
+        """
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'gig_sql_csv')
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # 同じキーを複数セッションが同時に準備した場合も書き出しは1回にする
+        self._writing: Dict[str, threading.Lock] = {}
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, key)
+        return base + _CSV_SUFFIX, base + _META_SUFFIX
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._writing.setdefault(key, threading.Lock())
+
+    def find(self, key: str) -> Optional[Tuple[str, int]]:
+        """
+        書き出し済みのCSVを取得
+
+        Args:
+            key: csv_download_key で作成したキー
+
+        Returns:
+            Optional[Tuple[str, int]]: (CSVファイルパス, 行数)。未作成・期限切れの場合はNone
+        """
+        csv_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            if time.time() - os.path.getmtime(csv_path) > self.max_age:
+                return None
+        except (OSError, ValueError):
+            return None
+        return csv_path, meta.get('rows', 0)
+
+    def write(self, key: str, chunks: Iterable[pd.DataFrame]) -> Tuple[str, int]:
+        """
+        CSVを分割して書き出す（同じキーのCSVがあればそれを使う）
+
+        Args:
+            key: csv_download_key で作成したキー
+            chunks: 書き出す DataFrame（CSV用に変換済み）を順に返すイテラブル
+
+        Returns:
+            Tuple[str, int]: (CSVファイルパス, 行数)
+        """
+        self.cleanup()
+        with self._key_lock(key):
+            found = self.find(key)
+            if found is not None:
+                logger.info(f"書き出し済みのCSVを使用します: {found[0]} ({found[1]}行)")
+                return found
+            os.makedirs(self.directory, exist_ok=True)
+            csv_path, meta_path = self._paths(key)
+            tmp_path = f"{csv_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            rows = 0
+            try:
+                with open(tmp_path, 'wb') as f:
+                    for chunk in chunks:
+                        text = chunk.to_csv(index=False, header=rows == 0)
+                        f.write(text.encode(CSV_ENCODING, errors='replace'))
+                        rows += len(chunk)
+                with open(meta_path, 'w', encoding='utf-8') as f:
+                    json.dump({'rows': rows, 'created': time.time()}, f)
+                os.replace(tmp_path, csv_path)
+            except Exception:
+                for path in (tmp_path, meta_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                raise
+            logger.info(f"CSVを書き出しました: {csv_path} ({rows}行, {os.path.getsize(csv_path) / 1024 ** 2:.1f}MB)")
+            return csv_path, rows
+
+    def cleanup(self) -> int:
+        """
+        保持期間を過ぎたCSV（書き出し途中で残ったファイルを含む）を削除
+
+        Returns:
+            int: 削除したファイル数
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+        removed = 0
+        now = time.time()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) > self.max_age:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                # ダウンロード中・他プロセスが削除済みのファイルは次回に回す
+                continue
+        if removed:
+            logger.info(f"保持期間を過ぎたCSVを削除しました: {removed}件")
+        return removed
+
+
+_store: Optional[CSVDownloadStore] = None
+_store_lock = threading.Lock()
+
+
+def _configured_store() -> CSVDownloadStore:
+    try:
+        from src.core.config.settings import AppConfig
+        viewer_cache = AppConfig.from_config_file('config/settings.ini').viewer_cache
+        return CSVDownloadStore(viewer_cache.csv_download_dir or None, viewer_cache.csv_download_max_age)
+    except Exception as e:
+        logger.warning(f"CSVダウンロード設定を読み込めないため既定値を使用します: {e}")
+        return CSVDownloadStore()
+
+
+def get_csv_download_store() -> CSVDownloadStore:
+    """
+    プロセス共有のCSVダウンロードの保存先を取得
+
+    Returns:
+        CSVDownloadStore: 共有の保存先
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = _configured_store()
+        return _store
@@ -6,9 +6,17 @@
 import pandas as pd
 import os
 import numpy as np
+import pyarrow.parquet as pq
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Union
 from src.core.logging.logger import get_logger
+from src.utils.arrow_cache import get_arrow_table_cache
+from src.utils.filtered_rows import FilteredRows
+from src.utils.parquet_filters import (
+    build_filter_expression, file_is_display_ordered, is_display_ordered,
+    read_parquet_filtered, read_parquet_page, read_parquet_rows, to_display_order
+)
+from src.utils.parquet_index import lookup_row_ids
 
 logger = get_logger(__name__)
 
@@ -43,15 +51,20 @@ def format_dates(df: pd.DataFrame, data_types: Dict[str, str]) -> pd.DataFrame:
 
 def load_and_filter_parquet(parquet_file_path: str, input_fields: Dict[str, Any], 
                            input_fields_types: Dict[str, str], 
-                           options_dict: Dict[str, List]) -> Optional[pd.DataFrame]:
+                           options_dict: Dict[str, List],
+                           columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
     """
     Parquetファイルを読み込み、条件でフィルタリング
     
+    検索用インデックスがあれば条件に一致しうる行だけを読み込み、
+    なければ変換できる条件を読み込み時に適用して該当しない行グループを読み飛ばす。
+    
     Args:
         parquet_file_path (str): Parquetファイルパス
         input_fields (Dict[str, Any]): 入力フィールド
         input_fields_types (Dict[str, str]): フィールドタイプ
         options_dict (Dict[str, List]): オプション辞書
+        columns (Optional[List[str]]): 表示する列（Noneの場合は全列）
         
     Returns:
         Optional[pd.DataFrame]: フィルタリング済みDataFrame
@@ -61,14 +74,23 @@ def load_and_filter_parquet(parquet_file_path: str, input_fields: Dict[str, Any]
         return None
     
     try:
-        # Parquetファイル読み込み
-        df = pd.read_parquet(parquet_file_path)
-        # インデックスの降順で並べ替え（最新データを上位表示）
-        df = df.sort_index(ascending=False)
+        # Parquetファイル読み込み（条件・列を読み込み時に絞り込む）
+        read_columns = None if columns is None else list(columns) + list(input_fields)
+        row_ids = lookup_row_ids(parquet_file_path, input_fields, input_fields_types)
+        if row_ids is not None:
+            df = read_parquet_rows(parquet_file_path, row_ids, read_columns)
+        else:
+            schema = pq.read_schema(parquet_file_path)
+            filter_expression, filter_columns = build_filter_expression(schema, input_fields, input_fields_types)
+            df = read_parquet_filtered(parquet_file_path, filter_expression, read_columns, filter_columns)
+        # インデックスの降順で並べ替え（最新データを上位表示。表示順で書き出したファイルは並べ替えない）
+        df = to_display_order(df, file_is_display_ordered(parquet_file_path))
         logger.info(f"Parquetファイル読み込み完了: {len(df)}件（降順ソート済み）")
         
         # フィルタリング条件を適用
         filtered_df = apply_filters(df, input_fields, input_fields_types)
+        if columns is not None:
+            filtered_df = filtered_df[[column for column in columns if column in filtered_df.columns]]
         
         logger.info(f"フィルタリング完了: {len(filtered_df)}件")
         return filtered_df
@@ -91,7 +113,8 @@ def apply_filters(df: pd.DataFrame, input_fields: Dict[str, Any],
     Returns:
         pd.DataFrame: フィルタリング済みDataFrame
     """
-    filtered_df = df.copy()
+    # 各条件は新しい DataFrame を返す絞り込みのみで、元の df は変更しないためコピーしない
+    filtered_df = df
     filter_count = 0
     
     for field_name, field_value in input_fields.items():
@@ -138,19 +161,19 @@ def apply_filters(df: pd.DataFrame, input_fields: Dict[str, Any],
                 logger.debug(f"選択フィルタ適用: {field_name} = {selected_options}")
     
     logger.info(f"フィルタリング完了: {filter_count}個の条件を適用")
-    # フィルタリング後に降順ソート（legacy版と同じ動作）
-    if not filtered_df.empty:
+    # フィルタリング後に降順ソート（legacy版と同じ動作。表示順で読み込んだ行は並べ替えない）
+    if not filtered_df.empty and not filtered_df.index.is_monotonic_decreasing:
         filtered_df = filtered_df.sort_index(ascending=False)
         logger.debug("フィルタリング後に降順ソートを適用")
     return filtered_df
 
 
-def load_and_prepare_data(df: pd.DataFrame, page_number: int, page_size: int) -> pd.DataFrame:
+def load_and_prepare_data(df: Union[pd.DataFrame, FilteredRows], page_number: int, page_size: int) -> pd.DataFrame:
     """
     データの準備とページネーション
     
     Args:
-        df (pd.DataFrame): 対象DataFrame
+        df (Union[pd.DataFrame, FilteredRows]): 対象DataFrame、または絞り込み結果（ページの行だけを読み込む）
         page_number (int): ページ番号
         page_size (int): ページサイズ
         
@@ -161,12 +184,17 @@ def load_and_prepare_data(df: pd.DataFrame, page_number: int, page_size: int) ->
         logger.warning("データが空です")
         return pd.DataFrame()
     
+    if isinstance(df, FilteredRows):
+        paged_df = df.page(page_number, page_size)
+        logger.debug(f"データ準備完了: ページ{page_number}, {len(paged_df)}件")
+        return paged_df
+    
     # ページネーション計算
     start_idx = (page_number - 1) * page_size
     end_idx = start_idx + page_size
     
-    # データ切り出し
-    paged_df = df.iloc[start_idx:end_idx].copy()
+    # データ切り出し（表示のみのためコピーしない）
+    paged_df = df.iloc[start_idx:end_idx]
     
     logger.debug(f"データ準備完了: ページ{page_number}, {len(paged_df)}件")
     return paged_df
@@ -378,6 +406,11 @@ def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
     return optimized_df
 
 
+def _to_descending_frame(table) -> pd.DataFrame:
+    # インデックスの降順で並べ替え（最新データを上位表示。表示順で書き出したファイルは並べ替えない）
+    return to_display_order(table.to_pandas(), is_display_ordered(table.schema))
+
+
 def load_parquet_file(file_path: str, num_rows: Optional[int] = None) -> Optional[pd.DataFrame]:
     """
     Parquetファイルを読み込み
@@ -395,17 +428,11 @@ def load_parquet_file(file_path: str, num_rows: Optional[int] = None) -> Optiona
     
     try:
         if num_rows:
-            # pyarrowを使用して行数制限付き読み込み
-            import pyarrow.parquet as pq
-            table = pq.read_table(file_path)
-            df = table.to_pandas()
-            # インデックスの降順で並べ替えてから指定行数を取得
-            df = df.sort_index(ascending=False)
-            df = df.head(num_rows)
+            # 表示する行を含む行グループだけを読み、その行だけを変換する（ファイルサイズに依存しない）
+            df, _ = read_parquet_page(file_path, 0, num_rows, descending=True)
         else:
-            df = pd.read_parquet(file_path)
-            # インデックスの降順で並べ替え（最新データを上位表示）
-            df = df.sort_index(ascending=False)
+            # 全セッション共有の変換結果を使用する（セッションごとのコピーを持たない）
+            df = get_arrow_table_cache().get_frame(file_path, _to_descending_frame)
         
         logger.info(f"Parquetファイル読み込み完了: {df.shape}（降順ソート済み）")
         return df
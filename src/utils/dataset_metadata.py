@@ -0,0 +1,260 @@
+"""
+Parquetファイルの集計情報（サイドカー）
+
+バッチの出力時に、ファイルの件数と列ごとの集計を `<ファイル名>.parquet.meta.json` に書き出す。
+
+- 全列: 欠損値の件数
+- 文字列・整数・真偽値の列: 値ごとの件数（件数の多い順に上限 max_distinct 件まで）
+- 数値・日付・日時の列: 最小値・最大値
+- 選択シートで日付・日時に指定された文字列の列: 日時に変換した最小値・最大値
+- ファイルの内容のハッシュ（ビューアのキャッシュキーに使用する）
+
+ビューアは全行を走査せずに、絞込フォームの選択肢・件数・日付の選択範囲を表示する。
+元のファイルと更新日時・サイズが一致しない集計情報は使用しない。
+"""
+import datetime
+import decimal
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.core.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+METADATA_SUFFIX = '.meta.json'
+METADATA_VERSION = 1
+DEFAULT_MAX_DISTINCT = 200
+
+_HASH_BLOCK_SIZE = 4 * 1024 ** 2
+
+
+def metadata_path_for(parquet_file_path: str) -> str:
+    """Parquetファイルに対応する集計情報ファイルのパス"""
+    return parquet_file_path + METADATA_SUFFIX
+
+
+def _source_signature(parquet_file_path: str) -> Dict[str, int]:
+    stat = os.stat(parquet_file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _content_hash(parquet_file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(parquet_file_path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    return value
+
+
+def _counts_values(data_type: pa.DataType) -> bool:
+    if pa.types.is_dictionary(data_type):
+        return _counts_values(data_type.value_type)
+    return (
+        pa.types.is_string(data_type) or pa.types.is_large_string(data_type)
+        or pa.types.is_integer(data_type) or pa.types.is_boolean(data_type)
+    )
+
+
+def _has_range(data_type: pa.DataType) -> bool:
+    return (
+        pa.types.is_integer(data_type) or pa.types.is_floating(data_type) or pa.types.is_decimal(data_type)
+        or pa.types.is_date(data_type) or pa.types.is_timestamp(data_type)
+    )
+
+
+def _date_range(column: pa.ChunkedArray) -> Optional[List[str]]:
+    # 検索用インデックス（_date_index）と同じく、文字列で保存した日付・日時を変換して求める
+    series = pd.to_datetime(column.to_pandas(), errors='coerce')
+    if not pd.api.types.is_datetime64_dtype(series) or series.isna().all():
+        return None
+    return [series.min().isoformat(), series.max().isoformat()]
+
+
+def _column_summary(column: pa.ChunkedArray, max_distinct: int, parse_dates: bool = False) -> Dict[str, Any]:
+    summary: Dict[str, Any] = {'type': str(column.type), 'null_count': column.null_count}
+    if _counts_values(column.type):
+        counts = pc.value_counts(column.drop_null())
+        if pa.types.is_dictionary(column.type):
+            counts = pa.StructArray.from_arrays(
+                [counts.field('values').cast(column.type.value_type), counts.field('counts')], ['values', 'counts']
+            )
+        order = pc.sort_indices(counts, sort_keys=[('counts', 'descending'), ('values', 'ascending')])
+        top = counts.take(order[:max_distinct])
+        summary['distinct_count'] = len(counts)
+        summary['values'] = [
+            [_json_value(value), count]
+            for value, count in zip(top.field('values').to_pylist(), top.field('counts').to_pylist())
+        ]
+        summary['values_truncated'] = len(counts) > max_distinct
+    if _has_range(column.type) and column.null_count < len(column):
+        min_max = pc.min_max(column)
+        summary['min'] = _json_value(min_max['min'].as_py())
+        summary['max'] = _json_value(min_max['max'].as_py())
+    elif parse_dates and (pa.types.is_string(column.type) or pa.types.is_large_string(column.type)):
+        date_range = _date_range(column)
+        if date_range is not None:
+            summary['date_range'] = date_range
+    return summary
+
+
+def build_dataset_metadata(table: pa.Table, max_distinct: int = DEFAULT_MAX_DISTINCT,
+                           date_columns: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    テーブルの集計情報を作成
+
+    Args:
+        table: 集計するテーブル
+        max_distinct: 列ごとに保持する値の件数の上限
+        date_columns: 文字列で保存していても日付・日時として範囲を求める列
+
+    Returns:
+        Dict[str, Any]: 件数（row_count）と列ごとの集計（columns）
+    """
+    date_columns = set(date_columns)
+    return {
+        'version': METADATA_VERSION,
+        'row_count': table.num_rows,
+        'columns': {
+            name: _column_summary(table.column(name), max_distinct, name in date_columns)
+            for name in table.schema.names
+        },
+    }
+
+
+def write_dataset_metadata(parquet_file_path: str, table: pa.Table,
+                           max_distinct: int = DEFAULT_MAX_DISTINCT, date_columns: Iterable[str] = ()) -> str:
+    """
+    書き出したParquetファイルの集計情報を作成
+
+    Args:
+        parquet_file_path: 書き出し済みのParquetファイルパス
+        table: ファイルに書き出したテーブル
+        max_distinct: 列ごとに保持する値の件数の上限
+        date_columns: 文字列で保存していても日付・日時として範囲を求める列
+
+    Returns:
+        str: 作成した集計情報ファイルのパス
+    """
+    metadata = build_dataset_metadata(table, max_distinct, date_columns)
+    metadata['source'] = _source_signature(parquet_file_path)
+    metadata['content_hash'] = _content_hash(parquet_file_path)
+    path = metadata_path_for(parquet_file_path)
+    temp_path = path + '.temp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, default=str)
+    os.replace(temp_path, path)
+    logger.info(f"集計情報を作成しました: {path} ({metadata['row_count']}件, {len(metadata['columns'])}列)")
+    return path
+
+
+@lru_cache(maxsize=64)
+def _read_metadata(path: str, size: int, mtime_ns: int) -> Optional[Dict[str, Any]]:
+    # 集計情報ファイル自体の版もキーに含め、書き直された場合は読み直す
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"集計情報を読み込めません: {path}, {e}")
+        return None
+
+
+def load_dataset_metadata(parquet_file_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Parquetファイルの集計情報を取得
+
+    Args:
+        parquet_file_path: Parquetファイルパス
+
+    Returns:
+        Optional[Dict[str, Any]]: 集計情報。ファイルがない・ファイルの版が一致しない場合はNone
+    """
+    path = metadata_path_for(parquet_file_path)
+    try:
+        source = _source_signature(parquet_file_path)
+        stat = os.stat(path)
+    except OSError:
+        return None
+    metadata = _read_metadata(path, stat.st_size, stat.st_mtime_ns)
+    if metadata is None or metadata.get('version') != METADATA_VERSION or metadata.get('source') != source:
+        logger.debug(f"集計情報がParquetファイルと一致しないため使用しません: {path}")
+        return None
+    return metadata
+
+
+def _column(metadata: Optional[Dict[str, Any]], field: str) -> Dict[str, Any]:
+    if not metadata:
+        return {}
+    return metadata.get('columns', {}).get(field) or {}
+
+
+def column_value_counts(metadata: Optional[Dict[str, Any]], field: str) -> Dict[str, int]:
+    """
+    列の値ごとの件数（値は絞り込みで比較する文字列表現）
+
+    Args:
+        metadata: load_dataset_metadata の結果
+        field: 列名
+
+    Returns:
+        Dict[str, int]: 値 -> 件数（値の件数が上限を超えた列は件数の多い値のみ）
+    """
+    return {str(value): count for value, count in _column(metadata, field).get('values', [])}
+
+
+def column_values(metadata: Optional[Dict[str, Any]], field: str) -> Optional[List[str]]:
+    """
+    列の全ての値（選択肢用。空文字列を除き昇順）
+
+    Args:
+        metadata: load_dataset_metadata の結果
+        field: 列名
+
+    Returns:
+        Optional[List[str]]: 値の一覧。集計がない・値の件数が上限を超えた列はNone
+    """
+    column = _column(metadata, field)
+    if 'values' not in column or column.get('values_truncated'):
+        return None
+    return sorted(str(value) for value, _ in column['values'] if value not in ('', None))
+
+
+def column_date_range(metadata: Optional[Dict[str, Any]], field: str) -> Optional[Tuple[datetime.date, datetime.date]]:
+    """
+    日付・日時の列の最小日・最大日
+
+    Args:
+        metadata: load_dataset_metadata の結果
+        field: 列名
+
+    Returns:
+        Optional[Tuple[date, date]]: (最小日, 最大日)。集計がない・日付の列でない場合はNone
+    """
+    column = _column(metadata, field)
+    if column.get('type', '').startswith(('date', 'timestamp')) and 'min' in column:
+        bounds = (column['min'], column['max'])
+    elif 'date_range' in column:
+        bounds = tuple(column['date_range'])
+    else:
+        return None
+    try:
+        return (
+            datetime.datetime.fromisoformat(bounds[0]).date(),
+            datetime.datetime.fromisoformat(bounds[1]).date(),
+        )
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,251 @@
+"""
+Parquetファイルの更新監視（ビューアのキャッシュの無効化）
+
+ビューアのキャッシュは時間（TTL）ではなくファイルの版をキーにする。
+版は (更新日時, サイズ, 内容のハッシュ) とし、内容のハッシュはバッチが書き出した集計情報（.meta.json）から取得する。
+
+watchdog でデータ出力先のディレクトリを監視し、Parquetファイル（または集計情報）が作成・更新・置き換え・削除された
+場合のみ版を取り直し、登録された処理（共有キャッシュの破棄など）に通知する。監視していないファイルは参照ごとに
+更新日時・サイズを確認する。
+"""
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from src.core.logging.logger import get_logger
+from src.utils.arrow_cache import get_arrow_table_cache
+from src.utils.dataset_metadata import METADATA_SUFFIX, load_dataset_metadata
+from src.utils.filter_cache import get_filter_result_cache
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = get_logger(__name__)
+
+# ファイルの版（更新日時（ナノ秒）, サイズ, 内容のハッシュ（集計情報がない場合は空文字列））
+DatasetVersion = Tuple[int, int, str]
+
+_PARQUET_SUFFIX = '.parquet'
+
+
+def _normalize_path(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def read_dataset_version(parquet_file_path: str) -> Optional[DatasetVersion]:
+    """
+    Parquetファイルの現在の版を取得
+
+    Args:
+        parquet_file_path: Parquetファイルパス
+
+    Returns:
+        Optional[DatasetVersion]: (更新日時, サイズ, 内容のハッシュ)。ファイルがない場合はNone
+    """
+    try:
+        stat = os.stat(parquet_file_path)
+    except OSError:
+        return None
+    metadata = load_dataset_metadata(parquet_file_path) or {}
+    return stat.st_mtime_ns, stat.st_size, metadata.get('content_hash', '')
+
+
+def _parquet_path_for_event(path: Optional[str]) -> Optional[str]:
+    """イベントのパスに対応するParquetファイル（対象外のファイルはNone）"""
+    if not path:
+        return None
+    if path.endswith(_PARQUET_SUFFIX + METADATA_SUFFIX):
+        return path[:-len(METADATA_SUFFIX)]
+    if path.endswith(_PARQUET_SUFFIX):
+        return path
+    return None
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    """監視ディレクトリのイベントをParquetファイルの変更として通知"""
+
+    def __init__(self, watcher: 'DatasetWatcher'):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event) -> None:
+        if getattr(event, 'is_directory', False):
+            return
+        # 一時ファイルからの置き換え（os.rename / os.replace）は移動先のパスで通知される
+        for path in (event.src_path, getattr(event, 'dest_path', None)):
+            parquet_file_path = _parquet_path_for_event(path)
+            if parquet_file_path is not None:
+                self.watcher.mark_changed(parquet_file_path)
+
+
+class DatasetWatcher:
+    """Parquetファイルの版を保持し、更新を検知したら通知する"""
+
+    def __init__(self):
+        self._versions: Dict[str, Optional[DatasetVersion]] = {}
+        # 更新を検知した回数（版の読み取り中に更新された場合に古い版を保持しないため）
+        self._generations: Dict[str, int] = {}
+        self._watched: Set[str] = set()
+        self._listeners: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+        self._observer = None
+
+    def watch(self, directory: str) -> bool:
+        """
+        ディレクトリの監視を開始
+
+        Args:
+            directory: Parquetファイルの出力先ディレクトリ
+
+        Returns:
+            bool: 監視できた場合True（watchdog がない・監視できない場所の場合はFalse）
+        """
+        directory = _normalize_path(directory)
+        with self._lock:
+            if directory in self._watched:
+                return True
+            if Observer is None:
+                logger.info("watchdog がないため、Parquetファイルの版は参照ごとに確認します")
+                return False
+            try:
+                if self._observer is None:
+                    self._observer = Observer()
+                    self._observer.daemon = True
+                    self._observer.start()
+                self._observer.schedule(_ChangeHandler(self), directory, recursive=False)
+            except Exception as e:
+                logger.warning(f"ディレクトリを監視できないため、Parquetファイルの版は参照ごとに確認します: {directory}, {e}")
+                return False
+            self._watched.add(directory)
+        logger.info(f"Parquetファイルの更新監視を開始しました: {directory}")
+        return True
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """
+        ファイルの更新時に呼び出す処理を登録
+
+        Args:
+            listener: 更新されたParquetファイルパスを受け取る関数
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def _is_watched(self, key: str) -> bool:
+        return os.path.dirname(key) in self._watched
+
+    def version(self, parquet_file_path: str) -> Optional[DatasetVersion]:
+        """
+        Parquetファイルの版を取得（キャッシュキーに使用する）
+
+        監視中のディレクトリのファイルは、更新を検知するまで保持した版を返す。
+
+        Args:
+            parquet_file_path: Parquetファイルパス
+
+        Returns:
+            Optional[DatasetVersion]: ファイルの版。ファイルがない場合はNone
+        """
+        key = _normalize_path(parquet_file_path)
+        with self._lock:
+            if key in self._versions:
+                return self._versions[key]
+            watched = self._is_watched(key)
+            generation = self._generations.get(key, 0)
+        version = read_dataset_version(parquet_file_path)
+        if watched:
+            with self._lock:
+                # 読み取り中に更新を検知した場合は保持しない（次回の参照で取り直す）
+                if self._generations.get(key, 0) == generation:
+                    self._versions.setdefault(key, version)
+        return version
+
+    def mark_changed(self, parquet_file_path: str) -> None:
+        """
+        ファイルの更新を反映（保持した版を破棄し、登録された処理に通知）
+
+        Args:
+            parquet_file_path: 更新されたParquetファイルパス
+        """
+        key = _normalize_path(parquet_file_path)
+        with self._lock:
+            self._versions.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+            listeners = list(self._listeners)
+        logger.info(f"Parquetファイルの更新を検知しました: {parquet_file_path}")
+        for listener in listeners:
+            try:
+                listener(parquet_file_path)
+            except Exception as e:
+                logger.warning(f"更新の通知に失敗しました: {parquet_file_path}, {e}")
+
+    def refresh(self, parquet_file_path: str) -> bool:
+        """
+        ファイルの版を取り直す（監視で検知できなかった更新を反映する）
+
+        Args:
+            parquet_file_path: Parquetファイルパス
+
+        Returns:
+            bool: 保持していた版から変わっていた場合True
+        """
+        key = _normalize_path(parquet_file_path)
+        with self._lock:
+            known = key in self._versions
+            previous = self._versions.get(key)
+        if not known:
+            return False
+        if read_dataset_version(parquet_file_path) == previous:
+            return False
+        self.mark_changed(parquet_file_path)
+        return True
+
+    def stop(self) -> None:
+        """監視を停止"""
+        with self._lock:
+            observer, self._observer = self._observer, None
+            self._watched.clear()
+            self._versions.clear()
+        if observer is not None:
+            observer.stop()
+            observer.join(timeout=5)
+
+
+_watcher: Optional[DatasetWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def _invalidate_shared_caches(parquet_file_path: str) -> None:
+    # 更新前のファイルのテーブル・絞り込み結果は参照されなくなるため、すぐに破棄してメモリを空ける
+    get_arrow_table_cache().invalidate(parquet_file_path)
+    get_filter_result_cache().invalidate(parquet_file_path)
+
+
+def _configured_watcher() -> DatasetWatcher:
+    watcher = DatasetWatcher()
+    watcher.add_listener(_invalidate_shared_caches)
+    try:
+        from src.core.config.settings import AppConfig
+        app_config = AppConfig.from_config_file('config/settings.ini')
+        if app_config.viewer_cache.watch_datasets:
+            watcher.watch(os.path.normpath(app_config.paths.csv_base_path))
+    except Exception as e:
+        logger.warning(f"監視設定を読み込めないため、Parquetファイルの版は参照ごとに確認します: {e}")
+    return watcher
+
+
+def get_dataset_watcher() -> DatasetWatcher:
+    """
+    プロセス共有のParquetファイルの更新監視を取得
+
+    Returns:
+        DatasetWatcher: 共有の更新監視
+    """
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = _configured_watcher()
+        return _watcher
@@ -13,6 +13,7 @@ from decimal import Decimal
 import shutil
 from src.core.logging.logger import get_logger
 from src.core.google_api.auth import retry_on_exception
+from src.utils.parquet_filters import display_ordered_table
 
 logger = get_logger(__name__)
 
@@ -223,8 +224,8 @@ def parquetfile_export(conn, sql_query: str, parquet_file_path: str, main_table_
         # ディレクトリ作成
         os.makedirs(os.path.dirname(parquet_file_path), exist_ok=True)
         
-        # Parquetファイル保存
-        table = pa.Table.from_pandas(df)
+        # Parquetファイル保存（ビューアの表示順（インデックスの降順）で保存）
+        table = display_ordered_table(df)
         pq.write_table(table, parquet_file_path)
         
         logger.info(f"Parquetエクスポート完了: {parquet_file_path}, レコード数: {record_count}")
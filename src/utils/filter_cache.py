@@ -0,0 +1,261 @@
+"""
+プロセス共有の絞り込み結果キャッシュ（条件の追加による絞り込みの再利用）
+
+検索は「日付範囲 → 教室 → ステータス」のように条件を追加して段階的に絞り込むことが多い。
+絞り込み結果（行番号）をテーブルごとに保持し、新しい条件が保持済みの条件をすべて満たす
+（条件の追加・日付範囲の縮小・チェックボックスの選択の削減）場合は、保持済みの行番号に
+差分の条件だけを適用すればよいことを判定する。
+
+- テーブルごとに最も長く使われていない結果から破棄する（LRU）
+- Parquetファイルが更新された（更新日時・サイズが変わった）場合はテーブルの結果をすべて破棄する
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.core.logging.logger import get_logger
+from src.utils.filtered_rows import compact_row_ids
+
+logger = get_logger(__name__)
+
+DEFAULT_ENTRIES_PER_TABLE = 16
+
+_SET_TYPES = ('チェックボックス', 'select')
+_DATE_TYPES = ('date', 'datetime')
+
+# 条件の比較用の表現（フィールドタイプ, 正規化した値）
+Predicate = Tuple[str, Any]
+PredicateKey = Tuple[Tuple[str, Predicate], ...]
+
+
+def _day(value: Any) -> Optional[pd.Timestamp]:
+    # 日付範囲は開始日の0時〜終了日の終わりまでで比較されるため日単位で比較する
+    return pd.to_datetime(value).normalize() if value else None
+
+
+def active_predicates(input_fields: Dict[str, Any], input_fields_types: Dict[str, str]) -> Dict[str, Predicate]:
+    """
+    行を絞り込む条件だけを比較用の表現に変換（未入力・「-」などの条件は含めない）
+
+    Args:
+        input_fields: 入力フィールド
+        input_fields_types: フィールドタイプ
+
+    Returns:
+        Dict[str, Predicate]: 項目ごとの (フィールドタイプ, 正規化した値)
+    """
+    predicates: Dict[str, Predicate] = {}
+    for field, value in input_fields.items():
+        field_type = input_fields_types.get(field, '')
+        if field_type in _SET_TYPES:
+            selected = frozenset(str(label) for label, checked in value.items() if checked) if isinstance(value, dict) else frozenset()
+            if selected:
+                predicates[field] = (field_type, selected)
+        elif field_type in _DATE_TYPES:
+            start, end = (value.get('start_date'), value.get('end_date')) if isinstance(value, dict) else (None, None)
+            if start or end:
+                predicates[field] = (field_type, (_day(start), _day(end)))
+        elif field_type == 'プルダウン':
+            if value != '-':
+                predicates[field] = (field_type, value)
+        elif value:
+            predicates[field] = (field_type, value)
+    return predicates
+
+
+def _implies(new: Predicate, old: Predicate) -> bool:
+    """new を満たす行が必ず old を満たすか"""
+    if new == old:
+        return True
+    if new[0] != old[0]:
+        return False
+    if new[0] in _SET_TYPES:
+        return new[1] <= old[1]
+    if new[0] in _DATE_TYPES:
+        (new_start, new_end), (old_start, old_end) = new[1], old[1]
+        return (
+            (old_start is None or (new_start is not None and new_start >= old_start))
+            and (old_end is None or (new_end is not None and new_end <= old_end))
+        )
+    # 部分一致（正規表現）・完全一致は同じ値の場合のみ
+    return False
+
+
+def _predicate_key(predicates: Dict[str, Predicate]) -> PredicateKey:
+    return tuple(sorted(predicates.items(), key=lambda item: item[0]))
+
+
+class _TableEntries:
+    """1テーブル分の絞り込み結果（LRU順）"""
+
+    def __init__(self, source: Tuple[int, int]):
+        self.source = source
+        self.results: 'OrderedDict[PredicateKey, Tuple[Dict[str, Predicate], np.ndarray]]' = OrderedDict()
+
+
+class FilterResultCache:
+    """条件の追加による絞り込みを再利用する絞り込み結果のキャッシュ"""
+
+    def __init__(self, entries_per_table: int = DEFAULT_ENTRIES_PER_TABLE):
+        """
+        キャッシュを初期化
+
+        Args:
+            entries_per_table: テーブルごとに保持する絞り込み結果の件数
+        """
+        self.entries_per_table = max(1, entries_per_table)
+        self._tables: Dict[str, _TableEntries] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._refinements = 0
+        self._misses = 0
+
+    @staticmethod
+    def _table_key(parquet_file_path: str) -> str:
+        return os.path.normcase(os.path.abspath(parquet_file_path))
+
+    def _current_entries(self, parquet_file_path: str, source: Tuple[int, int]) -> Optional[_TableEntries]:
+        """ファイルの版が一致するテーブルの結果（更新されていれば破棄してNone）"""
+        key = self._table_key(parquet_file_path)
+        entries = self._tables.get(key)
+        if entries is not None and entries.source != source:
+            del self._tables[key]
+            logger.info(f"Parquetファイルの更新により絞り込み結果を破棄しました: {parquet_file_path}")
+            return None
+        return entries
+
+    def lookup(self, parquet_file_path: str, input_fields: Dict[str, Any], input_fields_types: Dict[str, str],
+               source: Tuple[int, int]) -> Optional[Tuple[np.ndarray, Dict[str, Any]]]:
+        """
+        同じ条件、または新しい条件で絞り込める（新しい条件が保持済みの条件をすべて満たす）結果を取得
+
+        Args:
+            parquet_file_path: Parquetファイルパス
+            input_fields: 入力フィールド
+            input_fields_types: フィールドタイプ
+            source: 現在のファイルの版（source_signature）
+
+        Returns:
+            Optional[Tuple[np.ndarray, Dict[str, Any]]]: (行番号, 行番号に追加で適用する入力フィールド)。
+                同じ条件の結果があれば追加の入力フィールドは空。利用できる結果がない場合はNone
+        """
+        predicates = active_predicates(input_fields, input_fields_types)
+        key = _predicate_key(predicates)
+        with self._lock:
+            entries = self._current_entries(parquet_file_path, source)
+            if entries is None:
+                self._misses += 1
+                return None
+            exact = entries.results.get(key)
+            if exact is not None:
+                entries.results.move_to_end(key)
+                self._hits += 1
+                return exact[1], {}
+            base_key, base = None, None
+            for cached_key, (cached_predicates, row_ids) in entries.results.items():
+                # 条件のない結果（全件）は読み込み時の絞り込みの方が速いため基にしない
+                if not cached_predicates or (base is not None and len(row_ids) >= len(base[1])):
+                    continue
+                if all(field in predicates and _implies(predicates[field], predicate)
+                       for field, predicate in cached_predicates.items()):
+                    base_key, base = cached_key, (cached_predicates, row_ids)
+            if base is None:
+                self._misses += 1
+                return None
+            entries.results.move_to_end(base_key)
+            self._refinements += 1
+        remaining = {
+            field: input_fields[field] for field, predicate in predicates.items()
+            if base[0].get(field) != predicate
+        }
+        logger.debug(f"保持済みの絞り込み結果（{len(base[1])}件）に差分の条件 {list(remaining)} を適用します")
+        return base[1], remaining
+
+    def store(self, parquet_file_path: str, input_fields: Dict[str, Any], input_fields_types: Dict[str, str],
+              row_ids: np.ndarray, source: Tuple[int, int]) -> None:
+        """
+        絞り込み結果を保持
+
+        Args:
+            parquet_file_path: Parquetファイルパス
+            input_fields: 入力フィールド
+            input_fields_types: フィールドタイプ
+            row_ids: 表示順に並べた行番号
+            source: 絞り込んだファイルの版（source_signature）
+        """
+        predicates = active_predicates(input_fields, input_fields_types)
+        key = _predicate_key(predicates)
+        row_ids = compact_row_ids(row_ids)
+        # 保持する配列を共有しても変更されないようにする
+        row_ids.flags.writeable = False
+        with self._lock:
+            entries = self._current_entries(parquet_file_path, source)
+            if entries is None:
+                entries = self._tables.setdefault(self._table_key(parquet_file_path), _TableEntries(source))
+            entries.results[key] = (predicates, row_ids)
+            entries.results.move_to_end(key)
+            while len(entries.results) > self.entries_per_table:
+                entries.results.popitem(last=False)
+
+    def invalidate(self, parquet_file_path: Optional[str] = None) -> None:
+        """
+        絞り込み結果を破棄
+
+        Args:
+            parquet_file_path: 破棄するファイル（Noneの場合は全て）
+        """
+        with self._lock:
+            if parquet_file_path is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(self._table_key(parquet_file_path), None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        キャッシュの統計情報を取得
+
+        Returns:
+            Dict[str, Any]: 同一条件・絞り込みでの再利用回数、保持件数など
+        """
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'refinements': self._refinements,
+                'misses': self._misses,
+                'tables': len(self._tables),
+                'results': sum(len(entries.results) for entries in self._tables.values()),
+                'resident_bytes': sum(
+                    row_ids.nbytes for entries in self._tables.values() for _, row_ids in entries.results.values()
+                ),
+            }
+
+
+_cache: Optional[FilterResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def _configured_entries_per_table() -> int:
+    try:
+        from src.core.config.settings import AppConfig
+        return AppConfig.from_config_file('config/settings.ini').viewer_cache.filter_results_per_table
+    except Exception as e:
+        logger.warning(f"キャッシュ設定を読み込めないため既定値を使用します: {e}")
+        return DEFAULT_ENTRIES_PER_TABLE
+
+
+def get_filter_result_cache() -> FilterResultCache:
+    """
+    プロセス共有の絞り込み結果キャッシュを取得
+
+    Returns:
+        FilterResultCache: 共有キャッシュ
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FilterResultCache(_configured_entries_per_table())
+        return _cache
@@ -0,0 +1,152 @@
+"""
+絞り込み結果の行番号表現（表示するページだけを読み込む）
+
+絞り込み結果を DataFrame ではなく、Parquetファイル内の行番号の配列として保持する。
+表示するページの行だけを共有キャッシュのテーブル（なければメモリマップしたファイル）から取り出すため、
+ページ送り・表示件数の変更はページの行数分の処理で済み、セッションには1件あたり4〜8バイトだけを保持する。
+"""
+import os
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.core.logging.logger import get_logger
+from src.utils.parquet_filters import read_parquet_rows
+
+logger = get_logger(__name__)
+
+# 絞り込み時に読み込む行番号の列名（表示する列とは重ならない名前）
+ROW_POSITION_COLUMN = '__row_position__'
+
+
+def compact_row_ids(row_ids) -> np.ndarray:
+    """
+    行番号の配列を格納できる最小の整数型（int32/int64）に変換
+
+    Args:
+        row_ids: 行番号
+
+    Returns:
+        np.ndarray: 行番号の配列
+    """
+    row_ids = np.asarray(row_ids)
+    if len(row_ids) == 0 or row_ids.max() <= np.iinfo(np.int32).max:
+        return row_ids.astype(np.int32, copy=False)
+    return row_ids.astype(np.int64, copy=False)
+
+
+def source_signature(parquet_file_path: str) -> Tuple[int, int]:
+    """
+    行番号が有効なファイルの版（更新日時, サイズ）
+
+    Args:
+        parquet_file_path: Parquetファイルパス
+
+    Returns:
+        Tuple[int, int]: (更新日時（ナノ秒）, サイズ)
+    """
+    stat = os.stat(parquet_file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FilteredRows:
+    """絞り込み結果（表示順に並べたParquetファイル内の行番号）"""
+
+    def __init__(self, parquet_file_path: str, row_ids, columns: Optional[List[str]] = None,
+                 prepare: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+                 source: Optional[Tuple[int, int]] = None,
+                 refilter: Optional[Callable[[], Optional['FilteredRows']]] = None):
+        """
+        絞り込み結果を初期化
+
+        Args:
+            parquet_file_path: Parquetファイルパス
+            row_ids: 表示順に並べた行番号（ファイル内の位置）
+            columns: 表示する列（Noneの場合は全列）
+            prepare: 読み込んだページに適用する表示用の変換（Noneの場合は変換しない）
+            source: 絞り込んだファイルの版（Noneの場合は現在のファイル）
+            refilter: ファイルが更新された場合に同じ条件で絞り込み直す関数（Noneの場合は絞り込み直さない）
+        """
+        self.parquet_file_path = parquet_file_path
+        self.row_ids = compact_row_ids(row_ids)
+        self.columns = None if columns is None else list(columns)
+        self.prepare = prepare
+        self.source = source if source is not None else source_signature(parquet_file_path)
+        self.refilter = refilter
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.row_ids) == 0
+
+    def is_current(self) -> bool:
+        """
+        絞り込み後にParquetファイルが更新されていないか
+
+        Returns:
+            bool: 行番号が現在のファイルに対して有効な場合True
+        """
+        try:
+            return source_signature(self.parquet_file_path) == self.source
+        except OSError:
+            return False
+
+    def _ensure_current(self) -> None:
+        """絞り込み後にファイルが更新されていれば、行番号を同じ条件で求め直す"""
+        if self.refilter is None or self.is_current():
+            return
+        logger.info(f"絞り込み後にParquetファイルが更新されたため、絞り込み直します: {self.parquet_file_path}")
+        refreshed = self.refilter()
+        if refreshed is None:
+            logger.warning(f"絞り込み直せないため、保持している行番号で読み込みます: {self.parquet_file_path}")
+            return
+        self.row_ids = refreshed.row_ids
+        self.source = refreshed.source
+
+    def take(self, start: int, stop: int) -> pd.DataFrame:
+        """
+        表示順で start〜stop 件目の行だけを読み込む
+
+        Args:
+            start: 開始位置（0始まり）
+            stop: 終了位置（この位置の行は含まない）
+
+        Returns:
+            pd.DataFrame: 読み込んだ行
+        """
+        # 更新前の行番号のまま読み込むと別の行を返すため、更新後のファイルで絞り込み直す
+        self._ensure_current()
+        total = len(self.row_ids)
+        start = min(max(0, start), total)
+        stop = min(max(start, stop), total)
+        df = read_parquet_rows(self.parquet_file_path, self.row_ids[start:stop], self.columns)
+        if self.prepare is not None:
+            df = self.prepare(df)
+        logger.debug(f"絞り込み結果の読み込み: {start}〜{stop}件目 / {total}件")
+        return df
+
+    def page(self, page_number: int, page_size: int) -> pd.DataFrame:
+        """
+        指定ページの行だけを読み込む
+
+        Args:
+            page_number: ページ番号（1始まり）
+            page_size: ページサイズ
+
+        Returns:
+            pd.DataFrame: ページの行
+        """
+        start = (max(1, page_number) - 1) * page_size
+        return self.take(start, start + page_size)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        全件を DataFrame として読み込む（CSVダウンロード用）
+
+        Returns:
+            pd.DataFrame: 絞り込み結果の全行
+        """
+        return self.take(0, len(self.row_ids))
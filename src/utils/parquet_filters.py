@@ -0,0 +1,527 @@
+"""
+Parquet読み込み時の条件・列・行範囲の絞り込み（プッシュダウン）
+
+検索フォームの入力値を pyarrow.dataset のフィルタ式に変換し、
+行グループの統計情報で該当しない行グループを読み飛ばす。読み込む列も必要な列に限定する。
+
+変換するのは pandas 側の絞り込みで必ず除外される行を除外する条件のみとし、
+最終的な絞り込みは従来どおり pandas で行う（結果は従来と同一）。
+
+ページ表示・インデックスで求めた行の読み込みでは、ファイルをメモリマップで開いて
+該当行を含む行グループだけを読み、該当行だけを DataFrame に変換する。
+
+バッチは行を表示順（インデックスの降順）に並べて書き出し、並び順をスキーマのメタデータに記録する。
+記録のあるファイルはファイルの順序のまま表示し、記録のない従来のファイルは読み込み後に並べ替える。
+文字列で保存した日付・日時の列は、全ての値がISO形式（辞書順と日付順が一致する）であることを確認して記録し、
+記録のある列は日付範囲を文字列の範囲として読み込み時に絞り込む。
+"""
+import json
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.core.logging.logger import get_logger
+from src.utils.arrow_cache import get_arrow_table_cache
+
+logger = get_logger(__name__)
+
+# 書き出し時の行グループの行数（統計情報で読み飛ばせる単位）
+PARQUET_ROW_GROUP_SIZE = 100000
+
+# 表示順で書き出したファイルを示すスキーマのメタデータ
+_ROW_ORDER_KEY = b'gig_sql.row_order'
+_DISPLAY_ORDER = b'display'
+# ISO形式の文字列で保存した日付・日時の列を示すスキーマのメタデータ
+_ISO_DATE_COLUMNS_KEY = b'gig_sql.iso_date_columns'
+# 'YYYY-MM-DD' / 'YYYY-MM-DD HH:MM:SS[.ffffff]'（未入力は空文字）
+_ISO_DATE_PATTERN = r'^(?:\d{4}-\d{2}-\d{2}(?: \d{2}:\d{2}:\d{2}(?:\.\d+)?)?)?$'
+
+_EQUALITY_TYPES = ('プルダウン', 'ラジオボタン')
+_SET_TYPES = ('チェックボックス', 'select')
+_DATE_TYPES = ('date', 'datetime')
+
+
+def _is_string(data_type: pa.DataType) -> bool:
+    return pa.types.is_string(data_type) or pa.types.is_large_string(data_type)
+
+
+def _iso_date_columns(df: pd.DataFrame, date_columns: Iterable[str]) -> List[str]:
+    """文字列で保存する日付・日時の列のうち、全ての値がISO形式（または空文字）の列"""
+    verified = []
+    for column in date_columns:
+        if column not in df.columns or df[column].dtype != object:
+            continue
+        values = df[column]
+        if values.map(lambda value: isinstance(value, str)).all() and values.str.match(_ISO_DATE_PATTERN).all():
+            verified.append(column)
+    return verified
+
+
+def display_ordered_table(df: pd.DataFrame, date_columns: Iterable[str] = ()) -> pa.Table:
+    """
+    DataFrame を表示順（インデックスの降順）に並べたテーブルに変換し、並び順をメタデータに記録
+
+    インデックスの値は変わらないため、従来どおり読み込み後に並べ替えても同じ順序になる。
+
+    Args:
+        df: 書き出す DataFrame
+        date_columns: 文字列で保存する日付・日時の列（ISO形式であることを確認できた列をメタデータに記録する）
+
+    Returns:
+        pa.Table: 表示順に並べたテーブル
+    """
+    # RangeIndex は逆順にしても RangeIndex のまま保存される（インデックスの列を追加しない）
+    ordered = df.iloc[::-1] if df.index.is_monotonic_increasing else df.sort_index(ascending=False)
+    table = pa.Table.from_pandas(ordered)
+    metadata = {**(table.schema.metadata or {}), _ROW_ORDER_KEY: _DISPLAY_ORDER}
+    iso_columns = _iso_date_columns(df, date_columns)
+    if iso_columns:
+        metadata[_ISO_DATE_COLUMNS_KEY] = json.dumps(iso_columns, ensure_ascii=False).encode('utf-8')
+    return table.replace_schema_metadata(metadata)
+
+
+def is_display_ordered(schema: pa.Schema) -> bool:
+    """スキーマのメタデータに表示順で書き出したことが記録されているか"""
+    return (schema.metadata or {}).get(_ROW_ORDER_KEY) == _DISPLAY_ORDER
+
+
+def iso_date_columns(schema: pa.Schema) -> List[str]:
+    """スキーマのメタデータに記録された、ISO形式の文字列で保存した日付・日時の列"""
+    value = (schema.metadata or {}).get(_ISO_DATE_COLUMNS_KEY)
+    try:
+        return json.loads(value.decode('utf-8')) if value else []
+    except ValueError:
+        return []
+
+
+def file_is_display_ordered(parquet_file_path: str) -> bool:
+    """
+    Parquetファイルが表示順（インデックスの降順）で書き出されているか
+
+    Args:
+        parquet_file_path: Parquetファイルパス
+
+    Returns:
+        bool: ファイルの順序のまま表示できる場合True
+    """
+    cached = get_arrow_table_cache().peek(parquet_file_path)
+    return is_display_ordered(cached.schema if cached is not None else pq.read_schema(parquet_file_path))
+
+
+def to_display_order(df: pd.DataFrame, display_ordered: bool) -> pd.DataFrame:
+    """
+    ファイルの順序で読み込んだ行を表示順（インデックスの降順）に並べる
+
+    Args:
+        df: ファイルの順序で読み込んだ DataFrame
+        display_ordered: ファイルが表示順で書き出されているか（Trueの場合は並べ替えない）
+
+    Returns:
+        pd.DataFrame: 表示順の DataFrame
+    """
+    return df if display_ordered else df.sort_index(ascending=False)
+
+
+def _pandas_dtypes(schema: pa.Schema) -> Dict[str, str]:
+    """pandas メタデータに記録された列ごとの dtype 名"""
+    metadata = schema.pandas_metadata or {}
+    return {
+        column.get('name'): column.get('numpy_type')
+        for column in metadata.get('columns', [])
+    }
+
+
+def _or_null(expression: ds.Expression, field: str, include_null: bool) -> ds.Expression:
+    # 読み込み後に NULL を空文字や0に置き換えてから比較する箇所と結果を揃える
+    return expression | ds.field(field).is_null() if include_null else expression
+
+
+def _date_range_expression(data_type: pa.DataType, field: str, value: Dict[str, Any],
+                           iso_string: bool = False) -> Optional[ds.Expression]:
+    """日付範囲の条件（開始日の0時〜終了日の終わりまで）"""
+    start_date = value.get('start_date')
+    end_date = value.get('end_date')
+    if not start_date and not end_date:
+        return None
+    bounds = []
+    if pa.types.is_timestamp(data_type) and data_type.tz is None:
+        if start_date:
+            start = datetime.combine(pd.to_datetime(start_date).date(), time.min)
+            bounds.append(ds.field(field) >= pa.scalar(start, type=pa.timestamp('us')))
+        if end_date:
+            end = datetime.combine(pd.to_datetime(end_date).date(), time.max)
+            bounds.append(ds.field(field) <= pa.scalar(end, type=pa.timestamp('us')))
+    elif pa.types.is_date(data_type):
+        if start_date:
+            bounds.append(ds.field(field) >= pa.scalar(pd.to_datetime(start_date).date(), type=data_type))
+        if end_date:
+            bounds.append(ds.field(field) <= pa.scalar(pd.to_datetime(end_date).date(), type=data_type))
+    elif _is_string(data_type) and iso_string:
+        # ISO形式の文字列は辞書順と日付順が一致する（日付のみ・時刻付きの値とも、終了日の翌日の日付より前）
+        if start_date:
+            bounds.append(ds.field(field) >= pd.to_datetime(start_date).strftime('%Y-%m-%d'))
+        if end_date:
+            next_day = pd.to_datetime(end_date).normalize() + timedelta(days=1)
+            bounds.append(ds.field(field) < next_day.strftime('%Y-%m-%d'))
+    else:
+        # 形式を確認していない文字列の日付は辞書順と日付順が一致するとは限らないため pandas 側で絞り込む
+        return None
+    expression = bounds[0]
+    for bound in bounds[1:]:
+        expression = expression & bound
+    return expression
+
+
+def _field_expression(schema: pa.Schema, pandas_dtypes: Dict[str, str], iso_dates: List[str], field: str,
+                      field_type: str, value: Any) -> Optional[ds.Expression]:
+    """1項目分の入力値をフィルタ式に変換（変換できない場合はNone）"""
+    data_type = schema.field(field).type
+
+    if field_type in _EQUALITY_TYPES:
+        if not value or value == '-' or not _is_string(data_type):
+            return None
+        return ds.field(field) == pa.scalar(str(value), type=data_type)
+
+    if field_type in _SET_TYPES and isinstance(value, dict):
+        selected = [label for label, checked in value.items() if checked]
+        if not selected or not _is_string(data_type):
+            return None
+        labels = [str(label) for label in selected]
+        return _or_null(ds.field(field).isin(labels), field, '' in labels)
+
+    if field_type in _DATE_TYPES and isinstance(value, dict):
+        return _date_range_expression(data_type, field, value, field in iso_dates)
+
+    if field_type == 'FA' and value and pa.types.is_integer(data_type) and pandas_dtypes.get(field) == 'Int64':
+        # Int64 列は完全一致で比較される（NULL は0に置き換えてから比較）
+        try:
+            number = int(value)
+        except ValueError:
+            return None
+        return _or_null(ds.field(field) == number, field, number == 0)
+
+    # 部分一致（FA / text）は統計情報で絞り込めないため pandas 側で行う
+    return None
+
+
+def build_filter_expression(schema: pa.Schema, input_fields: Dict[str, Any],
+                            input_fields_types: Dict[str, str]) -> Tuple[Optional[ds.Expression], List[str]]:
+    """
+    検索フォームの入力値を pyarrow.dataset のフィルタ式に変換
+
+    Args:
+        schema: Parquetファイルのスキーマ
+        input_fields: 入力フィールド
+        input_fields_types: フィールドタイプ
+
+    Returns:
+        Tuple[Optional[ds.Expression], List[str]]: (フィルタ式（変換できる条件がない場合はNone）, 式で参照する列)
+    """
+    pandas_dtypes = _pandas_dtypes(schema)
+    iso_dates = iso_date_columns(schema)
+    expression = None
+    referenced: List[str] = []
+    for field, value in input_fields.items():
+        if field not in schema.names:
+            continue
+        try:
+            field_expression = _field_expression(
+                schema, pandas_dtypes, iso_dates, field, input_fields_types.get(field, ''), value
+            )
+        except (pa.ArrowInvalid, pa.ArrowTypeError, ValueError) as e:
+            logger.debug(f"条件を読み込み時の絞り込みに変換できません: {field}, {e}")
+            continue
+        if field_expression is None:
+            continue
+        expression = field_expression if expression is None else expression & field_expression
+        referenced.append(field)
+    return expression, referenced
+
+
+def _index_info(schema: pa.Schema) -> Tuple[List[str], Optional[Dict[str, Any]]]:
+    """pandas メタデータのインデックス情報（列として保存されたインデックス名, RangeIndex 情報）"""
+    metadata = schema.pandas_metadata or {}
+    stored, range_index = [], None
+    for index in metadata.get('index_columns', []):
+        if isinstance(index, dict):
+            if index.get('kind') == 'range':
+                range_index = index
+        else:
+            stored.append(index)
+    return stored, range_index
+
+
+def _scan_columns(schema: pa.Schema, columns: Optional[Iterable[str]],
+                  filter_columns: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """返す列（列として保存されたインデックスを含む）と、フィルタ式の評価のために読み込む列"""
+    stored_index, _ = _index_info(schema)
+    if columns is None:
+        read_columns = [name for name in schema.names if name not in stored_index]
+    else:
+        read_columns = [name for name in dict.fromkeys(columns) if name in schema.names]
+    read_columns += stored_index
+    scan_columns = list(dict.fromkeys(read_columns + [name for name in filter_columns if name in schema.names]))
+    return read_columns, scan_columns
+
+
+def _scan_row_groups(dataset: ds.Dataset, filter_expression: Optional[ds.Expression], read_columns: List[str],
+                     scan_columns: List[str], descending: bool = False) -> Iterator[pa.Table]:
+    """
+    該当しうる行グループを1つずつ読み、フィルタ式を適用したテーブル（行番号の列付き）を返す
+
+    Yields:
+        pa.Table: 1行グループ分のテーブル（read_columns と '__row_position__'）
+    """
+    schema = dataset.schema
+    fragments = list(dataset.get_fragments())
+    for fragment in (reversed(fragments) if descending else fragments):
+        offsets = np.cumsum([0] + [
+            fragment.metadata.row_group(i).num_rows for i in range(fragment.metadata.num_row_groups)
+        ])
+        row_groups = fragment.split_by_row_group(filter=filter_expression, schema=schema)
+        logger.debug(f"読み飛ばした行グループ {fragment.metadata.num_row_groups - len(row_groups)}/{fragment.metadata.num_row_groups}件")
+        for row_group in (reversed(row_groups) if descending else row_groups):
+            group_id = row_group.row_groups[0].id
+            table = row_group.to_table(schema=schema, columns=scan_columns)
+            table = table.append_column(
+                '__row_position__', pa.array(np.arange(offsets[group_id], offsets[group_id + 1]))
+            )
+            if filter_expression is not None:
+                table = table.filter(filter_expression)
+            yield table.select(read_columns + ['__row_position__'])
+
+
+def _empty_scan_table(schema: pa.Schema, read_columns: List[str]) -> pa.Table:
+    return schema.empty_table().select(read_columns).append_column(
+        '__row_position__', pa.array([], type=pa.int64())
+    )
+
+
+def read_parquet_filtered(parquet_file_path: str, filter_expression: Optional[ds.Expression] = None,
+                          columns: Optional[Iterable[str]] = None,
+                          filter_columns: Iterable[str] = (),
+                          position_column: Optional[str] = None) -> pd.DataFrame:
+    """
+    フィルタ式と列を指定してParquetファイルを読み込む
+
+    行グループの統計情報で該当しない行グループは読み飛ばす。
+    インデックスは pd.read_parquet で全件を読み込んだ場合と同じ値（元の行番号）になる。
+
+    Args:
+        parquet_file_path: Parquetファイルパス
+        filter_expression: フィルタ式（Noneの場合は全行）
+        columns: 読み込む列（Noneの場合は全列）
+        filter_columns: フィルタ式で参照する列（columns に含まれなくても評価のために読み込む）
+        position_column: ファイル内の行番号を追加する列名（Noneの場合は追加しない）
+
+    Returns:
+        pd.DataFrame: 読み込んだデータ
+    """
+    dataset = ds.dataset(parquet_file_path, format='parquet')
+    schema = dataset.schema
+    read_columns, scan_columns = _scan_columns(schema, columns, filter_columns)
+    tables = list(_scan_row_groups(dataset, filter_expression, read_columns, scan_columns))
+    table = pa.concat_tables(tables) if tables else _empty_scan_table(schema, read_columns)
+    positions = table.column('__row_position__').to_numpy()
+    df = _to_frame(table.drop_columns(['__row_position__']), positions, schema, position_column)
+    logger.debug(f"Parquet読み込み: {len(df)}件, {len(read_columns)}列, 行グループ {len(tables)}件")
+    return df
+
+
+def iter_parquet_filtered(parquet_file_path: str, filter_expression: Optional[ds.Expression] = None,
+                          columns: Optional[Iterable[str]] = None, filter_columns: Iterable[str] = (),
+                          descending: bool = False) -> Iterator[pd.DataFrame]:
+    """
+    フィルタ式を適用しながらParquetファイルを行グループ単位で読み込む
+
+    一度に保持するのは1行グループ分のみのため、全件のCSV書き出しなどをファイルサイズに依存しないメモリで行える。
+    インデックスは read_parquet_filtered と同じ値（元の行番号）になる。
+
+    Args:
+        parquet_file_path: Parquetファイルパス
+        filter_expression: フィルタ式（Noneの場合は全行）
+        columns: 読み込む列（Noneの場合は全列）
+        filter_columns: フィルタ式で参照する列（columns に含まれなくても評価のために読み込む）
+        descending: 表示順（インデックスの降順）で返すか（表示順で書き出したファイルはファイルの順序のまま返す）
+
+    Yields:
+        pd.DataFrame: 1行グループ分の該当行（該当する行グループがない場合も空の DataFrame を1つ返す）
+    """
+    dataset = ds.dataset(parquet_file_path, format='parquet')
+    schema = dataset.schema
+    read_columns, scan_columns = _scan_columns(schema, columns, filter_columns)
+    descending = descending and not is_display_ordered(schema)
+    scanned = False
+    for table in _scan_row_groups(dataset, filter_expression, read_columns, scan_columns, descending):
+        scanned = True
+        positions = table.column('__row_position__').to_numpy()
+        df = _to_frame(table.drop_columns(['__row_position__']), positions, schema)
+        yield df.iloc[::-1] if descending else df
+    if not scanned:
+        yield _to_frame(_empty_scan_table(schema, read_columns).drop_columns(['__row_position__']),
+                        np.array([], dtype=np.int64), schema)
+
+
+def _to_frame(table: pa.Table, positions: np.ndarray, schema: pa.Schema,
+              position_column: Optional[str] = None) -> pd.DataFrame:
+    """
+    テーブルを DataFrame に変換し、pd.read_parquet で全件を読み込んだ場合と同じインデックスを付与
+
+    Args:
+        table: 変換するテーブル（スキーマに pandas メタデータを含む）
+        positions: 各行のファイル内の行番号
+        schema: ファイルのスキーマ（インデックスの情報を取得する）
+        position_column: 行番号を追加する列名（Noneの場合は追加しない）
+
+    Returns:
+        pd.DataFrame: 変換済みの DataFrame
+    """
+    stored_index, range_index = _index_info(schema)
+    df = table.to_pandas()
+    if not stored_index:
+        # 列として保存されたインデックスは to_pandas で復元されるため、それ以外は元の行番号を付与する
+        start = range_index.get('start', 0) if range_index else 0
+        step = range_index.get('step', 1) if range_index else 1
+        df.index = pd.Index(start + positions * step, name=range_index.get('name') if range_index else None)
+    if position_column is not None:
+        df[position_column] = positions
+    return df
+
+
+@contextmanager
+def _open_parquet(parquet_file_path: str) -> Iterator[Tuple[Optional[pa.Table], Optional[pq.ParquetFile], pa.Schema]]:
+    """
+    共有キャッシュのテーブル、なければメモリマップで開いたファイルを返す
+
+    Yields:
+        Tuple[Optional[pa.Table], Optional[pq.ParquetFile], pa.Schema]: (キャッシュ済みテーブル, ファイル, スキーマ)
+    """
+    cached = get_arrow_table_cache().peek(parquet_file_path)
+    if cached is not None:
+        yield cached, None, cached.schema
+        return
+    try:
+        source = pa.memory_map(parquet_file_path, 'r')
+    except OSError:
+        # メモリマップできない場所（一部のネットワークドライブ等）は通常の読み込みを使用する
+        source = pa.OSFile(parquet_file_path, 'r')
+    try:
+        parquet_file = pq.ParquetFile(source)
+        yield None, parquet_file, parquet_file.schema_arrow
+    finally:
+        source.close()
+
+
+def _projection(schema: pa.Schema, columns: Optional[Iterable[str]]) -> Tuple[Optional[List[str]], List[str]]:
+    """読み込む列（Noneの場合は全列）と列として保存されたインデックス名"""
+    stored_index, _ = _index_info(schema)
+    if columns is None:
+        return None, stored_index
+    return [name for name in dict.fromkeys(columns) if name in schema.names and name not in stored_index], stored_index
+
+
+def _row_group_offsets(parquet_file: pq.ParquetFile) -> np.ndarray:
+    metadata = parquet_file.metadata
+    return np.cumsum([0] + [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)])
+
+
+def read_parquet_page(parquet_file_path: str, offset: int, limit: int, descending: bool = False,
+                      columns: Optional[Iterable[str]] = None) -> Tuple[pd.DataFrame, int]:
+    """
+    Parquetファイルの指定範囲の行だけを読み込む
+
+    共有キャッシュにテーブルがあればそのスライス（コピーなし）を、
+    なければメモリマップで開いたファイルから範囲を含む行グループだけを読む。
+    DataFrame に変換するのは指定範囲の行のみ。
+
+    Args:
+        parquet_file_path: Parquetファイルパス
+        offset: 先頭から（descending の場合は表示順の先頭から）読み飛ばす行数
+        limit: 読み込む行数
+        descending: 表示順（インデックスの降順）で読むか（表示順で書き出したファイルはファイルの順序のまま読む）
+        columns: 読み込む列（Noneの場合は全列）
+
+    Returns:
+        Tuple[pd.DataFrame, int]: (読み込んだ行, ファイルの総行数)
+    """
+    with _open_parquet(parquet_file_path) as (cached, parquet_file, schema):
+        total_rows = cached.num_rows if cached is not None else parquet_file.metadata.num_rows
+        read_columns, stored_index = _projection(schema, columns)
+        descending = descending and not is_display_ordered(schema)
+
+        if descending:
+            stop = max(0, total_rows - max(0, offset))
+            start = max(0, stop - max(0, limit))
+        else:
+            start = min(total_rows, max(0, offset))
+            stop = min(total_rows, start + max(0, limit))
+
+        if cached is not None:
+            table = cached.slice(start, stop - start)
+        else:
+            offsets = _row_group_offsets(parquet_file)
+            row_groups = [
+                i for i in range(len(offsets) - 1)
+                if offsets[i] < stop and offsets[i + 1] > start
+            ]
+            if row_groups:
+                table = parquet_file.read_row_groups(row_groups, columns=read_columns, use_pandas_metadata=True)
+                table = table.slice(start - offsets[row_groups[0]], stop - start)
+            else:
+                table = schema.empty_table()
+            logger.debug(f"Parquetページ読み込み: {start}〜{stop}行目, 行グループ {len(row_groups)}/{len(offsets) - 1}件")
+        if read_columns is not None:
+            table = table.select(read_columns + stored_index)
+        df = _to_frame(table, np.arange(start, stop), schema)
+
+    if descending:
+        df = df.iloc[::-1]
+    return df, total_rows
+
+
+def read_parquet_rows(parquet_file_path: str, row_ids: np.ndarray,
+                      columns: Optional[Iterable[str]] = None,
+                      position_column: Optional[str] = None) -> pd.DataFrame:
+    """
+    Parquetファイルの指定した行番号の行だけを読み込む
+
+    共有キャッシュにテーブルがあればそこから、なければ該当行を含む行グループだけを読み、
+    Table.take で該当行を取り出す。インデックスは pd.read_parquet で全件を読み込んだ場合と同じ値になる。
+
+    Args:
+        parquet_file_path: Parquetファイルパス
+        row_ids: 行番号（ファイル内の位置、この順序で返す）
+        columns: 読み込む列（Noneの場合は全列）
+        position_column: ファイル内の行番号を追加する列名（Noneの場合は追加しない）
+
+    Returns:
+        pd.DataFrame: 読み込んだ行
+    """
+    row_ids = np.asarray(row_ids, dtype=np.int64)
+    with _open_parquet(parquet_file_path) as (cached, parquet_file, schema):
+        read_columns, stored_index = _projection(schema, columns)
+        if cached is not None:
+            table = cached.take(row_ids)
+        else:
+            offsets = _row_group_offsets(parquet_file)
+            groups = np.searchsorted(offsets, row_ids, side='right') - 1
+            row_groups = np.unique(groups).tolist()
+            if row_groups:
+                table = parquet_file.read_row_groups(row_groups, columns=read_columns, use_pandas_metadata=True)
+                # 読み込んだ行グループを連結したテーブル内での位置に変換する
+                sizes = np.diff(offsets)[row_groups]
+                starts = np.zeros(len(offsets) - 1, dtype=np.int64)
+                starts[row_groups] = np.cumsum(sizes) - sizes
+                table = table.take(row_ids - offsets[groups] + starts[groups])
+            else:
+                table = schema.empty_table()
+            logger.debug(f"Parquet行読み込み: {len(row_ids)}件, 行グループ {len(row_groups)}/{len(offsets) - 1}件")
+        if read_columns is not None:
+            table = table.select(read_columns + stored_index)
+        return _to_frame(table, row_ids, schema, position_column)
@@ -0,0 +1,342 @@
+"""
+Parquetファイルの検索用インデックス（サイドカー）
+
+バッチの出力時に、選択シートで絞込に指定された項目の索引を `<ファイル名>.parquet.idx` に書き出す。
+
+- プルダウン / ラジオボタン / チェックボックス: 値で並べ替えた (値, 行番号) の組（値ごとの行番号リスト）
+- Date / Datetime: 日時で並べ替えた (日時, 行番号) の組（範囲検索用の並べ替え順）
+
+設定（Tuning.ngram_index_columns）で指定した文字列の列は、部分一致（FA）検索用に
+2文字単位の n-gram ごとの行番号リストを `<ファイル名>.parquet.ngram` に書き出す。
+全角英数記号は半角に揃え、大文字・小文字を区別せずに索引する。
+
+ビューアは検索条件に一致しうる行番号を二分探索で求めて積集合を取り、該当行だけを読み込む。
+インデックスは候補の絞り込みにのみ使い、最終的な絞り込みは従来どおり pandas で行う（結果は従来と同一）。
+元のファイルと更新日時・サイズが一致しないインデックスは使用しない。
+"""
+import bisect
+import json
+import os
+from datetime import datetime, time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from src.core.logging.logger import get_logger
+from src.utils.arrow_cache import get_arrow_table_cache
+from src.utils.parquet_filters import _DATE_TYPES, _EQUALITY_TYPES, _SET_TYPES, _is_string
+
+logger = get_logger(__name__)
+
+INDEX_SUFFIX = '.idx'
+NGRAM_SUFFIX = '.ngram'
+NGRAM_SIZE = 2
+
+# 選択シートの入力方式ごとのインデックスの種類
+_INDEX_KINDS = {
+    'プルダウン': 'category',
+    'ラジオボタン': 'category',
+    'チェックボックス': 'category',
+    'Date': 'date',
+    'Datetime': 'date',
+}
+
+# 部分一致で絞り込むフィールドタイプ
+_TEXT_TYPES = ('FA', 'text')
+
+# 検索時の部分一致は正規表現のため、これらを含む入力値は n-gram で絞り込まない（'.' は任意の1文字として区切る）
+_REGEX_SPECIAL = set('\\^$*+?{}[]()|')
+
+# 全角英数記号・全角スペースを半角に揃える（1文字ずつの置き換えのため部分文字列の関係は保たれる）
+_WIDTH_TABLE = {code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F)}
+_WIDTH_TABLE[0x3000] = 0x20
+
+_METADATA_KEY = b'gig_sql.index'
+_ROW_ID_SUFFIX = '.row_id'
+
+
+def index_path_for(parquet_file_path: str) -> str:
+    """Parquetファイルに対応するインデックスファイルのパス"""
+    return parquet_file_path + INDEX_SUFFIX
+
+
+def ngram_index_path_for(parquet_file_path: str) -> str:
+    """Parquetファイルに対応する n-gram インデックスファイルのパス"""
+    return parquet_file_path + NGRAM_SUFFIX
+
+
+def _source_signature(parquet_file_path: str) -> Dict[str, int]:
+    stat = os.stat(parquet_file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _normalize_text(text: str) -> str:
+    return text.translate(_WIDTH_TABLE).casefold()
+
+
+def _ngrams(text: str) -> Set[str]:
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def _category_index(column: pa.ChunkedArray) -> Optional[pa.Table]:
+    if not _is_string(column.type):
+        return None
+    # 読み込み後に NULL を空文字に置き換えてから比較する箇所と結果を揃える
+    values = pc.fill_null(column, '')
+    order = pc.sort_indices(values).cast(pa.int64())
+    return pa.table({'value': values.take(order), 'row_id': order})
+
+
+def _date_index(column: pa.ChunkedArray) -> Optional[pa.Table]:
+    series = pd.to_datetime(column.to_pandas(), errors='coerce')
+    if not pd.api.types.is_datetime64_dtype(series):
+        # タイムゾーン付きなど、検索時の比較と揃えられない型は対象外
+        return None
+    values = pa.array(series.to_numpy(dtype='datetime64[ns]').view('int64'), mask=series.isna().to_numpy())
+    # 日時に変換できない行は末尾に置き、検索では参照しない
+    order = pc.sort_indices(values, null_placement='at_end').cast(pa.int64())
+    return pa.table({'value': values.take(order), 'row_id': order})
+
+
+def _ngram_index(field: str, column: pa.ChunkedArray) -> Optional[pa.Table]:
+    """(項目名 + n-gram, 行番号) の組。n-gram の作成は重複を除いた値ごとに1回"""
+    if not _is_string(column.type):
+        return None
+    encoded = pc.dictionary_encode(column.combine_chunks())
+    value_ids = pc.fill_null(encoded.indices, -1).to_numpy()
+
+    keys: List[str] = []
+    owners: List[int] = []
+    for value_id, value in enumerate(encoded.dictionary.to_pylist()):
+        for gram in _ngrams(_normalize_text(value)):
+            keys.append(f"{field}\x00{gram}")
+            owners.append(value_id)
+    if not keys:
+        return pa.table({'key': pa.array([], type=pa.string()), 'row_id': pa.array([], type=pa.int64())})
+
+    # 値ごとの行番号を連続させ、(n-gram, 値) の組を値の行数だけ展開する
+    rows = np.flatnonzero(value_ids >= 0)
+    rows_by_value = rows[np.argsort(value_ids[rows], kind='stable')]
+    counts = np.bincount(value_ids[rows], minlength=len(encoded.dictionary))
+    starts = np.cumsum(counts) - counts
+    owners = np.asarray(owners, dtype=np.int64)
+    repeats = counts[owners]
+    pairs = np.repeat(np.arange(len(owners)), repeats)
+    within = np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    return pa.table({
+        'key': pa.array(keys, type=pa.string()).take(pa.array(pairs)),
+        'row_id': pa.array(rows_by_value[starts[owners[pairs]] + within], type=pa.int64()),
+    })
+
+
+def _write_sidecar(path: str, parquet_file_path: str, table: Optional[pa.Table], kinds: Dict[str, str]) -> Optional[str]:
+    """インデックスを一時ファイル経由で書き出す（対象の項目がない場合は古いインデックスを削除）"""
+    if not kinds:
+        # 古いインデックスが残っていると参照されないまま残るため削除する
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    metadata = {'columns': kinds, 'source': _source_signature(parquet_file_path)}
+    table = table.replace_schema_metadata({_METADATA_KEY: json.dumps(metadata).encode('utf-8')})
+    temp_path = path + '.temp'
+    pq.write_table(table, temp_path)
+    os.replace(temp_path, path)
+    logger.info(f"検索用インデックスを作成しました: {path} ({', '.join(kinds)})")
+    return path
+
+
+def write_parquet_index(parquet_file_path: str, table: pa.Table, filter_fields: Dict[str, str],
+                        ngram_columns: Iterable[str] = ()) -> List[str]:
+    """
+    書き出したParquetファイルのインデックスを作成
+
+    Args:
+        parquet_file_path: 書き出し済みのParquetファイルパス
+        table: ファイルに書き出したテーブル（行の順序がファイルと同じもの）
+        filter_fields: 絞込項目と入力方式（DB項目 -> 入力方式）
+        ngram_columns: 部分一致検索用の n-gram インデックスを作成する列
+
+    Returns:
+        List[str]: 作成したインデックスファイルのパス
+    """
+    columns: Dict[str, pa.ChunkedArray] = {}
+    kinds: Dict[str, str] = {}
+    for field, input_type in filter_fields.items():
+        kind = _INDEX_KINDS.get(input_type)
+        if kind is None or field not in table.schema.names:
+            continue
+        column = table.column(field)
+        index = _category_index(column) if kind == 'category' else _date_index(column)
+        if index is None:
+            logger.debug(f"インデックスを作成できない型のためスキップします: {field} ({column.type})")
+            continue
+        columns[field] = index.column('value')
+        columns[field + _ROW_ID_SUFFIX] = index.column('row_id')
+        kinds[field] = kind
+
+    ngram_tables: List[pa.Table] = []
+    ngram_kinds: Dict[str, str] = {}
+    for field in dict.fromkeys(ngram_columns):
+        if field not in table.schema.names:
+            continue
+        index = _ngram_index(field, table.column(field))
+        if index is None:
+            logger.debug(f"n-gram インデックスを作成できない型のためスキップします: {field} ({table.schema.field(field).type})")
+            continue
+        ngram_tables.append(index)
+        ngram_kinds[field] = 'ngram'
+
+    written = [
+        _write_sidecar(
+            index_path_for(parquet_file_path), parquet_file_path,
+            pa.table(columns) if kinds else None, kinds
+        ),
+        _write_sidecar(
+            ngram_index_path_for(parquet_file_path), parquet_file_path,
+            pa.concat_tables(ngram_tables).sort_by([('key', 'ascending'), ('row_id', 'ascending')])
+            if ngram_kinds else None,
+            ngram_kinds
+        ),
+    ]
+    return [path for path in written if path]
+
+
+class _SortedColumn:
+    """並べ替え済みの列を二分探索するためのシーケンス（Pythonの値への変換は参照した要素のみ）"""
+
+    def __init__(self, values: pa.ChunkedArray):
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values) - self.values.null_count
+
+    def __getitem__(self, position: int) -> Any:
+        return self.values[position].as_py()
+
+
+def _load_index(parquet_file_path: str, index_path: str) -> Optional[Tuple[pa.Table, Dict[str, str]]]:
+    """インデックスと項目ごとの種類（元のファイルと一致しない場合はNone）"""
+    if not os.path.exists(index_path):
+        return None
+    index = get_arrow_table_cache().get_table(index_path)
+    metadata = json.loads((index.schema.metadata or {}).get(_METADATA_KEY, b'{}'))
+    if metadata.get('source') != _source_signature(parquet_file_path):
+        logger.debug(f"Parquetファイルが更新されているため、インデックスを使用しません: {index_path}")
+        return None
+    return index, metadata['columns']
+
+
+def _row_ids(values: pa.ChunkedArray, row_ids: pa.ChunkedArray, low: Any, high: Any) -> np.ndarray:
+    """並べ替え済みの値が low 以上 high 以下の行番号（並べ替え順のため行番号順とは限らない）"""
+    sorted_values = _SortedColumn(values)
+    start = bisect.bisect_left(sorted_values, low)
+    stop = bisect.bisect_right(sorted_values, high, lo=start)
+    return row_ids.slice(start, stop - start).to_numpy()
+
+
+def _date_bound(value: Any, end_of_day: bool) -> int:
+    day = pd.to_datetime(value).date()
+    return pd.Timestamp(datetime.combine(day, time.max if end_of_day else time.min)).value
+
+
+def _ngram_row_ids(index: pa.Table, field: str, value: Any) -> Optional[np.ndarray]:
+    """入力値の n-gram を全て含む行番号（昇順）"""
+    text = str(value) if value is not None else ''
+    if not text.strip() or _REGEX_SPECIAL & set(text):
+        return None
+    grams: Set[str] = set()
+    for segment in text.split('.'):
+        grams |= _ngrams(_normalize_text(segment))
+    if not grams:
+        # n-gram より短い入力値は絞り込めない
+        return None
+    postings = [
+        _row_ids(index.column('key'), index.column('row_id'), f"{field}\x00{gram}", f"{field}\x00{gram}")
+        for gram in grams
+    ]
+    # 件数の少ない行番号リストから積集合を取る
+    postings.sort(key=len)
+    row_ids = postings[0]
+    for posting in postings[1:]:
+        if not len(row_ids):
+            break
+        row_ids = np.intersect1d(row_ids, posting, assume_unique=True)
+    return row_ids
+
+
+def _field_row_ids(index: pa.Table, kind: str, field: str, field_type: str, value: Any) -> Optional[np.ndarray]:
+    """1項目分の入力値に一致しうる行番号（インデックスで絞り込めない場合はNone）"""
+    if kind == 'category':
+        values, row_ids = index.column(field), index.column(field + _ROW_ID_SUFFIX)
+        if field_type in _EQUALITY_TYPES:
+            if not value or value == '-':
+                return None
+            return np.sort(_row_ids(values, row_ids, str(value), str(value)))
+        if field_type in _SET_TYPES and isinstance(value, dict):
+            labels = sorted({str(label) for label, checked in value.items() if checked})
+            if not labels:
+                return None
+            return np.sort(np.concatenate([_row_ids(values, row_ids, label, label) for label in labels]))
+    elif kind == 'date' and field_type in _DATE_TYPES and isinstance(value, dict):
+        start_date = value.get('start_date')
+        end_date = value.get('end_date')
+        if not start_date and not end_date:
+            return None
+        low = _date_bound(start_date, end_of_day=False) if start_date else np.iinfo(np.int64).min
+        high = _date_bound(end_date, end_of_day=True) if end_date else np.iinfo(np.int64).max
+        values, row_ids = index.column(field), index.column(field + _ROW_ID_SUFFIX)
+        return np.sort(_row_ids(values, row_ids, low, high))
+    elif kind == 'ngram' and field_type in _TEXT_TYPES:
+        return _ngram_row_ids(index, field, value)
+    return None
+
+
+def lookup_row_ids(parquet_file_path: str, input_fields: Dict[str, Any],
+                   input_fields_types: Dict[str, str]) -> Optional[np.ndarray]:
+    """
+    インデックスから検索条件に一致しうる行番号を求める
+
+    Args:
+        parquet_file_path: Parquetファイルパス
+        input_fields: 入力フィールド
+        input_fields_types: フィールドタイプ
+
+    Returns:
+        Optional[np.ndarray]: 行番号（昇順、ファイル内の位置）。インデックスがない・使える条件がない場合はNone
+    """
+    indexes = []
+    for index_path in (index_path_for(parquet_file_path), ngram_index_path_for(parquet_file_path)):
+        try:
+            loaded = _load_index(parquet_file_path, index_path)
+        except (OSError, ValueError, pa.ArrowException) as e:
+            logger.warning(f"インデックスを読み込めないため使用しません: {index_path}, {e}")
+            continue
+        if loaded is not None:
+            indexes.append(loaded)
+    if not indexes:
+        return None
+
+    row_ids = None
+    used = []
+    for index, kinds in indexes:
+        for field, value in input_fields.items():
+            kind = kinds.get(field)
+            if kind is None:
+                continue
+            try:
+                field_row_ids = _field_row_ids(index, kind, field, input_fields_types.get(field, ''), value)
+            except (ValueError, TypeError) as e:
+                logger.debug(f"条件をインデックスで絞り込めません: {field}, {e}")
+                continue
+            if field_row_ids is None:
+                continue
+            row_ids = field_row_ids if row_ids is None else np.intersect1d(row_ids, field_row_ids, assume_unique=True)
+            used.append(field)
+
+    if row_ids is not None:
+        logger.debug(f"インデックスで絞り込み: {len(row_ids)}件 ({', '.join(used)})")
+    return row_ids
@@ -1027,6 +1027,25 @@ if selected_parent == "CSVダウンロード":
         except Exception as e:
             LOGGER.warning(f"最新更新時間の取得に失敗: {e}")
         
+        # 全セッション共有のデータキャッシュの状況
+        try:
+            from src.utils.arrow_cache import get_arrow_table_cache
+            cache_stats = get_arrow_table_cache().stats()
+            with st.sidebar.expander("🗄️ データキャッシュ"):
+                lookups = cache_stats['hits'] + cache_stats['misses']
+                st.write(f"ヒット率: {cache_stats['hit_rate']:.0%}（{cache_stats['hits']:,} / {lookups:,}）")
+                st.write(
+                    f"使用量: {cache_stats['resident_bytes'] / 1024 ** 2:,.0f}MB / "
+                    f"{cache_stats['max_bytes'] / 1024 ** 2:,.0f}MB（{cache_stats['entries']}ファイル）"
+                )
+                for cached_file in cache_stats['files']:
+                    st.caption(
+                        f"{os.path.basename(cached_file['path'])}: "
+                        f"{cached_file['rows']:,}件, {cached_file['bytes'] / 1024 ** 2:,.1f}MB"
+                    )
+        except Exception as e:
+            LOGGER.warning(f"データキャッシュの状況の取得に失敗: {e}")
+        
         csv_download(selected_child)
         LOGGER.info("CSV download function call completed")
     except Exception as e:
@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+テスト共通のフィクスチャ
+"""
+import pytest
+
+from src.core.google_api import rate_limiter
+
+
+class FakeAPIError(Exception):
+    """HTTPステータス付きの Google API エラー（gspread.exceptions.APIError と同じ属性を持つ）"""
+
+    def __init__(self, status_code, message=''):
+        super().__init__(message or f"HTTP {status_code}")
+        self.response = type('Response', (), {'status_code': status_code, 'headers': {}})()
+
+
+@pytest.fixture
+def fast_rate_limiter(monkeypatch):
+    """待機なしのレートリミッターに差し替える（スタブへの書き込みでクォータ待ちをしない）"""
+    limiter = rate_limiter.GoogleAPIRateLimiter(
+        requests_per_minute={
+            rate_limiter.SHEETS_READ: 600000,
+            rate_limiter.SHEETS_WRITE: 600000,
+            rate_limiter.DRIVE: 600000,
+        },
+        max_retries=0
+    )
+    monkeypatch.setattr(rate_limiter, '_rate_limiter', limiter)
+    return limiter
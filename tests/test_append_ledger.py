@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+最終行積立ての追記台帳（append_with_ledger）のテスト
+
+リトライしても同じチャンクが二重に追記されないことを確認する。
+"""
+import os
+import re
+import threading
+
+import pytest
+
+from conftest import FakeAPIError
+from src.core.google_api.append_ledger import AppendLedger, chunk_hash
+from src.core.google_api.sheet_values import ColumnarRows
+
+DESCRIPTION = [('id', 3), ('name', 253)]
+
+
+class StubWorksheet:
+    """ヘッダ行の後に、スプレッドシートのスタブに追記された行を持つシート"""
+
+    def __init__(self, title, spreadsheet):
+        self.title = title
+        self.spreadsheet = spreadsheet
+
+    def col_values(self, column):
+        return ['id'] + [row[column - 1] for row in self.spreadsheet.appended]
+
+    def get(self, range_, value_render_option=None):
+        match = re.match(r'^A(\d+):[A-Z]+(\d+)$', range_)
+        first, last = int(match.group(1)), int(match.group(2))
+        # シートから読み戻した値は文字列になる
+        return [[str(value) for value in row] for row in self.spreadsheet.appended[first - 2:last - 1]]
+
+
+class StubSpreadsheet:
+    """values_append で追記した行を記録し、指定回数目の追記を失敗させるスタブ"""
+
+    id = 'spreadsheet-id'
+
+    def __init__(self, fail_on=(), status=400, fail_after_append=False):
+        self.appended = []
+        self.calls = 0
+        self.fail_on = set(fail_on)
+        self.status = status
+        self.fail_after_append = fail_after_append
+
+    def values_append(self, range_, params, body):
+        self.calls += 1
+        failing = self.calls in self.fail_on
+        if failing and not self.fail_after_append:
+            raise FakeAPIError(self.status, 'append failed')
+        self.appended.extend(body['values'])
+        if failing:
+            # サーバー側では追記済みだが、応答がエラーになった場合
+            raise FakeAPIError(self.status, 'backend error')
+
+
+def _batches(count, batch_size=10):
+    rows = [(i, f"name{i}") for i in range(count)]
+    return [ColumnarRows.from_rows(rows[i:i + batch_size], DESCRIPTION) for i in range(0, count, batch_size)]
+
+
+def _append(spreadsheet, ledger, run_id, count=30):
+    loader = pytest.importorskip('core.data.subcode_loader')
+    return loader.append_with_ledger(
+        spreadsheet, StubWorksheet('Sheet1', spreadsheet), _batches(count), 2, run_id,
+        max_payload_bytes=2_000_000, max_cells=200_000, max_rows=5, ledger=ledger
+    )
+
+
+def test_retry_skips_chunks_already_appended(tmp_path, fast_rate_limiter):
+    """失敗後に同じ実行IDで再実行すると、追記済みのチャンクを読み飛ばして残りだけを追記する"""
+    ledger_path = str(tmp_path / 'append_ledger.json')
+    spreadsheet = StubSpreadsheet(fail_on={4})
+
+    with pytest.raises(FakeAPIError):
+        _append(spreadsheet, AppendLedger(ledger_path), 'run-1')
+    assert len(spreadsheet.appended) == 15
+
+    # 台帳はファイルから読み直しても有効（プロセスをまたいだリトライ）
+    result = _append(spreadsheet, AppendLedger(ledger_path), 'run-1')
+
+    assert result == {'rows': 30, 'appended_rows': 15, 'skipped_rows': 15}
+    assert spreadsheet.appended == [[i, f"name{i}"] for i in range(30)]
+    assert AppendLedger(ledger_path).written_chunks(AppendLedger.sheet_key('spreadsheet-id', 'Sheet1'), 'run-1') == set()
+
+
+def test_new_run_appends_everything(tmp_path, fast_rate_limiter):
+    """実行IDが異なる場合は、前回の記録があっても全件を追記する"""
+    ledger = AppendLedger(str(tmp_path / 'append_ledger.json'))
+    spreadsheet = StubSpreadsheet(fail_on={2})
+
+    with pytest.raises(FakeAPIError):
+        _append(spreadsheet, ledger, 'run-1', count=10)
+    result = _append(spreadsheet, ledger, 'run-2', count=10)
+
+    assert result == {'rows': 10, 'appended_rows': 10, 'skipped_rows': 0}
+    assert spreadsheet.appended == [[i, f"name{i}"] for i in range(5)] + [[i, f"name{i}"] for i in range(10)]
+
+
+def test_error_after_server_append_is_not_appended_twice(tmp_path, fast_rate_limiter):
+    """5xxの応答でもサーバー側で追記済みのチャンクは、シート末尾を確認して再送しない"""
+    fast_rate_limiter.max_retries = 3
+    spreadsheet = StubSpreadsheet(fail_on={2}, status=503, fail_after_append=True)
+
+    result = _append(spreadsheet, AppendLedger(str(tmp_path / 'append_ledger.json')), 'run-1')
+
+    assert result == {'rows': 30, 'appended_rows': 30, 'skipped_rows': 0}
+    assert spreadsheet.calls == 6
+    assert spreadsheet.appended == [[i, f"name{i}"] for i in range(30)]
+
+
+def test_error_before_server_append_is_resent(tmp_path, fast_rate_limiter, monkeypatch):
+    """5xxで追記されなかったチャンクは再送し、レートリミッターでは再試行しない"""
+    fast_rate_limiter.max_retries = 3
+    monkeypatch.setattr(fast_rate_limiter, 'backoff_seconds', lambda attempt: 0)
+    spreadsheet = StubSpreadsheet(fail_on={2}, status=503)
+
+    result = _append(spreadsheet, AppendLedger(str(tmp_path / 'append_ledger.json')), 'run-1')
+
+    assert result['appended_rows'] == 30
+    assert spreadsheet.calls == 7
+    assert spreadsheet.appended == [[i, f"name{i}"] for i in range(30)]
+
+
+def test_chunk_hash_distinguishes_position():
+    """同じ内容のチャンクでも、実行内の位置が異なれば別のチャンクとして扱う"""
+    rows = [[1, 'a']]
+
+    assert chunk_hash(0, rows) == chunk_hash(0, [[1, 'a']])
+    assert chunk_hash(0, rows) != chunk_hash(1, rows)
+
+
+def test_ledgers_sharing_a_file_keep_each_others_entries(tmp_path):
+    """同じ台帳ファイルを使う別々の台帳（別プロセス）が、互いのシートの記録を上書きしない"""
+    path = str(tmp_path / 'append_ledger.json')
+    first, second = AppendLedger(path), AppendLedger(path)
+
+    first.record('book:Sheet1', 'run-1', 'a', 10)
+    second.record('book:Sheet2', 'run-2', 'b', 10)
+    first.record('book:Sheet1', 'run-1', 'c', 10)
+
+    reloaded = AppendLedger(path)
+    assert reloaded.written_chunks('book:Sheet1', 'run-1') == {'a', 'c'}
+    assert reloaded.written_chunks('book:Sheet2', 'run-2') == {'b'}
+
+    second.complete('book:Sheet2', 'run-2')
+    assert first.written_chunks('book:Sheet1', 'run-1') == {'a', 'c'}
+    assert first.written_chunks('book:Sheet2', 'run-2') == set()
+
+
+def test_concurrent_records_are_not_lost(tmp_path):
+    """並行して記録しても、全てのチャンクが台帳に残る"""
+    path = str(tmp_path / 'append_ledger.json')
+
+    def record(sheet):
+        ledger = AppendLedger(path)
+        for i in range(20):
+            ledger.record(f"book:{sheet}", 'run-1', f"{sheet}-{i}", 1)
+
+    threads = [threading.Thread(target=record, args=(f"Sheet{n}",)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ledger = AppendLedger(path)
+    for n in range(4):
+        assert ledger.written_chunks(f"book:Sheet{n}", 'run-1') == {f"Sheet{n}-{i}" for i in range(20)}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
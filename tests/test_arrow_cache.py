@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Arrowテーブルキャッシュ（ArrowTableCache）のテスト
+
+読み込み済みかの確認（peek）がヒット率に含まれないことを確認する。
+"""
+import pandas as pd
+
+from src.utils.arrow_cache import ArrowTableCache
+
+
+def test_peek_is_not_counted_as_hit(tmp_path):
+    """peek は peeks に数え、hits・misses・ヒット率は変えない"""
+    path = str(tmp_path / 'data.parquet')
+    pd.DataFrame({'id': [1, 2, 3]}).to_parquet(path)
+    cache = ArrowTableCache()
+
+    assert cache.peek(path) is None
+    cache.get_table(path)
+    for _ in range(5):
+        assert cache.peek(path).num_rows == 3
+    cache.get_table(path)
+
+    stats = cache.stats()
+    assert stats['peeks'] == 5
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['hit_rate'] == 0.5
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+スプレッドシート一括書き込み（AdaptiveBatchWriter）のテスト
+"""
+import re
+import time
+
+import pytest
+
+from conftest import FakeAPIError
+from src.core.google_api.batch_writer import (
+    MIN_CELLS,
+    AdaptiveBatchWriter,
+    a1_range,
+    column_letter,
+    iter_payload_chunks,
+)
+
+_RANGE = re.compile(r"^'(?P<title>(?:[^']|'')*)'!A(?P<start>\d+):[A-Z]+(?P<end>\d+)$")
+
+
+class StubSpreadsheet:
+    """values_batch_update の内容を記録し、シートのセルに反映するスタブ"""
+
+    def __init__(self, failures=(), latency=0.0):
+        self.requests = []
+        self.cells = {}
+        self.failures = list(failures)
+        self.latency = latency
+
+    def values_batch_update(self, body):
+        if self.failures:
+            raise self.failures.pop(0)
+        if self.latency:
+            time.sleep(self.latency)
+        self.requests.append(body)
+        for data in body['data']:
+            match = _RANGE.match(data['range'])
+            start, end = int(match.group('start')), int(match.group('end'))
+            assert end - start + 1 == len(data['values'])
+            for offset, row in enumerate(data['values']):
+                self.cells[(match.group('title'), start + offset)] = row
+
+    def column(self, title, start_row, count):
+        return [self.cells.get((title, row)) for row in range(start_row, start_row + count)]
+
+
+def _rows(count, columns=3, start=0):
+    return [[f"r{start + i}c{c}" for c in range(columns)] for i in range(count)]
+
+
+def test_column_letter_and_range():
+    """列番号を列文字に、行範囲をシート名付きのA1形式に変換する"""
+    assert [column_letter(i) for i in (1, 26, 27, 52, 703)] == ['A', 'Z', 'AA', 'AZ', 'AAA']
+    assert a1_range("It's", 2, 10, 28) == "'It''s'!A2:AB10"
+
+
+def test_iter_payload_chunks_respects_limits():
+    """行数・セル数の上限ごとに分割し、行の順序を保つ"""
+    rows = _rows(25, columns=4)
+
+    by_rows = list(iter_payload_chunks(rows, 4, max_rows=10))
+    by_cells = list(iter_payload_chunks(rows, 4, max_cells=12))
+
+    assert [len(chunk) for chunk in by_rows] == [10, 10, 5]
+    assert [len(chunk) for chunk in by_cells] == [3] * 8 + [1]
+    assert [row for chunk in by_cells for row in chunk] == rows
+
+
+def test_contiguous_ranges_are_sent_in_one_request(fast_rate_limiter):
+    """連続する範囲は1つにまとめ、上限内であれば1リクエストで送信する"""
+    spreadsheet = StubSpreadsheet()
+    writer = AdaptiveBatchWriter(spreadsheet)
+
+    writer.add_rows('Sheet1', 2, _rows(5), 3)
+    writer.add_rows('Sheet1', 7, _rows(5, start=5), 3)
+    writer.add_rows('Sheet2', 2, _rows(2), 3)
+    stats = writer.close()
+
+    assert stats['requests'] == 1
+    assert [data['range'] for data in spreadsheet.requests[0]['data']] == ["'Sheet1'!A2:C11", "'Sheet2'!A2:C3"]
+    assert spreadsheet.column('Sheet1', 2, 10) == _rows(10)
+
+
+def test_requests_are_split_by_cell_limit(fast_rate_limiter):
+    """セル数の上限を超えないようにリクエストを分ける"""
+    spreadsheet = StubSpreadsheet()
+    writer = AdaptiveBatchWriter(spreadsheet, max_cells=MIN_CELLS)
+    rows = _rows(1000)
+
+    writer.add_rows('Sheet1', 2, rows, 3)
+    stats = writer.close()
+
+    cells_per_request = [
+        sum(len(data['values']) * 3 for data in body['data']) for body in spreadsheet.requests
+    ]
+    assert stats['requests'] == len(spreadsheet.requests) == 4  # 333 行（999 セル）ずつ
+    assert max(cells_per_request) <= MIN_CELLS
+    assert spreadsheet.column('Sheet1', 2, 1000) == rows
+
+
+def test_size_error_splits_request_and_shrinks_limits(fast_rate_limiter):
+    """サイズ起因のエラーでは上限を縮小し、2分割して再送する"""
+    spreadsheet = StubSpreadsheet(failures=[FakeAPIError(413, 'Request payload too large')])
+    writer = AdaptiveBatchWriter(spreadsheet, max_rows=100)
+    ceiling_bytes, ceiling_cells = writer.limit_bytes, writer.limit_cells
+    rows = _rows(100)
+
+    writer.add_rows('Sheet1', 2, rows, 3)
+    stats = writer.close()
+
+    assert stats['splits'] == 1
+    assert stats['shrinks'] == 1
+    assert (writer.limit_bytes, writer.limit_cells) == (ceiling_bytes // 2, ceiling_cells // 2)
+    assert [len(body['data'][0]['values']) for body in spreadsheet.requests] == [50, 50]
+    assert spreadsheet.column('Sheet1', 2, 100) == rows
+
+
+def test_payload_size_400_splits_request(fast_rate_limiter):
+    """リクエストサイズ超過の400も2分割して再送する"""
+    spreadsheet = StubSpreadsheet(failures=[FakeAPIError(400, 'Request payload size exceeds the limit')])
+    writer = AdaptiveBatchWriter(spreadsheet)
+    rows = _rows(10)
+
+    writer.add_rows('Sheet1', 2, rows, 3)
+    stats = writer.close()
+
+    assert stats['splits'] == 1
+    assert spreadsheet.column('Sheet1', 2, 10) == rows
+
+
+@pytest.mark.parametrize('error', [FakeAPIError(400, 'Invalid value'), FakeAPIError(503, 'Service unavailable')])
+def test_other_errors_are_raised(fast_rate_limiter, error):
+    """サイズ以外のエラー（レートリミッターが再試行済みの5xxを含む）は分割せずにそのまま送出する"""
+    spreadsheet = StubSpreadsheet(failures=[error])
+    writer = AdaptiveBatchWriter(spreadsheet)
+    writer.add_rows('Sheet1', 2, _rows(10), 3)
+
+    with pytest.raises(FakeAPIError):
+        writer.close()
+    assert spreadsheet.requests == []
+    assert writer.stats.splits == 0
+
+
+def test_slow_response_shrinks_limits(fast_rate_limiter):
+    """応答が目標時間を超えた場合は上限を縮小する"""
+    spreadsheet = StubSpreadsheet(latency=0.02)
+    writer = AdaptiveBatchWriter(spreadsheet, target_latency=0.01)
+    ceiling_bytes = writer.limit_bytes
+
+    writer.add_rows('Sheet1', 2, _rows(10), 3)
+    stats = writer.close()
+
+    assert stats['shrinks'] == 1
+    assert writer.limit_bytes == ceiling_bytes // 2
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Parquetファイルの集計情報（サイドカー）のテスト
+"""
+import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.utils.dataset_metadata import (
+    build_dataset_metadata,
+    column_date_range,
+    load_dataset_metadata,
+    write_dataset_metadata,
+)
+
+
+def _table():
+    # バッチの書き出しと同じく、日付・日時は文字列で保存する
+    return pa.Table.from_pandas(pd.DataFrame({
+        'ordered_on': ['2023-12-31', '2024-03-01', 'NaT', '2024-01-15'],
+        'created_at': ['2024-01-05 09:00:00', '2024-02-01 23:59:59', 'None', '2024-01-31 00:00:00'],
+        'name': ['a', 'b', 'c', 'd'],
+    }), preserve_index=False)
+
+
+def test_date_range_of_string_columns_marked_as_dates():
+    """日付・日時に指定した文字列の列は、変換した値から最小日・最大日を求める"""
+    metadata = build_dataset_metadata(_table(), date_columns=['ordered_on', 'created_at'])
+
+    assert column_date_range(metadata, 'ordered_on') == (datetime.date(2023, 12, 31), datetime.date(2024, 3, 1))
+    assert column_date_range(metadata, 'created_at') == (datetime.date(2024, 1, 5), datetime.date(2024, 2, 1))
+
+
+def test_no_date_range_for_unmarked_string_columns():
+    """日付に指定していない文字列の列は範囲を持たない"""
+    metadata = build_dataset_metadata(_table())
+
+    assert column_date_range(metadata, 'ordered_on') is None
+    assert column_date_range(metadata, 'name') is None
+
+
+def test_typed_date_column_range():
+    """日付型の列は型の最小値・最大値を使用する"""
+    table = pa.table({'day': pa.array([datetime.date(2024, 5, 2), None, datetime.date(2024, 4, 1)])})
+
+    assert column_date_range(build_dataset_metadata(table), 'day') == (datetime.date(2024, 4, 1), datetime.date(2024, 5, 2))
+
+
+def test_written_metadata_keeps_date_range(tmp_path):
+    """書き出した集計情報からも日付の範囲を取得できる"""
+    path = str(tmp_path / 'data.parquet')
+    table = _table()
+    pq.write_table(table, path)
+    write_dataset_metadata(path, table, date_columns=['created_at'])
+
+    metadata = load_dataset_metadata(path)
+
+    assert metadata['row_count'] == 4
+    assert column_date_range(metadata, 'created_at') == (datetime.date(2024, 1, 5), datetime.date(2024, 2, 1))
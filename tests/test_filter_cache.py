@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+絞り込み結果キャッシュ（FilterResultCache）のテスト
+
+条件を追加した場合は保持済みの結果に差分の条件だけを適用し、その結果が全件から絞り込んだ結果と一致することを確認する。
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from src.utils.filter_cache import FilterResultCache, _implies, active_predicates
+from src.utils.parquet_filters import display_ordered_table
+
+PATH = 'data.parquet'
+SOURCE = (1, 100)
+TYPES = {
+    'category': 'プルダウン',
+    'tag': 'チェックボックス',
+    'created_at': 'datetime',
+    'name': 'FA',
+}
+
+
+def _dates(start=None, end=None):
+    return {'start_date': start, 'end_date': end}
+
+
+def _predicate(field, value):
+    return active_predicates({field: value}, TYPES)[field]
+
+
+def test_active_predicates_skip_empty_conditions():
+    """未入力・「-」・選択なしの条件は含めない"""
+    predicates = active_predicates(
+        {'category': '-', 'tag': {'x': False}, 'created_at': _dates(), 'name': '', 'status': '有効'},
+        dict(TYPES, status='ラジオボタン'),
+    )
+
+    assert predicates == {'status': ('ラジオボタン', '有効')}
+
+
+@pytest.mark.parametrize('field, new, old, expected', [
+    ('tag', {'x': True}, {'x': True, 'y': True}, True),
+    ('tag', {'x': True, 'z': True}, {'x': True, 'y': True}, False),
+    ('created_at', _dates(datetime.date(2024, 1, 10), datetime.date(2024, 1, 20)),
+     _dates(datetime.date(2024, 1, 1), datetime.date(2024, 1, 31)), True),
+    ('created_at', _dates(datetime.date(2024, 1, 10)), _dates(datetime.date(2024, 1, 1), datetime.date(2024, 1, 31)),
+     False),
+    ('created_at', _dates(end=datetime.date(2024, 1, 20)), _dates(end=datetime.date(2024, 1, 31)), True),
+    # 日付範囲は日単位で比較する
+    ('created_at', _dates(datetime.datetime(2024, 1, 1, 12)), _dates(datetime.date(2024, 1, 1)), True),
+    ('name', '山本', '山', False),
+    ('name', '山', '山', True),
+    ('category', 'A', 'B', False),
+])
+def test_implies(field, new, old, expected):
+    """新しい条件を満たす行が必ず保持済みの条件を満たす場合だけ True"""
+    assert _implies(_predicate(field, new), _predicate(field, old)) is expected
+
+
+def test_lookup_exact_and_refinement():
+    """同じ条件は行番号をそのまま返し、条件の追加・範囲の縮小には差分の条件を返す"""
+    cache = FilterResultCache()
+    january = {'created_at': _dates(datetime.date(2024, 1, 1), datetime.date(2024, 1, 31))}
+    cache.store(PATH, january, TYPES, np.array([9, 5, 2]), SOURCE)
+
+    row_ids, remaining = cache.lookup(PATH, january, TYPES, SOURCE)
+    assert row_ids.tolist() == [9, 5, 2]
+    assert remaining == {}
+
+    refined = {'created_at': _dates(datetime.date(2024, 1, 10), datetime.date(2024, 1, 20)), 'category': 'A'}
+    row_ids, remaining = cache.lookup(PATH, refined, TYPES, SOURCE)
+    assert row_ids.tolist() == [9, 5, 2]
+    assert remaining == refined
+
+    assert cache.lookup(PATH, {'category': 'A'}, TYPES, SOURCE) is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['refinements'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_lookup_uses_smallest_base():
+    """絞り込める結果が複数ある場合は最も件数の少ない結果を基にし、全件の結果は基にしない"""
+    cache = FilterResultCache()
+    cache.store(PATH, {}, TYPES, np.arange(10), SOURCE)
+    cache.store(PATH, {'tag': {'x': True, 'y': True}}, TYPES, np.array([8, 6, 4, 2]), SOURCE)
+    cache.store(PATH, {'category': 'A'}, TYPES, np.array([7, 6]), SOURCE)
+
+    row_ids, remaining = cache.lookup(PATH, {'category': 'A', 'tag': {'x': True}}, TYPES, SOURCE)
+
+    assert row_ids.tolist() == [7, 6]
+    assert remaining == {'tag': {'x': True}}
+    assert cache.lookup(PATH, {'name': '山'}, TYPES, SOURCE) is None
+
+
+def test_file_update_discards_results():
+    """ファイルの版が変わった場合はテーブルの結果をすべて破棄する"""
+    cache = FilterResultCache()
+    cache.store(PATH, {'category': 'A'}, TYPES, np.array([1]), SOURCE)
+
+    assert cache.lookup(PATH, {'category': 'A'}, TYPES, (2, 100)) is None
+    assert cache.stats()['results'] == 0
+
+
+def test_store_evicts_least_recently_used():
+    """テーブルごとの上限を超えた場合は最も長く使われていない結果を破棄し、保持する行番号は変更できない"""
+    cache = FilterResultCache(entries_per_table=2)
+    for category in 'ABC':
+        if category == 'C':
+            cache.lookup(PATH, {'category': 'A'}, TYPES, SOURCE)
+        cache.store(PATH, {'category': category}, TYPES, np.array([ord(category)]), SOURCE)
+
+    assert cache.lookup(PATH, {'category': 'B'}, TYPES, SOURCE) is None
+    row_ids, _ = cache.lookup(PATH, {'category': 'A'}, TYPES, SOURCE)
+    assert not row_ids.flags.writeable
+
+    cache.invalidate(PATH)
+    assert cache.stats()['tables'] == 0
+
+
+def test_refinement_matches_fresh_filter(tmp_path, monkeypatch):
+    """保持済みの結果に差分の条件を適用した行番号は、キャッシュなしで絞り込んだ行番号と一致する"""
+    loader = pytest.importorskip('core.streamlit.subcode_streamlit_loader')
+    path = str(tmp_path / 'data.parquet')
+    start = datetime.datetime(2024, 1, 1)
+    df = pd.DataFrame({
+        'name': [f"{'山田' if i % 2 else '田中'}{i}" for i in range(60)],
+        'category': ['ABC'[i % 3] for i in range(60)],
+        'tag': [['x', 'y', 'z'][i % 3 - 1] if i % 7 else None for i in range(60)],
+        'created_at': [(start + datetime.timedelta(hours=20 * i)).strftime('%Y-%m-%d %H:%M:%S') for i in range(60)],
+    })
+    pq.write_table(display_ordered_table(df), path, row_group_size=16)
+
+    broad = {'created_at': _dates(datetime.date(2024, 1, 5), datetime.date(2024, 2, 5)), 'tag': {'x': True, 'y': True}}
+    narrow = {'created_at': _dates(datetime.date(2024, 1, 10), datetime.date(2024, 1, 25)), 'tag': {'y': True},
+              'category': 'C'}
+
+    cache = FilterResultCache()
+    monkeypatch.setattr(loader, 'get_filter_result_cache', lambda: cache)
+    loader.filter_parquet_rows(path, broad, TYPES)
+    refined = loader.filter_parquet_rows(path, narrow, TYPES)
+    assert cache.stats()['refinements'] == 1
+
+    monkeypatch.setattr(loader, 'get_filter_result_cache', lambda: FilterResultCache())
+    fresh = loader.filter_parquet_rows(path, narrow, TYPES)
+
+    assert len(fresh) > 0
+    np.testing.assert_array_equal(refined.row_ids, fresh.row_ids)
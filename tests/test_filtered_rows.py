@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+絞り込み結果の行番号表現（FilteredRows）のテスト
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.utils.filtered_rows import FilteredRows
+
+
+def _write(path, names):
+    pq.write_table(pa.Table.from_pandas(pd.DataFrame({'name': names}), preserve_index=False), path)
+
+
+def _filter(path, keyword):
+    # 画面の絞り込みの代わりに、名前に keyword を含む行を表示順（降順）で返す
+    names = pq.read_table(path).column('name').to_pylist()
+    row_ids = [position for position, name in enumerate(names) if keyword in name][::-1]
+    return FilteredRows(path, row_ids, refilter=lambda: _filter(path, keyword))
+
+
+def test_take_reads_rows_in_stored_order(tmp_path):
+    """行番号の順（表示順）で指定範囲の行を読み込む"""
+    path = str(tmp_path / 'data.parquet')
+    _write(path, ['山田', '田中', '山本', '山口'])
+
+    rows = _filter(path, '山')
+
+    assert len(rows) == 3
+    assert rows.take(0, 2)['name'].tolist() == ['山口', '山本']
+    assert rows.page(2, 2)['name'].tolist() == ['山田']
+    assert rows.to_frame()['name'].tolist() == ['山口', '山本', '山田']
+
+
+def test_take_refilters_after_file_update(tmp_path):
+    """絞り込み後にファイルが更新された場合は、更新後のファイルで絞り込み直す"""
+    path = str(tmp_path / 'data.parquet')
+    _write(path, ['山田', '田中', '山本', '山口'])
+    rows = _filter(path, '山')
+
+    _write(path, ['佐藤', '山下', '鈴木', '山崎', '高橋', '山内'])
+
+    assert not rows.is_current()
+    assert rows.to_frame()['name'].tolist() == ['山内', '山崎', '山下']
+    assert rows.is_current()
+    np.testing.assert_array_equal(rows.row_ids, [5, 3, 1])
+
+
+def test_without_refilter_keeps_row_ids(tmp_path):
+    """絞り込み直す関数がない場合は保持している行番号のまま読み込む"""
+    path = str(tmp_path / 'data.parquet')
+    _write(path, ['a', 'b', 'c'])
+    rows = FilteredRows(path, [2, 0])
+
+    _write(path, ['x', 'y', 'z', 'w'])
+
+    assert rows.to_frame()['name'].tolist() == ['z', 'x']
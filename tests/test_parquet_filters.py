@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Parquetファイルの読み込み時の絞り込み（parquet_filters）のテスト
+
+読み込み時に適用するフィルタ式・列の指定・範囲の読み込みの結果が、
+pd.read_parquet で全件を読み込んでから絞り込んだ結果と一致することを確認する。
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.utils.data_processing import apply_filters
+from src.utils.parquet_filters import (
+    build_filter_expression,
+    display_ordered_table,
+    file_is_display_ordered,
+    iso_date_columns,
+    read_parquet_filtered,
+    read_parquet_page,
+    read_parquet_rows,
+    to_display_order,
+)
+
+ROW_COUNT = 95
+ROW_GROUP_SIZE = 10
+
+
+def _sample_frame():
+    rng = np.random.default_rng(0)
+    start = datetime.datetime(2024, 1, 1)
+    created = [start + datetime.timedelta(hours=int(h)) for h in np.sort(rng.integers(0, 24 * 90, ROW_COUNT))]
+    code = pd.array(rng.integers(0, 5, ROW_COUNT), dtype='Int64')
+    code[::7] = pd.NA
+    return pd.DataFrame({
+        'name': [f"name{i:03d}" for i in range(ROW_COUNT)],
+        'category': [None if i % 11 == 0 else 'ABC'[i % 3] for i in range(ROW_COUNT)],
+        'tag': [['x', 'y', ''][i % 3] if i % 13 else None for i in range(ROW_COUNT)],
+        'code': code,
+        'created_at': pd.to_datetime(created),
+        'ordered_on': [value.date() for value in created],
+        'created_text': [value.strftime('%Y-%m-%d %H:%M:%S') for value in created],
+    })
+
+
+@pytest.fixture(params=['plain', 'display'])
+def parquet_file(request, tmp_path):
+    """行グループを複数に分けたParquetファイル（従来の順序 / 表示順）"""
+    path = str(tmp_path / f"{request.param}.parquet")
+    df = _sample_frame()
+    table = display_ordered_table(df) if request.param == 'display' else pa.Table.from_pandas(df)
+    pq.write_table(table, path, row_group_size=ROW_GROUP_SIZE)
+    return path
+
+
+def _read_with_pushdown(path, input_fields, input_fields_types, columns=None):
+    schema = pq.read_schema(path)
+    filter_expression, filter_columns = build_filter_expression(schema, input_fields, input_fields_types)
+    return read_parquet_filtered(path, filter_expression, columns, filter_columns), filter_expression
+
+
+def _sorted(df):
+    return df.sort_index()
+
+
+@pytest.mark.parametrize('input_fields, input_fields_types', [
+    ({'category': {'A': True, 'C': True}}, {'category': 'select'}),
+    ({'created_at': {'start_date': datetime.date(2024, 2, 1), 'end_date': datetime.date(2024, 2, 15)}},
+     {'created_at': 'date'}),
+    ({'ordered_on': {'start_date': datetime.date(2024, 1, 10)}}, {'ordered_on': 'date'}),
+    ({'created_text': {'end_date': datetime.date(2024, 1, 20)}}, {'created_text': 'date'}),
+    ({'name': 'name01', 'category': {'B': True}}, {'name': 'text', 'category': 'select'}),
+])
+def test_pushdown_matches_full_read(parquet_file, input_fields, input_fields_types):
+    """読み込み時に絞り込んでから apply_filters した結果は、全件読み込みからの結果と一致する"""
+    pushed, _ = _read_with_pushdown(parquet_file, input_fields, input_fields_types)
+
+    expected = apply_filters(pd.read_parquet(parquet_file), input_fields, input_fields_types)
+
+    pd.testing.assert_frame_equal(_sorted(apply_filters(pushed, input_fields, input_fields_types)), _sorted(expected))
+
+
+def test_pushdown_skips_row_groups(parquet_file):
+    """日時の範囲の条件では該当しない行グループを読まない"""
+    input_fields = {'created_at': {'start_date': datetime.date(2024, 3, 20)}}
+    pushed, filter_expression = _read_with_pushdown(parquet_file, input_fields, {'created_at': 'date'})
+
+    assert filter_expression is not None
+    assert len(pushed) < ROW_COUNT
+    assert (pushed['created_at'] >= pd.Timestamp(2024, 3, 20)).all()
+
+
+def test_unsupported_conditions_are_left_to_pandas(parquet_file):
+    """部分一致・文字列の日付は式に変換しない（全行を読み込み pandas 側で絞り込む）"""
+    schema = pq.read_schema(parquet_file)
+    filter_expression, filter_columns = build_filter_expression(
+        schema,
+        {'name': 'name0', 'created_text': {'start_date': datetime.date(2024, 2, 1)}, 'missing': 'x'},
+        {'name': 'FA', 'created_text': 'date', 'missing': 'FA'},
+    )
+
+    assert filter_expression is None
+    assert filter_columns == []
+
+
+def _string_dates_frame():
+    """バッチの書き出しと同じく、日付・日時を文字列（未入力は空文字）にした DataFrame"""
+    df = _sample_frame()
+    blank = [i % 9 == 0 for i in range(ROW_COUNT)]
+    df['created_text'] = ['' if b else value for b, value in zip(blank, df['created_text'])]
+    df['ordered_text'] = ['' if b else str(value) for b, value in zip(blank, df['ordered_on'])]
+    df['slashed_text'] = [value.replace('-', '/') for value in df['ordered_text']]
+    return df
+
+
+@pytest.fixture
+def string_dates_file(tmp_path):
+    """ISO形式の文字列の日付・日時の列を記録したParquetファイル"""
+    path = str(tmp_path / 'string_dates.parquet')
+    table = display_ordered_table(_string_dates_frame(), date_columns=['created_text', 'ordered_text', 'slashed_text'])
+    pq.write_table(table, path, row_group_size=ROW_GROUP_SIZE)
+    return path
+
+
+def test_iso_date_columns_are_recorded(string_dates_file):
+    """全ての値がISO形式（または空文字）の列だけを記録する"""
+    assert iso_date_columns(pq.read_schema(string_dates_file)) == ['created_text', 'ordered_text']
+
+
+_STRING_DATE_RANGES = pytest.mark.parametrize('start_date, end_date', [
+    (datetime.date(2024, 2, 1), datetime.date(2024, 2, 15)),
+    (datetime.date(2024, 3, 1), None),
+    (None, datetime.date(2024, 1, 20)),
+])
+
+
+@pytest.mark.parametrize('field', ['created_text', 'ordered_text'])
+@_STRING_DATE_RANGES
+def test_iso_string_dates_are_pushed_down(string_dates_file, field, start_date, end_date):
+    """ISO形式の文字列の日付範囲は読み込み時に絞り込み、結果は全件読み込みからの結果と一致する"""
+    input_fields = {field: {'start_date': start_date, 'end_date': end_date}}
+    input_fields_types = {field: 'date'}
+
+    pushed, filter_expression = _read_with_pushdown(string_dates_file, input_fields, input_fields_types)
+
+    assert filter_expression is not None
+    assert len(pushed) < ROW_COUNT
+    expected = apply_filters(pd.read_parquet(string_dates_file), input_fields, input_fields_types)
+    pd.testing.assert_frame_equal(_sorted(apply_filters(pushed, input_fields, input_fields_types)), _sorted(expected))
+
+
+@pytest.mark.parametrize('field, field_type', [('created_text', 'datetime'), ('ordered_text', 'date')])
+@_STRING_DATE_RANGES
+def test_iso_string_dates_match_viewer_filter(string_dates_file, field, field_type, start_date, end_date):
+    """ISO形式の文字列の日付範囲の読み込み時の絞り込みは、ビューアの絞り込みの結果とも一致する"""
+    loader = pytest.importorskip('core.streamlit.subcode_streamlit_loader')
+    input_fields = {field: {'start_date': start_date, 'end_date': end_date}}
+    input_fields_types = {field: field_type}
+
+    def viewer_filter(df):
+        return loader._apply_filter_conditions(loader._fill_missing_values(df), input_fields, input_fields_types)
+
+    pushed, _ = _read_with_pushdown(string_dates_file, input_fields, input_fields_types)
+
+    pd.testing.assert_frame_equal(
+        _sorted(viewer_filter(pushed)), _sorted(viewer_filter(pd.read_parquet(string_dates_file)))
+    )
+
+
+def test_unverified_string_dates_are_left_to_pandas(string_dates_file):
+    """ISO形式であることを確認していない文字列の日付は式に変換しない"""
+    filter_expression, _ = build_filter_expression(
+        pq.read_schema(string_dates_file), {'slashed_text': {'start_date': datetime.date(2024, 2, 1)}},
+        {'slashed_text': 'date'}
+    )
+
+    assert filter_expression is None
+
+
+def test_column_selection_reads_only_requested_columns(parquet_file):
+    """列を指定した場合は、条件の列を読み込んでも指定した列だけを返す"""
+    input_fields = {'category': {'A': True}}
+    pushed, _ = _read_with_pushdown(parquet_file, input_fields, {'category': 'select'}, columns=['name', 'category'])
+
+    expected = pd.read_parquet(parquet_file)
+    expected = expected[expected['category'] == 'A'][['name', 'category']]
+
+    assert list(pushed.columns) == ['name', 'category']
+    pd.testing.assert_frame_equal(_sorted(pushed), _sorted(expected))
+
+
+@pytest.mark.parametrize('input_fields, input_fields_types', [
+    ({'category': 'B'}, {'category': 'プルダウン'}),
+    ({'category': 'C'}, {'category': 'ラジオボタン'}),
+    ({'tag': {'x': True, '': True}}, {'tag': 'チェックボックス'}),
+    ({'code': '3'}, {'code': 'FA'}),
+    ({'code': '0'}, {'code': 'FA'}),
+    ({'name': 'name02'}, {'name': 'FA'}),
+    ({'created_at': {'start_date': datetime.date(2024, 1, 15), 'end_date': datetime.date(2024, 1, 31)}},
+     {'created_at': 'datetime'}),
+    ({'ordered_on': {'end_date': datetime.date(2024, 2, 1)}}, {'ordered_on': 'date'}),
+])
+def test_pushdown_matches_viewer_filter(parquet_file, input_fields, input_fields_types):
+    """ビューアの絞り込み（プルダウン・チェックボックス・FA・日付）でも全件読み込みからの結果と一致する"""
+    loader = pytest.importorskip('core.streamlit.subcode_streamlit_loader')
+
+    def viewer_filter(df):
+        return loader._apply_filter_conditions(loader._fill_missing_values(df), input_fields, input_fields_types)
+
+    pushed, _ = _read_with_pushdown(parquet_file, input_fields, input_fields_types)
+
+    pd.testing.assert_frame_equal(
+        _sorted(viewer_filter(pushed)), _sorted(viewer_filter(pd.read_parquet(parquet_file)))
+    )
+
+
+@pytest.mark.parametrize('offset, limit', [(0, 20), (15, 20), (90, 20), (200, 5)])
+@pytest.mark.parametrize('descending', [False, True])
+def test_read_parquet_page(parquet_file, offset, limit, descending):
+    """指定範囲の行は、全件を読み込んで並べた結果の同じ範囲と一致する"""
+    full = pd.read_parquet(parquet_file)
+    ordered = to_display_order(full, file_is_display_ordered(parquet_file)) if descending else full
+
+    page, total = read_parquet_page(parquet_file, offset, limit, descending=descending)
+
+    assert total == ROW_COUNT
+    pd.testing.assert_frame_equal(page, ordered.iloc[offset:offset + limit])
+
+
+def test_read_parquet_page_columns(parquet_file):
+    """列を指定した場合は指定した順序で返す"""
+    page, _ = read_parquet_page(parquet_file, 5, 10, descending=True, columns=['code', 'name'])
+
+    assert list(page.columns) == ['code', 'name']
+
+
+def test_read_parquet_rows(parquet_file):
+    """指定した行番号の行を指定した順序で返す"""
+    row_ids = np.array([94, 0, 37, 10, 11, 9, 58])
+    full = pd.read_parquet(parquet_file)
+
+    rows = read_parquet_rows(parquet_file, row_ids, position_column='__row_position__')
+
+    np.testing.assert_array_equal(rows.pop('__row_position__').to_numpy(), row_ids)
+    pd.testing.assert_frame_equal(rows, full.iloc[row_ids])
+    assert len(read_parquet_rows(parquet_file, np.array([], dtype=np.int64))) == 0
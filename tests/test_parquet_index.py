@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Parquetファイルの検索用インデックス（parquet_index）のテスト
+
+インデックスで求めた行番号が、pandas で絞り込んだ結果の行を全て含む（候補の絞り込みのみ）ことを確認する。
+"""
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from src.utils.data_processing import apply_filters
+from src.utils.parquet_filters import display_ordered_table, read_parquet_filtered, read_parquet_rows
+from src.utils.parquet_index import index_path_for, lookup_row_ids, ngram_index_path_for, write_parquet_index
+
+ROW_COUNT = 120
+POSITION = '__row_position__'
+
+# 選択シートの絞込項目と入力方式
+FILTER_FIELDS = {
+    'category': 'プルダウン',
+    'status': 'ラジオボタン',
+    'tag': 'チェックボックス',
+    'ordered_on': 'Date',
+    'created_at': 'Datetime',
+}
+
+
+def _sample_frame():
+    rng = np.random.default_rng(1)
+    start = datetime.datetime(2024, 1, 1)
+    created = [start + datetime.timedelta(minutes=int(m)) for m in rng.integers(0, 60 * 24 * 60, ROW_COUNT)]
+    names = ['山田太郎', '山本花子', '田中ＡＢＣ', 'abc商事', 'Ｘ線検査', '佐藤.次郎']
+    # バッチの書き出しと同じく、日付・日時は文字列で保存する
+    return pd.DataFrame({
+        'name': [names[i % len(names)] + str(i) for i in range(ROW_COUNT)],
+        'category': [None if i % 9 == 0 else 'ABCD'[i % 4] for i in range(ROW_COUNT)],
+        'status': ['有効' if i % 3 else '無効' for i in range(ROW_COUNT)],
+        'tag': [['x', 'y', 'z', ''][i % 4] if i % 10 else None for i in range(ROW_COUNT)],
+        'ordered_on': [value.strftime('%Y-%m-%d') if i % 17 else '' for i, value in enumerate(created)],
+        'created_at': [value.strftime('%Y-%m-%d %H:%M:%S') for value in created],
+    })
+
+
+@pytest.fixture
+def indexed_file(tmp_path):
+    """表示順で書き出し、検索用インデックスを作成したParquetファイル"""
+    path = str(tmp_path / 'data.parquet')
+    table = display_ordered_table(_sample_frame())
+    pq.write_table(table, path, row_group_size=25)
+    written = write_parquet_index(path, table, FILTER_FIELDS, ngram_columns=['name'])
+    assert written == [index_path_for(path), ngram_index_path_for(path)]
+    return path
+
+
+def _positions(path, predicate):
+    """pandas で絞り込んだ結果の行番号（ファイル内の位置）"""
+    df = read_parquet_filtered(path, position_column=POSITION)
+    return set(predicate(df)[POSITION].tolist())
+
+
+def _assert_superset(path, input_fields, input_fields_types, predicate):
+    row_ids = lookup_row_ids(path, input_fields, input_fields_types)
+    assert row_ids is not None
+    assert np.all(np.diff(row_ids) > 0)
+    expected = _positions(path, predicate)
+    assert expected <= set(row_ids.tolist())
+    # インデックスで読み込んだ候補を同じ条件で絞り込むと、全件からの結果と一致する
+    candidates = read_parquet_rows(path, row_ids, position_column=POSITION)
+    assert set(predicate(candidates)[POSITION].tolist()) == expected
+    return row_ids, expected
+
+
+@pytest.mark.parametrize('input_fields, input_fields_types', [
+    ({'name': '山本'}, {'name': 'text'}),
+    ({'name': 'ab'}, {'name': 'text'}),
+    ({'name': 'ＡＢＣ'}, {'name': 'text'}),
+    ({'tag': {'x': True, 'z': True}}, {'tag': 'select'}),
+    ({'created_at': {'start_date': datetime.date(2024, 1, 20), 'end_date': datetime.date(2024, 2, 10)}},
+     {'created_at': 'date'}),
+    ({'ordered_on': {'start_date': datetime.date(2024, 2, 1)}, 'name': '田中'},
+     {'ordered_on': 'date', 'name': 'text'}),
+])
+def test_lookup_is_superset_of_apply_filters(indexed_file, input_fields, input_fields_types):
+    """text / select / date の条件で、apply_filters の結果の行を全て含む"""
+    _assert_superset(
+        indexed_file, input_fields, input_fields_types,
+        lambda df: apply_filters(df, input_fields, input_fields_types)
+    )
+
+
+@pytest.mark.parametrize('input_fields, input_fields_types', [
+    ({'category': 'B'}, {'category': 'プルダウン'}),
+    ({'status': '無効'}, {'status': 'ラジオボタン'}),
+    ({'tag': {'x': True, '': True}}, {'tag': 'チェックボックス'}),
+    ({'name': '山田'}, {'name': 'FA'}),
+    ({'name': '佐藤.次'}, {'name': 'FA'}),
+    ({'ordered_on': {'start_date': datetime.date(2024, 1, 15), 'end_date': datetime.date(2024, 1, 31)}},
+     {'ordered_on': 'date'}),
+    ({'created_at': {'end_date': datetime.date(2024, 1, 10)}, 'category': 'A', 'name': '山'},
+     {'created_at': 'datetime', 'category': 'プルダウン', 'name': 'FA'}),
+])
+def test_lookup_is_superset_of_viewer_filter(indexed_file, input_fields, input_fields_types):
+    """ビューアの絞り込み（プルダウン・ラジオボタン・チェックボックス・FA・日付）の結果の行を全て含む"""
+    loader = pytest.importorskip('core.streamlit.subcode_streamlit_loader')
+    _assert_superset(
+        indexed_file, input_fields, input_fields_types,
+        lambda df: loader._apply_filter_conditions(loader._fill_missing_values(df), input_fields, input_fields_types)
+    )
+
+
+def test_lookup_narrows_candidates(indexed_file):
+    """値の条件・日付の範囲は完全に一致する行だけに絞り込む"""
+    input_fields = {
+        'category': 'C',
+        'created_at': {'start_date': datetime.date(2024, 2, 1), 'end_date': datetime.date(2024, 2, 29)},
+    }
+    input_fields_types = {'category': 'プルダウン', 'created_at': 'datetime'}
+
+    row_ids = lookup_row_ids(indexed_file, input_fields, input_fields_types)
+
+    df = read_parquet_filtered(indexed_file, position_column=POSITION)
+    created_at = pd.to_datetime(df['created_at'])
+    expected = df[(df['category'] == 'C') & (created_at >= '2024-02-01') & (created_at < '2024-03-01')]
+    assert sorted(expected[POSITION].tolist()) == row_ids.tolist()
+
+
+def test_lookup_without_usable_conditions(indexed_file, tmp_path):
+    """使える条件がない・インデックスがない場合はNone"""
+    assert lookup_row_ids(indexed_file, {'category': '-', 'name': '山', 'status': ''},
+                          {'category': 'プルダウン', 'name': 'FA', 'status': 'ラジオボタン'}) is None
+    assert lookup_row_ids(indexed_file, {'name': 'a(b'}, {'name': 'FA'}) is None
+
+    plain = str(tmp_path / 'plain.parquet')
+    pq.write_table(display_ordered_table(_sample_frame()), plain)
+    assert lookup_row_ids(plain, {'category': 'A'}, {'category': 'プルダウン'}) is None
+
+
+def test_stale_index_is_ignored(indexed_file):
+    """インデックス作成後にParquetファイルが更新された場合は使用しない"""
+    pq.write_table(display_ordered_table(_sample_frame().iloc[:50]), indexed_file)
+    stat = os.stat(indexed_file)
+    os.utime(indexed_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    assert lookup_row_ids(indexed_file, {'category': 'A'}, {'category': 'プルダウン'}) is None
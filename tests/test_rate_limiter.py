@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Google API レートリミッター（TokenBucket / GoogleAPIRateLimiter）のテスト
+
+待機は時計を差し替えて実際には眠らず、待機秒数・再試行回数・メトリクスを確認する。
+"""
+import pytest
+
+from src.core.google_api import rate_limiter
+from src.core.google_api.rate_limiter import GoogleAPIRateLimiter, TokenBucket, get_status_code
+from conftest import FakeAPIError
+
+
+class FakeClock:
+    """time.monotonic / time.sleep の代わりに進める時計"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(rate_limiter.time, 'sleep', clock.sleep)
+    return clock
+
+
+def _limiter(max_retries=3):
+    return GoogleAPIRateLimiter(
+        requests_per_minute={rate_limiter.SHEETS_WRITE: 600000},
+        max_retries=max_retries
+    )
+
+
+def _failing(*errors, result='ok'):
+    """指定した例外を順に送出し、尽きたら result を返す関数"""
+    calls = []
+    pending = list(errors)
+
+    def func():
+        calls.append(1)
+        if pending:
+            raise pending.pop(0)
+        return result
+
+    return func, calls
+
+
+def _error(status, retry_after=None):
+    error = FakeAPIError(status)
+    if retry_after is not None:
+        error.response.headers = {'Retry-After': retry_after}
+    return error
+
+
+def test_token_bucket_waits_for_refill(clock):
+    """容量を使い切ると補充まで待ち、経過時間分だけ補充される"""
+    bucket = TokenBucket(rate_per_second=2.0, capacity=2.0)
+
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.5)
+
+    clock.now += 10
+    # 容量を超えては補充されない
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.5)
+
+
+def test_token_bucket_drain(clock):
+    """drain 後は残りのトークンがあっても補充を待つ"""
+    bucket = TokenBucket(rate_per_second=1.0, capacity=5.0)
+
+    bucket.drain()
+
+    assert bucket.acquire() == pytest.approx(1.0)
+
+
+def test_call_retries_rate_limit_and_server_errors(clock, monkeypatch):
+    """429・5xx は指数バックオフで再試行し、429 はバケットを空にする"""
+    limiter = _limiter()
+    monkeypatch.setattr(limiter, 'backoff_seconds', lambda attempt: 2.0 ** attempt)
+    func, calls = _failing(_error(429), _error(503))
+
+    assert limiter.call(rate_limiter.SHEETS_WRITE, func) == 'ok'
+
+    assert len(calls) == 3
+    # 1回目: 429 のバックオフ、2回目: drain された分の補充待ち、3回目: 503 のバックオフ
+    assert clock.sleeps[0] == 1.0
+    assert clock.sleeps[-1] == 2.0
+    metrics = limiter.get_metrics()[rate_limiter.SHEETS_WRITE]
+    assert metrics['retries'] == 2
+    assert metrics['rate_limit_errors'] == 1
+    assert metrics['backoff_seconds'] == 3.0
+    assert metrics['failures'] == 0
+
+
+def test_call_uses_retry_after(clock, monkeypatch):
+    """Retry-After ヘッダーがあればバックオフの代わりにその秒数待つ"""
+    limiter = _limiter()
+    monkeypatch.setattr(limiter, 'backoff_seconds', lambda attempt: 99.0)
+    func, calls = _failing(_error(503, retry_after='7'))
+
+    assert limiter.call(rate_limiter.SHEETS_WRITE, func) == 'ok'
+
+    assert clock.sleeps == [7.0]
+    assert len(calls) == 2
+
+
+def test_call_gives_up_after_max_retries(clock):
+    """最大再試行回数を超えたら例外を送出し、失敗として数える"""
+    limiter = _limiter(max_retries=2)
+    func, calls = _failing(*[_error(500) for _ in range(5)])
+
+    with pytest.raises(FakeAPIError):
+        limiter.call(rate_limiter.SHEETS_WRITE, func)
+
+    assert len(calls) == 3
+    assert limiter.get_metrics()[rate_limiter.SHEETS_WRITE]['failures'] == 1
+
+
+@pytest.mark.parametrize('status', [400, 503])
+def test_call_retries_only_given_statuses(clock, status):
+    """retry_statuses に含まれないステータスは再試行しない"""
+    limiter = _limiter()
+    func, calls = _failing(_error(status))
+
+    with pytest.raises(FakeAPIError):
+        limiter.call(rate_limiter.SHEETS_WRITE, func, retry_statuses=rate_limiter.RATE_LIMIT_STATUS_CODES)
+
+    assert len(calls) == 1
+    assert clock.sleeps == []
+
+
+def test_call_rejects_unknown_quota_class():
+    """不明なクォータ区分は ValueError"""
+    with pytest.raises(ValueError):
+        _limiter().call('unknown', lambda: None)
+
+
+@pytest.mark.parametrize('error, expected', [
+    (FakeAPIError(503), 503),
+    (Exception('Quota exceeded for quota metric'), 429),
+    (Exception('RESOURCE_EXHAUSTED'), 429),
+    (Exception('rateLimitExceeded: RATE_LIMIT_EXCEEDED'), 429),
+    # ステータスのない例外は「429」を含むだけではクォータ超過と判定しない
+    (Exception('行 1429 の値が不正です'), None),
+    (Exception('Unable to parse range: Sheet1!A429'), None),
+])
+def test_get_status_code(error, expected):
+    """構造化されたステータスを優先し、メッセージはクォータ超過の理由だけで判定する"""
+    assert get_status_code(error) == expected
+
+
+def test_get_status_code_from_http_error():
+    """googleapiclient の HttpError（resp.status）からも取得する"""
+    error = Exception('error')
+    error.resp = type('Resp', (), {'status': 502})()
+
+    assert get_status_code(error) == 502
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+スプレッドシート書き込み値の変換（ColumnarRows）のテスト
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from src.core.google_api.sheet_values import ColumnarRows, prefetch_converted_batches
+
+# cursor.description の (列名, 型コード)
+DESCRIPTION = [
+    ('id', 3),            # LONG
+    ('price', 246),       # NEWDECIMAL
+    ('ordered_on', 10),   # DATE
+    ('created_at', 12),   # DATETIME
+    ('name', 253),        # VAR_STRING
+    ('elapsed', 11),      # TIME
+    ('memo', 252),        # BLOB（型情報から判定しない列）
+]
+
+ROWS = [
+    (1, Decimal('10.50'), date(2024, 1, 5), datetime(2024, 1, 5, 9, 30), '山田', timedelta(hours=1), 'a'),
+    (2, None, None, None, None, None, None),
+    (3, Decimal('0'), date(2024, 2, 1), datetime(2024, 2, 1), '', timedelta(0), Decimal('1.5')),
+]
+
+
+def _legacy_convert(row):
+    # 列単位の変換に置き換える前の、値ごとの変換
+    return [str(v) if isinstance(v, (Decimal, date, datetime, timedelta)) else ('' if v is None else v) for v in row]
+
+
+def test_from_rows_matches_value_conversion():
+    """列単位の変換結果は、値ごとに変換した行と一致する"""
+    batch = ColumnarRows.from_rows(ROWS, DESCRIPTION)
+
+    assert len(batch) == 3
+    assert batch.column_count == len(DESCRIPTION)
+    assert batch.rows() == [_legacy_convert(row) for row in ROWS]
+    assert batch.rows()[0][:4] == [1, '10.50', '2024-01-05', '2024-01-05 09:30:00']
+    assert batch.rows()[1] == [2, '', '', '', '', '', '']
+
+
+def test_rows_range_and_batches():
+    """指定範囲の行と、書き込みバッチ単位の行を生成する"""
+    rows = [(i, f"name{i}") for i in range(7)]
+    batch = ColumnarRows.from_rows(rows, [('id', 3), ('name', 253)])
+
+    assert batch.rows(2, 4) == [[2, 'name2'], [3, 'name3']]
+    assert batch.rows(6, 100) == [[6, 'name6']]
+    assert batch.rows(5, 5) == []
+    assert [(start, len(chunk)) for start, chunk in batch.iter_batches(3)] == [(0, 3), (3, 3), (6, 1)]
+
+
+def test_empty_rows():
+    """行がない場合も列数を保持する"""
+    batch = ColumnarRows.from_rows([], DESCRIPTION)
+
+    assert len(batch) == 0
+    assert batch.column_count == len(DESCRIPTION)
+    assert batch.rows() == []
+
+
+class StubCursor:
+    """fetchmany で順に行を返すカーソルのスタブ"""
+
+    def __init__(self, rows, description, error=None):
+        self.rows = list(rows)
+        self.description = description
+        self.error = error
+
+    def fetchmany(self, size):
+        if not self.rows and self.error is not None:
+            raise self.error
+        chunk, self.rows = self.rows[:size], self.rows[size:]
+        return chunk
+
+
+def test_prefetch_returns_batches_in_order():
+    """先行取得したバッチを取得順に返す"""
+    rows = [(i, f"name{i}") for i in range(25)]
+    cursor = StubCursor(rows, [('id', 3), ('name', 253)])
+
+    batches = list(prefetch_converted_batches(cursor, 10))
+
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert [row for batch in batches for row in batch.rows()] == [list(row) for row in rows]
+
+
+def test_prefetch_raises_fetch_error():
+    """取得中のエラーは呼び出し側に送出する"""
+    cursor = StubCursor([(1, 'a')], [('id', 3), ('name', 253)], error=RuntimeError('lost connection'))
+
+    with pytest.raises(RuntimeError, match='lost connection'):
+        list(prefetch_converted_batches(cursor, 10))
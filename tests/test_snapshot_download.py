@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+全件ダウンロード（Parquetスナップショット）のテスト
+
+全件ダウンロードのCSVが、画面に表示される絞り込み結果と一致することを確認する。
+"""
+import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.utils.parquet_filters import display_ordered_table
+
+display_utils = pytest.importorskip('src.streamlit_system.ui.display_utils')
+loader = pytest.importorskip('core.streamlit.subcode_streamlit_loader')
+
+INPUT_FIELDS_TYPES = {'name': 'FA', 'created_at': 'datetime', 'status': 'プルダウン'}
+
+
+def _sample_frame():
+    # バッチの書き出しと同じく、日時は文字列で保存する
+    return pd.DataFrame({
+        'name': ['山田', '田中', '山本', '山口'],
+        'created_at': ['2024-01-05 09:00:00', '2024-01-10 12:00:00', '2024-01-31 23:30:00', '2024-02-01 00:00:00'],
+        'status': ['有効', '有効', '無効', '有効'],
+    })
+
+
+def _write(tmp_path, display_ordered):
+    path = str(tmp_path / ('display.parquet' if display_ordered else 'plain.parquet'))
+    df = _sample_frame()
+    table = display_ordered_table(df) if display_ordered else pa.Table.from_pandas(df)
+    pq.write_table(table, path)
+    return path
+
+
+def _download(path, conditions):
+    return pd.concat(
+        list(display_utils._snapshot_csv_chunks(path, conditions, INPUT_FIELDS_TYPES)), ignore_index=True
+    )
+
+
+def _on_screen(path, conditions):
+    rows = loader.filter_parquet_rows(path, conditions, INPUT_FIELDS_TYPES)
+    return pd.concat(list(display_utils._csv_chunks(rows, INPUT_FIELDS_TYPES)), ignore_index=True)
+
+
+@pytest.mark.parametrize('display_ordered', [False, True])
+def test_download_matches_on_screen_result(tmp_path, display_ordered):
+    """FA と日時の範囲の条件で、画面と同じ行（山田・山本）だけを書き出す"""
+    path = _write(tmp_path, display_ordered)
+    conditions = {
+        'name': '山',
+        'created_at': {'start_date': datetime.date(2024, 1, 1), 'end_date': datetime.date(2024, 1, 31)},
+        'status': '-',
+    }
+
+    downloaded = _download(path, conditions)
+
+    assert sorted(downloaded['name']) == ['山本', '山田']
+    pd.testing.assert_frame_equal(downloaded, _on_screen(path, conditions))
+
+
+def test_download_applies_pulldown_condition(tmp_path):
+    """プルダウンの条件も画面と同じく適用する"""
+    path = _write(tmp_path, False)
+    conditions = {'name': '', 'created_at': {}, 'status': '有効'}
+
+    downloaded = _download(path, conditions)
+
+    assert sorted(downloaded['name']) == sorted(['山田', '田中', '山口'])
+    pd.testing.assert_frame_equal(downloaded, _on_screen(path, conditions))